@@ -1,65 +1,197 @@
 """
 Generate AI Summaries for Ballot Propositions
 Uses Google Gemini AI to create plain-language summaries
+(or the local stub backend with LLM_BACKEND=stub, see llm_backend.py)
+
+    python add_ai_summaries.py [--election DATE] [--page-size N] [--restart]
+    python add_ai_summaries.py <proposition_id>
+
+Only propositions with summary_status "pending" are read, a page at a time;
+the last finished page is saved to CURSOR_FILE so an interrupted run
+picks up where it stopped.
 """
 
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
-import google.generativeai as genai
+from firebase_admin import firestore
+import re
 import sys
+import json
 import time
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
 
-# Import API key from config file
-try:
-    from config_key import GEMINI_API_KEY
-except ImportError:
-    GEMINI_API_KEY = None
+from firebase_client import get_db
+from llm_backend import open_llm_backend
+from llm_limiter import LLMRateLimiter, estimate_tokens, is_rate_limit_error
+from parish_registry import canonical_parish
+from user_checkpoint import STATE_COLLECTION
 
-# Initialize Firebase
-try:
-    firebase_admin.get_app()
-except ValueError:
-    cred = credentials.Certificate("firebase_config.json")
-    firebase_admin.initialize_app(cred)
+# The Firestore client (get_db) and the model backend (Gemini, or the local
+# stub with LLM_BACKEND=stub) are both created on first use, so importing
+# this module needs no credentials or API key
+_backend = None
+_backend_lock = threading.Lock()
 
-db = firestore.client()
 
-# Initialize Gemini AI
-# Validate API key
-if not GEMINI_API_KEY or GEMINI_API_KEY == 'YOUR_GEMINI_API_KEY_HERE':
-    print("="*60)
-    print("ERROR: Gemini API key not found!")
-    print("="*60)
-    print("Please add your API key:")
-    print()
-    print("1. Open: lib/config/api_keys.dart")
-    print("2. Copy your Gemini API key")
-    print("3. Open: config_keys.py") 
-    print("4. Paste the key: GEMINI_API_KEY = 'your_key_here'")
-    print("5. Save and run this script again")
-    print("="*60)
-    sys.exit(1)
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = open_llm_backend()
+        return _backend
 
-genai.configure(api_key=GEMINI_API_KEY)
 
-# Use the latest Gemini model
-# Options: 'gemini-1.5-flash' (faster, free) or 'gemini-1.5-pro' (better quality)
-model = genai.GenerativeModel('gemini-1.5-flash')
+def set_backend(backend):
+    """Use this backend instead of the one LLM_BACKEND selects"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
 
-def generate_summary(title: str, full_text: str) -> dict:
+# Bump whenever either prompt (single or batched) changes so cached
+# summaries from the old prompt are no longer reused
+PROMPT_VERSION = 2
+CACHE_COLLECTION = "summary_cache"
+
+# -------------------------
+# Concurrency / quota
+# -------------------------
+SUMMARY_WORKERS = int(os.environ.get("SUMMARY_WORKERS", "4"))
+MAX_RETRIES = 4                 # Retries after a 429 before giving up on a proposition
+OUTPUT_TOKEN_ESTIMATE = 400     # Budgeted for the response until real usage is known
+
+# Short propositions are packed several to a request
+BATCH_MAX_ITEMS = int(os.environ.get("SUMMARY_BATCH_ITEMS", "8"))
+BATCH_INPUT_TOKENS = 6000       # Prompt budget for one packed request
+SHORT_TEXT_TOKENS = 1200        # Longer texts always get their own request
+
+# Long texts are summarized map-reduce style: chunks are condensed into
+# notes concurrently, then the notes are summarized like a short text
+SINGLE_PASS_TOKENS = int(os.environ.get("SUMMARY_SINGLE_PASS_TOKENS", "4000"))
+CHUNK_TOKENS = 2500             # Input budget per chunk
+CHUNK_NOTE_TOKENS = 300         # Output cap per chunk's notes
+CHUNK_WORKERS = 4
+
+# Page furniture that carries nothing to summarize, removed wherever it
+# appears - each pattern matches a whole line of exactly that form
+BOILERPLATE_PATTERNS = [
+    r'^\s*proposition text\s*:?\s*$',
+    r'^\s*(?:printer[- ]friendly|print this page|print)\s*$',
+    r'^\s*page \d+ of \d+\s*$',
+    r'^\s*louisiana secretary of state\s*$',
+    r'^\s*(?:©|copyright)\s*(?:©\s*)?\d{4}\b.*$',
+    r'^\s*all rights reserved\.?\s*$',
+]
+_BOILERPLATE_RE = re.compile('|'.join(BOILERPLATE_PATTERNS), re.IGNORECASE | re.MULTILINE)
+
+# "Election Date: ..." style header lines, removed only from the block at
+# the top of the text, and only when the value is a date / known parish /
+# short election type, so body text such as "Parish: Orleans shall levy..."
+# is kept
+_HEADER_DATE_RE = re.compile(r'^\s*election date\s*:\s*\d{1,2}/\d{1,2}/\d{4}\s*$', re.IGNORECASE)
+_HEADER_TYPE_RE = re.compile(r'^\s*election type\s*:\s*[a-z]+(?: [a-z]+){0,3}\s*$', re.IGNORECASE)
+_HEADER_PARISH_RE = re.compile(r'^\s*parish\s*:\s*(.+?)\s*$', re.IGNORECASE)
+
+# -------------------------
+# Work selection
+# -------------------------
+# save_proposition marks new/changed propositions "pending"; summaries move
+# them to "done", so a run only ever reads the propositions left to do
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+PAGE_SIZE = int(os.environ.get("SUMMARY_PAGE_SIZE", "200"))
+PROPOSITION_FIELDS = ['title', 'full_text']
+CURSOR_FILE = "summary_run.cursor"
+FETCH_RETRIES = 3               # Attempts per page before the run stops (resumable)
+
+limiter = LLMRateLimiter()
+# Chunk calls get their own pool so proposition workers waiting on their
+# chunks can never starve it
+_chunk_pool = ThreadPoolExecutor(max_workers=CHUNK_WORKERS, thread_name_prefix="summary-chunk")
+
+
+def _is_header_line(line: str) -> bool:
+    if _HEADER_DATE_RE.match(line) or _HEADER_TYPE_RE.match(line):
+        return True
+    parish = _HEADER_PARISH_RE.match(line)
+    return bool(parish and canonical_parish(parish.group(1)))
+
+
+def strip_header_block(text: str) -> str:
+    """Drop the election/parish header lines (and blank lines) at the top of the text"""
+    lines = text.split('\n')
+    start = 0
+    while start < len(lines) and (not lines[start].strip() or _is_header_line(lines[start])):
+        start += 1
+    return '\n'.join(lines[start:])
+
+
+def prompt_text(full_text: str) -> str:
+    """The proposition text that is actually sent to the model: the whole
+    text, minus page furniture and the leading header block"""
+    text = strip_header_block(_BOILERPLATE_RE.sub('', full_text or ''))
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    return text.strip()
+
+
+def split_into_chunks(text: str, max_tokens: int = CHUNK_TOKENS) -> list:
     """
-    Generate a plain-language summary of a ballot proposition
-    Returns dict with summary and key_points
+    Split text into pieces of at most max_tokens, breaking between
+    paragraphs where possible, then between sentences, then anywhere.
     """
-    print(f"  [AI] Generating summary for: {title[:50]}...")
+    max_chars = max_tokens * 4  # Same ~4 chars/token as estimate_tokens
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.;:])\s+', paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
     
-    prompt = f"""You are helping voters understand ballot propositions. 
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ''
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_chunk_prompt(title: str, chunk: str, part: int, parts: int) -> str:
+    return f"""You are helping voters understand a long ballot proposition.
+
+Proposition Title: {title}
+
+Below is part {part} of {parts} of its text. List, as short bullet points,
+every concrete provision in this part: what changes, who is affected, any
+amounts, rates, dates or durations, and anything that is repealed. Do not
+summarize other parts or add commentary.
+
+Text (part {part} of {parts}):
+{chunk}"""
+
+
+def build_prompt(title: str, full_text: str, from_notes: bool = False) -> str:
+    """
+    The single-proposition prompt. With from_notes, full_text is the merged
+    chunk notes of a long proposition rather than its text.
+    """
+    if from_notes:
+        source = f"Notes on each part of the full text:\n{full_text}"
+    else:
+        source = f"Full Text:\n{prompt_text(full_text)}"
+    return f"""You are helping voters understand ballot propositions. 
 
 Proposition Title: {title}
 
-Full Text:
-{full_text[:3000]}  
+{source}  
 
 Please provide:
 1. A 2-3 sentence plain-language summary that explains what this proposition does
@@ -85,157 +217,628 @@ NO VOTE:
 
 Keep language simple and objective. Avoid political bias."""
 
+
+def build_batch_prompt(items: list) -> str:
+    """One prompt for several propositions: items are (item_id, title, full_text)"""
+    blocks = "\n\n".join(
+        f"[{item_id}]\nProposition Title: {title}\nFull Text:\n{prompt_text(full_text)}"
+        for item_id, title, full_text in items
+    )
+    ids = ", ".join(f'"{item_id}"' for item_id, _, _ in items)
+    return f"""You are helping voters understand ballot propositions.
+
+For EACH proposition below, provide:
+- summary: a 2-3 sentence plain-language summary of what it does
+- key_points: 3-5 key points voters should know
+- yes_vote: what happens if it passes
+- no_vote: what happens if it fails
+
+Keep language simple and objective. Avoid political bias.
+
+Respond with a single JSON object whose keys are the proposition ids ({ids}) and
+whose values are objects with the fields "summary" (string), "key_points"
+(array of strings), "yes_vote" (string) and "no_vote" (string).
+
+{blocks}"""
+
+
+def new_usage() -> dict:
+    """Token accounting for one proposition (or one run)"""
+    return {'input_tokens': 0, 'output_tokens': 0, 'calls': 0}
+
+
+def split_usage(usage: dict, parts: int) -> list:
+    """
+    Share one request's usage between the `parts` propositions it
+    produced: integer shares that add back up to the totals exactly
+    (none if it produced nothing)
+    """
+    if parts <= 0:
+        return []
+    shares = [new_usage() for _ in range(parts)]
+    for field in ('input_tokens', 'output_tokens', 'calls'):
+        base, extra = divmod(usage[field], parts)
+        for i, share in enumerate(shares):
+            share[field] = base + (i < extra)
+    return shares
+
+
+def add_usage(usage: dict, input_tokens: int, output_tokens: int, calls: int = 1):
+    with _cache_lock:
+        for target in (usage, token_stats) if usage is not None else (token_stats,):
+            target['input_tokens'] += input_tokens
+            target['output_tokens'] += output_tokens
+            target['calls'] += calls
+
+
+def call_model(prompt: str, json_output: bool = False, expected_output_tokens: int = OUTPUT_TOKEN_ESTIMATE,
+               max_output_tokens: int = None, usage: dict = None) -> str:
+    """
+    One generate_content call inside the shared RPM/TPM quota. 429s slow
+    the limiter down for every worker and are retried. Tokens used are
+    added to usage (and the run totals).
+    """
+    backend = get_backend()
+    estimated = estimate_tokens(prompt) + expected_output_tokens
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(estimated)
+        _count('calls')
+        try:
+            response = backend.generate(prompt, json_output=json_output, max_output_tokens=max_output_tokens)
+        except Exception as e:
+            if is_rate_limit_error(e) and attempt < MAX_RETRIES:
+                print(f"  [AI] Rate limited, backing off ({limiter.stats()})")
+                limiter.on_rate_limited()
+                continue
+            raise
+        input_tokens = response.input_tokens or estimate_tokens(prompt)
+        output_tokens = response.output_tokens or estimate_tokens(response.text)
+        limiter.record_usage(estimated, input_tokens + output_tokens)
+        limiter.on_success()
+        add_usage(usage, input_tokens, output_tokens)
+        return response.text
+
+
+def parse_summary_response(text: str) -> dict:
+    """Split the SUMMARY / KEY POINTS / YES VOTE / NO VOTE sections"""
+    sections = {}
+    current_section = None
+    current_text = []
+    
+    for line in text.split('\n'):
+        line = line.strip()
+        if line.startswith('SUMMARY:'):
+            current_section = 'summary'
+            current_text = []
+        elif line.startswith('KEY POINTS:'):
+            if current_section:
+                sections[current_section] = '\n'.join(current_text).strip()
+            current_section = 'key_points'
+            current_text = []
+        elif line.startswith('YES VOTE:'):
+            if current_section:
+                sections[current_section] = '\n'.join(current_text).strip()
+            current_section = 'yes_vote'
+            current_text = []
+        elif line.startswith('NO VOTE:'):
+            if current_section:
+                sections[current_section] = '\n'.join(current_text).strip()
+            current_section = 'no_vote'
+            current_text = []
+        elif line:
+            current_text.append(line)
+    
+    # Add last section
+    if current_section:
+        sections[current_section] = '\n'.join(current_text).strip()
+    
+    return {
+        'summary': sections.get('summary', ''),
+        'key_points': sections.get('key_points', ''),
+        'yes_vote': sections.get('yes_vote', ''),
+        'no_vote': sections.get('no_vote', ''),
+    }
+
+
+def parse_batch_response(text: str, item_ids: list) -> dict:
+    """
+    Validate a packed JSON response. Returns {item_id: summary} for the
+    items that came back complete; anything missing or malformed is left
+    out so the caller can retry it on its own.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
     try:
-        response = model.generate_content(prompt)
-        text = response.text
-        
-        # Parse the response
-        sections = {}
-        current_section = None
-        current_text = []
-        
-        for line in text.split('\n'):
-            line = line.strip()
-            if line.startswith('SUMMARY:'):
-                current_section = 'summary'
-                current_text = []
-            elif line.startswith('KEY POINTS:'):
-                if current_section:
-                    sections[current_section] = '\n'.join(current_text).strip()
-                current_section = 'key_points'
-                current_text = []
-            elif line.startswith('YES VOTE:'):
-                if current_section:
-                    sections[current_section] = '\n'.join(current_text).strip()
-                current_section = 'yes_vote'
-                current_text = []
-            elif line.startswith('NO VOTE:'):
-                if current_section:
-                    sections[current_section] = '\n'.join(current_text).strip()
-                current_section = 'no_vote'
-                current_text = []
-            elif line:
-                current_text.append(line)
-        
-        # Add last section
-        if current_section:
-            sections[current_section] = '\n'.join(current_text).strip()
-        
-        print(f"  [AI] ✓ Summary generated")
-        return {
-            'summary': sections.get('summary', ''),
-            'key_points': sections.get('key_points', ''),
-            'yes_vote': sections.get('yes_vote', ''),
-            'no_vote': sections.get('no_vote', ''),
-            'generated_at': firestore.SERVER_TIMESTAMP
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    
+    results = {}
+    for item_id in item_ids:
+        entry = data.get(item_id)
+        if not isinstance(entry, dict):
+            continue
+        points = entry.get('key_points')
+        if isinstance(points, list):
+            points = '\n'.join(f"- {p}" for p in points if isinstance(p, str) and p.strip())
+        fields = {
+            'summary': entry.get('summary'),
+            'key_points': points,
+            'yes_vote': entry.get('yes_vote'),
+            'no_vote': entry.get('no_vote'),
         }
+        if all(isinstance(v, str) and v.strip() for v in fields.values()):
+            results[item_id] = {k: v.strip() for k, v in fields.items()}
+    return results
+
+
+# -------------------------
+# Summary cache
+# -------------------------
+SUMMARY_FIELDS = ('summary', 'key_points', 'yes_vote', 'no_vote')
+
+cache_stats = {'hits': 0, 'misses': 0, 'calls': 0}
+token_stats = new_usage()
+_cache_lock = threading.Lock()
+_inflight = {}  # cache key -> Future, so concurrent duplicates share one call
+
+
+def summary_cache_key(title: str, text_sent: str) -> str:
+    """
+    Same title + same text sent + same prompt + same model = same summary,
+    whichever parish or rerun it comes from.
+    """
+    normalized_title = re.sub(r'\s+', ' ', title or '').strip().lower()
+    raw = '\0'.join([normalized_title, text_sent, str(PROMPT_VERSION), get_backend().model_name])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _count(stat):
+    with _cache_lock:
+        cache_stats[stat] += 1
+
+
+def cached_generate(key: str, generate) -> dict:
+    """Return the cached summary for key, or run generate() once and cache it"""
+    cached = get_db().collection(CACHE_COLLECTION).document(key).get()
+    if cached.exists:
+        _count('hits')
+        return {field: cached.get(field) for field in SUMMARY_FIELDS}
+    
+    with _cache_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        _count('hits')
+        return future.result()
+    
+    _count('misses')
+    try:
+        summary = generate()
+        if not summary.get('summary'):
+            raise ValueError("Model response had no SUMMARY section")  # Don't cache junk
+        store_cached_summary(key, summary)
+        future.set_result(summary)
+        return summary
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _cache_lock:
+            _inflight.pop(key, None)
+
+
+def summarize_text(title: str, text: str, usage: dict) -> dict:
+    """
+    Model call(s) for one proposition. Texts over SINGLE_PASS_TOKENS are
+    split into chunks that are condensed into notes concurrently; the
+    merged notes then go through the normal summary prompt.
+    """
+    if estimate_tokens(text) <= SINGLE_PASS_TOKENS:
+        return parse_summary_response(call_model(build_prompt(title, text), usage=usage))
+    
+    chunks = split_into_chunks(text)
+    print(f"  [AI] Long text ({estimate_tokens(text)} tokens), condensing {len(chunks)} chunks...")
+    futures = [
+        _chunk_pool.submit(call_model, build_chunk_prompt(title, chunk, i + 1, len(chunks)),
+                           expected_output_tokens=CHUNK_NOTE_TOKENS,
+                           max_output_tokens=CHUNK_NOTE_TOKENS, usage=usage)
+        for i, chunk in enumerate(chunks)
+    ]
+    notes = "\n\n".join(f"Part {i + 1}:\n{f.result().strip()}" for i, f in enumerate(futures))
+    return parse_summary_response(call_model(build_prompt(title, notes, from_notes=True), usage=usage))
+
+
+def generate_summary(title: str, full_text: str) -> dict:
+    """
+    Generate a plain-language summary of a ballot proposition
+    Returns dict with summary and key_points
+    """
+    print(f"  [AI] Generating summary for: {title[:50]}...")
+    
+    try:
+        text = prompt_text(full_text)
+        usage = new_usage()
+        key = summary_cache_key(title, text)
+        summary = dict(cached_generate(key, lambda: summarize_text(title, text, usage)))
+        summary['generated_at'] = firestore.SERVER_TIMESTAMP
+        summary['usage'] = usage  # Zero on a cache hit
+        print(f"  [AI] ✓ Summary generated ({usage['input_tokens']} in / "
+              f"{usage['output_tokens']} out tokens, {usage['calls']} calls)")
+        return summary
         
     except Exception as e:
         print(f"  [AI] Error generating summary: {e}")
         return None
 
 
-def add_summaries_to_all_propositions():
-    """Add AI summaries to all propositions that don't have them"""
+def store_cached_summary(key: str, summary: dict):
+    get_db().collection(CACHE_COLLECTION).document(key).set({
+        **summary,
+        'model': get_backend().model_name,
+        'prompt_version': PROMPT_VERSION,
+        'created_at': firestore.SERVER_TIMESTAMP,
+    })
+
+
+def generate_summaries_batch(items: list) -> dict:
+    """
+    Summaries for several short propositions in one request.
+    items are (prop_id, title, full_text); returns {prop_id: summary} for
+    those that came back (from the cache or the model) - callers fall
+    back to generate_summary for the rest.
+    """
+    keys = {prop_id: summary_cache_key(title, prompt_text(text)) for prop_id, title, text in items}
+    
+    # One round trip for every cache lookup in the pack
+    refs = [get_db().collection(CACHE_COLLECTION).document(k) for k in set(keys.values())]
+    cached = {
+        snap.id: {field: snap.get(field) for field in SUMMARY_FIELDS}
+        for snap in get_db().get_all(refs) if snap.exists
+    }
+    
+    todo = {}  # cache key -> (title, text), duplicates in the pack sent once
+    for prop_id, title, text in items:
+        if keys[prop_id] in cached:
+            _count('hits')
+        elif keys[prop_id] not in todo:
+            _count('misses')
+            todo[keys[prop_id]] = (title, text)
+    
+    if todo:
+        item_ids = {f"p{i + 1}": key for i, key in enumerate(todo)}
+        prompt = build_batch_prompt([(item_id, *todo[key]) for item_id, key in item_ids.items()])
+        print(f"  [AI] Generating {len(todo)} summaries in one request...")
+        usage = new_usage()
+        try:
+            response = call_model(prompt, json_output=True,
+                                  expected_output_tokens=OUTPUT_TOKEN_ESTIMATE * len(todo), usage=usage)
+            parsed = parse_batch_response(response, list(item_ids))
+        except Exception as e:
+            print(f"  [AI] Batched request failed: {e}")
+            parsed = {}
+        generated_keys = set()
+        for item_id, summary in parsed.items():
+            store_cached_summary(item_ids[item_id], summary)
+            cached[item_ids[item_id]] = summary
+            generated_keys.add(item_ids[item_id])
+        if len(parsed) < len(todo):
+            print(f"  [AI] {len(todo) - len(parsed)} item(s) missing from batched response")
+    
+    results = {prop_id: dict(cached[key]) for prop_id, key in keys.items() if key in cached}
+    if todo and generated_keys:
+        # Only propositions this call actually produced are charged for it,
+        # each an equal share; the rest fall back and record their own usage
+        generated = [prop_id for prop_id, key in keys.items() if key in generated_keys]
+        for prop_id, share in zip(generated, split_usage(usage, len(generated))):
+            results[prop_id]['usage'] = {**share, 'batch_size': len(generated)}
+    return results
+
+
+def save_summary(prop_id: str, summary_data: dict, unchanged_since=None):
+    """
+    Store a summary on its proposition. With unchanged_since (the update
+    time of the snapshot the summary was made from) the write fails if the
+    proposition was rewritten in the meantime.
+    """
+    option = get_db().write_option(last_update_time=unchanged_since) if unchanged_since else None
+    get_db().collection('ballot_propositions').document(prop_id).update({
+        'ai_summary': summary_data['summary'],
+        'ai_key_points': summary_data['key_points'],
+        'ai_yes_vote': summary_data['yes_vote'],
+        'ai_no_vote': summary_data['no_vote'],
+        'ai_generated_at': firestore.SERVER_TIMESTAMP,
+        'ai_usage': summary_data.get('usage') or new_usage(),
+        'summary_status': STATUS_DONE,
+    }, option=option)
+
+
+def summarize_proposition(prop_id: str, prop_data: dict) -> bool:
+    """Generate and save one summary (runs on a worker thread)"""
+    summary_data = generate_summary(
+        title=prop_data.get('title', ''),
+        full_text=prop_data.get('full_text', '')
+    )
+    if not summary_data:
+        print(f"  [DB] ✗ Failed to generate summary: {prop_data.get('title', prop_id)[:50]}")
+        return False
+    try:
+        save_summary(prop_id, summary_data)
+        print(f"  [DB] ✓ Summary saved to Firestore: {prop_data.get('title', prop_id)[:50]}")
+        return True
+    except Exception as e:
+        print(f"  [DB] ✗ Error saving to Firestore: {e}")
+        return False
+
+
+def summarize_pending(prop_id: str):
+    """
+    Summary job for one proposition, as queued by the scraper service when
+    a proposition is written. Returns 'done', 'skipped' (nothing to do) or
+    'superseded' (the text changed while summarizing - the new text has
+    its own job), or None if the summary failed.
+    """
+    snapshot = get_db().collection('ballot_propositions').document(prop_id).get(
+        field_paths=PROPOSITION_FIELDS + ['summary_status'])
+    prop_data = snapshot.to_dict() if snapshot.exists else None
+    if not prop_data or prop_data.get('summary_status') != STATUS_PENDING:
+        return 'skipped'  # Withdrawn, or already summarized by another run
+    
+    summary_data = generate_summary(
+        title=prop_data.get('title', ''),
+        full_text=prop_data.get('full_text', '')
+    )
+    if not summary_data:
+        return None
+    try:
+        save_summary(prop_id, summary_data, unchanged_since=snapshot.update_time)
+    except Exception as e:
+        if type(e).__name__ in ('FailedPrecondition', 'NotFound'):
+            print(f"  [DB] Proposition changed while summarizing, dropping: {prop_id[:50]}")
+            return 'superseded'
+        raise
+    print(f"  [DB] ✓ Summary saved to Firestore: {prop_data.get('title', prop_id)[:50]}")
+    return 'done'
+
+
+def summarize_batch(items: list) -> tuple:
+    """
+    Summarize and save [(prop_id, prop_data)] (runs on a worker thread).
+    Returns (saved, failed).
+    """
+    if len(items) == 1:
+        return (1, 0) if summarize_proposition(*items[0]) else (0, 1)
+    
+    summaries = generate_summaries_batch([
+        (prop_id, data.get('title', ''), data.get('full_text', '')) for prop_id, data in items
+    ])
+    saved = failed = 0
+    for prop_id, prop_data in items:
+        summary = summaries.get(prop_id)
+        if summary is None:
+            ok = summarize_proposition(prop_id, prop_data)  # Per-item fallback
+        else:
+            try:
+                save_summary(prop_id, summary)
+                print(f"  [DB] ✓ Summary saved to Firestore: {prop_data.get('title', prop_id)[:50]}")
+                ok = True
+            except Exception as e:
+                print(f"  [DB] ✗ Error saving to Firestore: {e}")
+                ok = False
+        saved += ok
+        failed += not ok
+    return saved, failed
+
+
+def backfill_summary_status() -> int:
+    """
+    One-time pass that sets summary_status on propositions scraped before
+    save_proposition started writing it, so runs can filter server-side.
+    """
+    state_ref = get_db().collection(STATE_COLLECTION).document('summary_status')
+    state = state_ref.get()
+    if state.exists and state.to_dict().get('backfilled_at'):
+        return 0
+    
+    print("Backfilling summary_status on existing propositions...")
+    flagged = 0
+    batch = get_db().batch()
+    for prop_doc in get_db().collection('ballot_propositions').select(['ai_summary', 'summary_status']).stream():
+        prop_data = prop_doc.to_dict() or {}
+        if 'summary_status' in prop_data:
+            continue
+        status = STATUS_DONE if prop_data.get('ai_summary') else STATUS_PENDING
+        batch.update(prop_doc.reference, {'summary_status': status})
+        flagged += 1
+        if flagged % 500 == 0:
+            batch.commit()
+            batch = get_db().batch()
+    batch.commit()
+    
+    state_ref.set({'backfilled_at': firestore.SERVER_TIMESTAMP}, merge=True)
+    print(f"Flagged {flagged} existing propositions")
+    return flagged
+
+
+def read_cursor(election_date: str = None):
+    """Last proposition id a previous run finished, if it ran with the same filter"""
+    try:
+        with open(CURSOR_FILE) as f:
+            cursor = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if cursor.get('election_date') != election_date:
+        return None
+    return cursor.get('last_id')
+
+
+def save_cursor(election_date: str, last_id: str):
+    # Write-then-rename so a crash never leaves a half-written cursor
+    tmp = CURSOR_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({'election_date': election_date, 'last_id': last_id}, f)
+    os.replace(tmp, CURSOR_FILE)
+
+
+def fetch_page(query, last_id: str = None) -> list:
+    """One page of pending propositions, retried a few times with backoff"""
+    if last_id:
+        query = query.start_after({'__name__': get_db().collection('ballot_propositions').document(last_id)})
+    for attempt in range(FETCH_RETRIES):
+        try:
+            return query.get()
+        except Exception as e:
+            print(f"\n[ERROR] Error fetching batch (attempt {attempt + 1}/{FETCH_RETRIES}): {e}")
+            if attempt + 1 < FETCH_RETRIES:
+                time.sleep(2 ** attempt)
+    raise RuntimeError(f"Giving up after {FETCH_RETRIES} failed page fetches")
+
+
+def add_summaries_to_all_propositions(election_date: str = None, workers: int = SUMMARY_WORKERS,
+                                      page_size: int = PAGE_SIZE, restart: bool = False):
+    """Add AI summaries to all propositions that don't have them
+    (optionally only those for one election).
+    Resumes after the last page a previous run finished unless restart.
+    Returns the run's counts, token totals and per-proposition latencies."""
     print("="*60)
     print("ADDING AI SUMMARIES TO BALLOT PROPOSITIONS")
     print("="*60)
     
-    # Get all propositions in smaller batches to avoid timeout
+    try:
+        backfill_summary_status()
+    except Exception as e:
+        print(f"[ERROR] Error backfilling summary_status: {e}")
+    
+    if restart and os.path.exists(CURSOR_FILE):
+        os.remove(CURSOR_FILE)
+    
     count = 0
     updated = 0
-    skipped = 0
     failed = 0
+    started = time.time()
+    
+    # Summaries are generated concurrently; the limiter keeps the pool
+    # inside the API quota instead of a fixed sleep between calls
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary")
+    pending = set()
+    latencies = []     # Seconds from queued to saved, per proposition
+    pack = []          # Short propositions waiting to share one request
+    pack_tokens = 0
+    
+    def collect(block_until):
+        nonlocal updated, failed
+        done, _ = wait(pending, return_when=block_until)
+        for future in done:
+            pending.discard(future)
+            saved, not_saved = future.result()
+            updated += saved
+            failed += not_saved
+    
+    def submit(items):
+        submitted = time.time()
+        future = executor.submit(summarize_batch, items)
+        future.add_done_callback(lambda _: latencies.extend([time.time() - submitted] * len(items)))
+        pending.add(future)
+        # Keep only a couple of jobs per worker waiting
+        if len(pending) >= workers * 2:
+            collect(FIRST_COMPLETED)
+    
+    def flush_pack():
+        nonlocal pack, pack_tokens
+        if pack:
+            submit(pack)
+            pack, pack_tokens = [], 0
+    
+    # Only propositions still waiting for a summary, only the fields the
+    # prompt uses, in id order so the cursor is stable
+    query = get_db().collection('ballot_propositions').where('summary_status', '==', STATUS_PENDING)
+    if election_date:
+        query = query.where('election_date', '==', election_date)
+    query = query.select(PROPOSITION_FIELDS).order_by('__name__').limit(page_size)
+    
+    last_id = read_cursor(election_date)
+    if last_id:
+        print(f"Resuming after proposition {last_id}")
+    finished = False
     
     try:
-        # Fetch in batches of 10 to avoid timeout
-        batch_size = 10
-        last_doc = None
-        
         while True:
-            # Query for next batch
-            query = db.collection('ballot_propositions').limit(batch_size)
+            page = fetch_page(query, last_id)
+            if not page:
+                finished = True
+                break
             
-            if last_doc:
-                query = query.start_after(last_doc)
-            
-            try:
-                batch = query.get()
-                
-                if not batch:
-                    break  # No more documents
-                
-                for prop_doc in batch:
-                    count += 1
-                    prop_id = prop_doc.id
-                    prop_data = prop_doc.to_dict()
-                    
-                    # Skip if already has summary
-                    if prop_data.get('ai_summary'):
-                        print(f"\n[{count}] Skipping (already has summary): {prop_data.get('title', 'Unknown')[:50]}")
-                        skipped += 1
-                        continue
-                    
-                    print(f"\n[{count}] Processing: {prop_data.get('title', 'Unknown')[:50]}")
-                    
-                    # Generate summary
-                    summary_data = generate_summary(
-                        title=prop_data.get('title', ''),
-                        full_text=prop_data.get('full_text', '')
-                    )
-                    
-                    if summary_data:
-                        # Update Firestore
-                        try:
-                            db.collection('ballot_propositions').document(prop_id).update({
-                                'ai_summary': summary_data['summary'],
-                                'ai_key_points': summary_data['key_points'],
-                                'ai_yes_vote': summary_data['yes_vote'],
-                                'ai_no_vote': summary_data['no_vote'],
-                                'ai_generated_at': firestore.SERVER_TIMESTAMP
-                            })
-                            updated += 1
-                            print(f"  [DB] ✓ Summary saved to Firestore")
-                        except Exception as e:
-                            print(f"  [DB] ✗ Error saving to Firestore: {e}")
-                            failed += 1
-                        
-                        # Rate limiting - don't spam the API
-                        time.sleep(2)
-                    else:
-                        print(f"  [DB] ✗ Failed to generate summary")
-                        failed += 1
-                    
-                    last_doc = prop_doc
-                
-                # If batch was smaller than batch_size, we're done
-                if len(batch) < batch_size:
-                    break
-                    
-            except Exception as e:
-                print(f"\n[ERROR] Error fetching batch: {e}")
-                print("Continuing with next batch...")
-                if last_doc:
+            for prop_doc in page:
+                count += 1
+                prop_data = prop_doc.to_dict()
+                print(f"\n[{count}] Queued: {prop_data.get('title', 'Unknown')[:50]}")
+                tokens = estimate_tokens(prop_data.get('title', '') + prompt_text(prop_data.get('full_text', '')))
+                if tokens > SHORT_TEXT_TOKENS or BATCH_MAX_ITEMS <= 1:
+                    submit([(prop_doc.id, prop_data)])
                     continue
-                else:
-                    break
+                if pack and (len(pack) >= BATCH_MAX_ITEMS or pack_tokens + tokens > BATCH_INPUT_TOKENS):
+                    flush_pack()
+                pack.append((prop_doc.id, prop_data))
+                pack_tokens += tokens
+            
+            # Everything from this page is submitted and the in-flight window
+            # is bounded, so wait for it before recording the page as done
+            flush_pack()
+            if pending:
+                collect(ALL_COMPLETED)
+            last_id = page[-1].id
+            save_cursor(election_date, last_id)
+            
+            if len(page) < page_size:
+                finished = True
+                break
     
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted after {count} propositions - run again to resume")
     except Exception as e:
         print(f"\n[ERROR] Fatal error: {e}")
+        print("   Run again to resume from the last completed page")
+    finally:
+        executor.shutdown(wait=True)
+    
+    # Failures stay pending, so the next full pass retries them
+    if finished and os.path.exists(CURSOR_FILE):
+        os.remove(CURSOR_FILE)
     
+    elapsed = time.time() - started
     print("\n" + "="*60)
-    print(f"COMPLETE: Processed {count} propositions")
+    print(f"COMPLETE: Processed {count} propositions in {elapsed:.1f}s")
     print(f"  Updated: {updated}")
-    print(f"  Skipped: {skipped}")
     print(f"  Failed: {failed}")
+    print(f"  Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    print(f"  API calls: {cache_stats['calls']}")
+    print(f"  Tokens: {token_stats['input_tokens']} in / {token_stats['output_tokens']} out"
+          + (f" ({(token_stats['input_tokens'] + token_stats['output_tokens']) // updated} per summary)"
+             if updated else ""))
+    print(f"  Quota: {limiter.stats()}")
     print("="*60)
+    
+    return {
+        'processed': count,
+        'updated': updated,
+        'failed': failed,
+        'elapsed': elapsed,
+        'latencies': latencies,
+        'api_calls': cache_stats['calls'],
+        **token_stats,
+    }
 
 
 def add_summary_to_proposition(proposition_id: str):
     """Add AI summary to a specific proposition"""
     print(f"Adding summary to proposition: {proposition_id}")
     
-    prop_doc = db.collection('ballot_propositions').document(proposition_id).get()
+    prop_doc = get_db().collection('ballot_propositions').document(proposition_id).get()
     
     if not prop_doc.exists:
         print(f"[ERROR] Proposition not found: {proposition_id}")
@@ -255,13 +858,7 @@ def add_summary_to_proposition(proposition_id: str):
     
     if summary_data:
         # Update Firestore
-        db.collection('ballot_propositions').document(proposition_id).update({
-            'ai_summary': summary_data['summary'],
-            'ai_key_points': summary_data['key_points'],
-            'ai_yes_vote': summary_data['yes_vote'],
-            'ai_no_vote': summary_data['no_vote'],
-            'ai_generated_at': firestore.SERVER_TIMESTAMP
-        })
+        save_summary(proposition_id, summary_data)
         print("[SUCCESS] Summary added!")
         return True
     else:
@@ -270,10 +867,26 @@ def add_summary_to_proposition(proposition_id: str):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate AI summaries for ballot propositions")
+    parser.add_argument("proposition_id", nargs="?", help="Summarize just this proposition")
+    parser.add_argument("--election", help="Only propositions for this election date")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help=f"Propositions read per page (default {PAGE_SIZE})")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved cursor")
+    args = parser.parse_args()
+    
+    try:
+        get_backend()
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    
+    if args.proposition_id:
         # Add summary to specific proposition
-        proposition_id = sys.argv[1]
-        add_summary_to_proposition(proposition_id)
+        add_summary_to_proposition(args.proposition_id)
     else:
-        # Add summaries to all propositions
-        add_summaries_to_all_propositions()
\ No newline at end of file
+        # Add summaries to all propositions still pending
+        add_summaries_to_all_propositions(election_date=args.election, page_size=args.page_size,
+                                          restart=args.restart)
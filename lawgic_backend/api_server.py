@@ -5,7 +5,7 @@ Provides REST API endpoint for Flutter app to query voter data
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from voter_scraper import VoterScraper
+from voter_backend import open_voter_backend
 import logging
 from typing import Dict
 
@@ -16,8 +16,8 @@ CORS(app)  # Enable CORS for Flutter web/mobile apps
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create a reusable scraper instance
-scraper = VoterScraper()
+# Lookup backend: the Selenium scraper, or VOTER_BACKEND=stub for load tests
+scraper = open_voter_backend()
 
 
 @app.route('/health', methods=['GET'])
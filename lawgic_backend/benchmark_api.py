@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Load Test for the Voter API
+Drives /api/voter-info and /api/batch-voter-info at a sweep of request
+rates (open loop) or concurrency levels (closed loop), with a configurable
+mix of repeat and unique voters, and reports latency histograms, error
+rates and the level where the API saturates.
+
+By default api_server.py is started in-process with the stub lookup
+backend (VOTER_BACKEND=stub), so the numbers are the API's own overhead
+plus --latency per lookup. --backend standin runs the real Selenium
+scraper against a local portal stand-in instead, and --url targets a
+server that is already running (e.g. under gunicorn).
+
+    python benchmark_api.py --rates 2,5,10,20,40 --duration 20 --latency 0.5
+    python benchmark_api.py --concurrency 1,4,16 --batch-share 0.2 --json api.json
+    python benchmark_api.py --url http://localhost:5000 --rates 1,2,4
+
+Open-loop latency is measured from when a request was due, not when it
+was sent, so a backed-up client can't hide the server falling behind.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------
+# Config
+# -------------------------
+ENDPOINTS = {"single": "/api/voter-info", "batch": "/api/batch-voter-info"}
+HISTOGRAM_BOUNDS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]  # Seconds
+LOAD_ZIP = "70808"
+GROWTH_THRESHOLD = 0.1  # Closed loop: under 10% more throughput than the last level = saturated
+RATE_SHORTFALL = 0.9    # Open loop: under 90% of the offered rate = saturated
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the voter API")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rates", help="Requests/second to sweep (open loop), e.g. 2,5,10,20")
+    load.add_argument("--concurrency", help="Concurrent clients to sweep (closed loop), e.g. 1,4,16")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level")
+    parser.add_argument("--batch-share", type=float, default=0.1,
+                        help="Share of requests sent to the batch endpoint")
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--repeat-share", type=float, default=0.5,
+                        help="Share of lookups for a small set of repeat voters")
+    parser.add_argument("--hot-voters", type=int, default=20, help="How many repeat voters")
+    parser.add_argument("--url", help="Load an API that is already running instead of starting one")
+    parser.add_argument("--backend", choices=["stub", "standin"], default="stub",
+                        help="Lookup backend for the in-process API")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per stub or stand-in lookup")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of lookups that fail")
+    parser.add_argument("--slo-p95", type=float, default=5.0,
+                        help="p95 seconds above which a level counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="Open loop: client threads available for outstanding requests")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.rates:
+        args.mode, args.levels = "rate", [float(r) for r in args.rates.split(",")]
+    else:
+        args.mode, args.levels = "concurrency", [int(c) for c in (args.concurrency or "1,2,4,8,16").split(",")]
+    return args
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def histogram(values):
+    """{"<=bound": count} over HISTOGRAM_BOUNDS, plus an overflow bucket"""
+    counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    for value in values:
+        i = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS) if value <= bound), len(HISTOGRAM_BOUNDS))
+        counts[i] += 1
+    labels = [f"<={bound}s" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}s"]
+    return dict(zip(labels, counts))
+
+
+# -------------------------
+# Target API
+# -------------------------
+def start_api(args):
+    """Serve api_server.app on a free local port; returns (base_url, stop)"""
+    stops = []
+    if args.backend == "standin":
+        from portal_standin import start_standin
+
+        standin = start_standin(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                seed=args.seed)
+        stops.append(standin.shutdown)
+        # The scraper reads these at import
+        os.environ["SOS_BASE_URL"] = standin.base_url
+        os.environ.setdefault("SOS_MIN_INTERVAL", "0")
+        os.environ.setdefault("SOS_MAX_IN_FLIGHT", "64")
+        os.environ["VOTER_BACKEND"] = "selenium"
+    else:
+        os.environ["VOTER_BACKEND"] = "stub"
+        os.environ["VOTER_STUB_LATENCY"] = str(args.latency)
+        os.environ["VOTER_STUB_JITTER"] = str(args.jitter)
+        os.environ["VOTER_STUB_ERROR_RATE"] = str(args.error_rate)
+
+    import logging
+    from werkzeug.serving import make_server
+    from api_server import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # One line per request otherwise
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stops.insert(0, server.shutdown)
+    return f"http://127.0.0.1:{server.server_port}", lambda: [stop() for stop in stops]
+
+
+class VoterMix:
+    """Hands out voters: a repeat share from a small hot set, the rest never seen before"""
+
+    def __init__(self, repeat_share, hot_voters, seed=0):
+        self.repeat_share = repeat_share
+        self.hot_voters = max(1, hot_voters)
+        self._next_unique = self.hot_voters
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if self._rng.random() < self.repeat_share:
+                i = self._rng.randrange(self.hot_voters)
+            else:
+                i = self._next_unique
+                self._next_unique += 1
+        return {"first_name": "LOAD", "last_name": f"VOTER{i:06d}", "zip_code": LOAD_ZIP,
+                "birth_month": i % 12 + 1, "birth_year": 1950 + i % 50}
+
+
+class LoadClient:
+    """Builds and sends requests, and records each outcome"""
+
+    def __init__(self, base_url, args):
+        self.base_url = base_url.rstrip("/")
+        self.args = args
+        self.voters = VoterMix(args.repeat_share, args.hot_voters, args.seed)
+        self._rng = random.Random(args.seed + 1)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = {name: [] for name in ENDPOINTS}  # endpoint -> [(latency, status)]
+            self.lookup_errors = 0  # Failed users inside successful batch responses
+
+    def pick_endpoint(self):
+        with self._lock:
+            return "batch" if self._rng.random() < self.args.batch_share else "single"
+
+    def send(self, endpoint, due=None):
+        if endpoint == "batch":
+            users = [dict(self.voters.next(), uid=f"load{n}") for n in range(self.args.batch_size)]
+            body = {"users": users}
+        else:
+            body = self.voters.next()
+        request = urllib.request.Request(self.base_url + ENDPOINTS[endpoint], data=json.dumps(body).encode(),
+                                         headers={"Content-Type": "application/json"})
+        started = due or time.time()
+        failed_users = 0
+        try:
+            with urllib.request.urlopen(request, timeout=self.args.timeout) as r:
+                status = r.status
+                if endpoint == "batch":
+                    failed_users = sum(1 for res in json.loads(r.read()).get("results", [])
+                                       if not res.get("success"))
+                else:
+                    r.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception as e:
+            status = type(e).__name__  # Connection refused, timeout...
+        latency = time.time() - started
+        with self._lock:
+            self.samples[endpoint].append((latency, status))
+            self.lookup_errors += failed_users
+
+
+# -------------------------
+# Load levels
+# -------------------------
+def run_open_loop(client, rate, duration, max_in_flight):
+    """
+    Send requests with exponential gaps averaging `rate` per second.
+    Returns (elapsed, requests sent per second) - elapsed includes draining
+    the requests still in flight.
+    """
+    rng = random.Random(int(rate * 1000))
+    sent = 0
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load") as executor:
+        started = time.time()
+        due = started
+        while due < started + duration:
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(client.send, client.pick_endpoint(), due)
+            sent += 1
+            due += rng.expovariate(rate)
+    return time.time() - started, sent / duration
+
+
+def run_closed_loop(client, concurrency, duration):
+    """`concurrency` clients each sending their next request as soon as the last one returns"""
+    deadline = time.time() + duration
+
+    def worker():
+        while time.time() < deadline:
+            client.send(client.pick_endpoint())
+
+    started = time.time()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - started
+
+
+def level_report(client, level, args, elapsed, offered=None):
+    report = {args.mode: level, "elapsed_s": round(elapsed, 2), "endpoints": {}}
+    if offered is not None:
+        report["offered_per_s"] = round(offered, 2)  # The random gaps make this drift from the target
+    total = errors = lookups = 0
+    all_latencies = []
+    for endpoint, samples in client.samples.items():
+        latencies = [latency for latency, _ in samples]
+        statuses = {}
+        for _, status in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        failed = sum(n for status, n in statuses.items() if not status.startswith("2"))
+        total += len(samples)
+        errors += failed
+        lookups += len(samples) * (args.batch_size if endpoint == "batch" else 1)
+        all_latencies += latencies
+        report["endpoints"][endpoint] = {
+            "requests": len(samples),
+            "error_rate": round(failed / len(samples), 4) if samples else 0.0,
+            "statuses": statuses,
+            "latency_s": {
+                "p50": round(percentile(latencies, 50), 3),
+                "p95": round(percentile(latencies, 95), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(max(latencies), 3) if latencies else 0.0,
+            },
+            "histogram": histogram(latencies),
+        }
+    elapsed = max(elapsed, 1e-6)
+    report.update({
+        "requests": total,
+        "requests_per_s": round(total / elapsed, 2),
+        "lookups_per_s": round(lookups / elapsed, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "batch_lookup_errors": client.lookup_errors,
+        "p95_s": round(percentile(all_latencies, 95), 3),
+    })
+    return report
+
+
+def find_saturation(levels, args):
+    """
+    The first level that misses the p95 SLO or error budget, or can't keep
+    up: open loop below RATE_SHORTFALL of the offered rate, closed loop
+    gaining less than GROWTH_THRESHOLD throughput over the previous level.
+    """
+    previous = None
+    for report in levels:
+        reasons = []
+        if report["p95_s"] > args.slo_p95:
+            reasons.append(f"p95 {report['p95_s']}s > {args.slo_p95}s")
+        if report["error_rate"] > args.max_error_rate:
+            reasons.append(f"error rate {report['error_rate']:.1%}")
+        if args.mode == "rate" and report["requests_per_s"] < RATE_SHORTFALL * report["offered_per_s"]:
+            reasons.append(f"served {report['requests_per_s']}/s of {report['offered_per_s']}/s offered")
+        if (args.mode == "concurrency" and previous
+                and report["requests_per_s"] < previous["requests_per_s"] * (1 + GROWTH_THRESHOLD)):
+            reasons.append(f"throughput flat ({previous['requests_per_s']} -> {report['requests_per_s']}/s)")
+        if reasons:
+            return {"level": report[args.mode], "reasons": reasons,
+                    "max_sustained_requests_per_s": previous["requests_per_s"] if previous else 0.0}
+        previous = report
+    return None
+
+
+def run_load_test(args) -> dict:
+    if args.url:
+        base_url, stop = args.url, lambda: None
+    else:
+        base_url, stop = start_api(args)
+
+    client = LoadClient(base_url, args)
+    levels = []
+    try:
+        for level in args.levels:
+            print(f"▶️  {args.mode} {level} for {args.duration}s...")
+            client.reset()
+            if args.mode == "rate":
+                elapsed, offered = run_open_loop(client, level, args.duration, args.max_in_flight)
+            else:
+                elapsed, offered = run_closed_loop(client, level, args.duration), None
+            levels.append(level_report(client, level, args, elapsed, offered))
+    finally:
+        stop()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("rates", "concurrency")}
+    return {"target": base_url, "config": config, "levels": levels,
+            "saturation": find_saturation(levels, args)}
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        results = run_load_test(args)
+    except ImportError as e:
+        print(f"❌ Could not start the API in-process: {e}")
+        print("   Install requirements.txt, or start api_server.py yourself and pass --url")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"API LOAD TEST ({results['target']})")
+    print("=" * 60)
+    for report in results["levels"]:
+        print(f"{args.mode} {report[args.mode]:>6}:  {report['requests_per_s']:>7} req/s  "
+              f"{report['lookups_per_s']:>7} lookups/s  errors {report['error_rate']:.1%}")
+        for endpoint, stats in report["endpoints"].items():
+            if not stats["requests"]:
+                continue
+            latency = stats["latency_s"]
+            print(f"    {endpoint:6}  p50 {latency['p50']}s  p95 {latency['p95']}s  "
+                  f"p99 {latency['p99']}s  max {latency['max']}s")
+
+    last = results["levels"][-1] if results["levels"] else None
+    if last and last["endpoints"]["single"]["requests"]:
+        print(f"\nLatency histogram, /api/voter-info at {args.mode} {last[args.mode]}:")
+        buckets = last["endpoints"]["single"]["histogram"]
+        widest = max(buckets.values()) or 1
+        for label, count in buckets.items():
+            print(f"  {label:>8} {'#' * round(40 * count / widest):40} {count}")
+
+    saturation = results["saturation"]
+    if saturation:
+        print(f"\nSaturated at {args.mode} {saturation['level']}: {'; '.join(saturation['reasons'])}")
+        print(f"Max sustained: {saturation['max_sustained_requests_per_s']} req/s")
+    else:
+        print("\nNo saturation within the levels tested")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+End-to-end Benchmark for the Scraping Pipeline
+Runs the real scrapers against a local portal stand-in (portal_standin.py)
+and the Firestore emulator, at each concurrency level in a sweep:
+
+  voter    CompleteVoterScraper lookups on a warm-driver worker pool
+  ballot   scrape_and_track() for parishes with propositions
+  service  ScraperService's listener -> job queue -> pool loop, from a user
+           document appearing to their voter info being written
+
+and reports throughput, p50/p95/p99 latency, peak RSS and peak Chrome
+process count as JSON, stamped with the git commit so runs can be compared.
+
+    firebase emulators:start --only firestore
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmark_pipeline.py \
+        --concurrency 1,2,4 --lookups 40 --latency 0.2 --json after.json --baseline before.json
+
+Everything the benchmark writes is tagged with BENCH_ELECTION or a bench_
+user id and deleted afterwards unless --keep is given.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import subprocess
+
+if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+    print("❌ FIRESTORE_EMULATOR_HOST is not set")
+    print("   The benchmark writes users and propositions - run it against the emulator only")
+    sys.exit(1)
+
+from benchmark_summaries import percentile
+
+# -------------------------
+# Config
+# -------------------------
+SCENARIOS = ("voter", "ballot", "service")
+BENCH_ELECTION = "01/05/2099"  # The only election the stand-in serves here
+BENCH_ZIP = "70808"
+SAMPLE_INTERVAL = 0.25  # Seconds between RSS / process-count samples
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers end to end against a portal stand-in")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,2,4", help="Worker counts to sweep, e.g. 1,2,4,8")
+    parser.add_argument("--lookups", type=int, default=20, help="Voter lookups per level")
+    parser.add_argument("--parishes", type=int, default=8, help="Parishes scraped per level")
+    parser.add_argument("--users", type=int, default=20, help="Users seeded per service level")
+    parser.add_argument("--service-timeout", type=float, default=600,
+                        help="Give up on a service level after this many seconds")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stand-in seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare throughput against")
+    parser.add_argument("--keep", action="store_true", help="Leave the benchmark's documents behind")
+    args = parser.parse_args()
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    return args
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -------------------------
+# Resource sampling
+# -------------------------
+def process_tree_usage(root=None):
+    """
+    (RSS bytes, Chrome processes) for this process and everything it
+    spawned - chromedriver and the browsers hang off the worker pool.
+    Reads /proc, so off Linux only this process's peak RSS is known.
+    """
+    root = root or os.getpid()
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except FileNotFoundError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, None
+
+    parents, names = {}, {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue  # Exited while we were looking
+        # comm may contain spaces, so split around its parentheses
+        names[pid] = stat[stat.index("(") + 1:stat.rindex(")")]
+        parents[pid] = int(stat[stat.rindex(")") + 2:].split()[1])
+
+    children = {}
+    for pid, ppid in parents.items():
+        children.setdefault(ppid, []).append(pid)
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+
+    rss = 0
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                rss += int(f.read().split()[1]) * page_size
+        except OSError:
+            continue
+    chrome = sum(1 for pid in tree
+                 if "chrom" in names.get(pid, "").lower() and "driver" not in names.get(pid, ""))
+    return rss, chrome
+
+
+class ResourceSampler:
+    """Tracks peak RSS and Chrome process count while the with-block runs"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_chrome = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        rss, chrome = process_tree_usage()
+        self.peak_rss = max(self.peak_rss, rss)
+        if chrome is not None:
+            self.peak_chrome = max(self.peak_chrome, chrome)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def level_report(concurrency, unit, attempted, succeeded, latencies, elapsed, sampler, **extra):
+    elapsed = max(elapsed, 1e-6)
+    report = {
+        'concurrency': concurrency,
+        unit: attempted,
+        'succeeded': succeeded,
+        'failed': attempted - succeeded,
+        'elapsed_s': round(elapsed, 2),
+        f'{unit}_per_s': round(succeeded / elapsed, 3),
+        'latency_s': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies), 3) if latencies else 0.0,
+        },
+        'peak_rss_mb': round(sampler.peak_rss / 2 ** 20, 1),
+        'peak_chrome_processes': sampler.peak_chrome,
+    }
+    report.update(extra)
+    return report
+
+
+# -------------------------
+# Firestore fixtures
+# -------------------------
+def bench_voter(i):
+    """Lookup inputs for the i-th synthetic voter the stand-in knows"""
+    return "BENCH", f"VOTER{i:05d}", BENCH_ZIP, i % 12 + 1, 1950 + i % 50
+
+
+def delete_query(db, query):
+    batch, pending = db.batch(), 0
+    for doc in query.select([]).stream():
+        batch.delete(doc.reference)
+        pending += 1
+        if pending % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return pending
+
+
+def clear_bench_election(db):
+    """Drop everything a scrape of BENCH_ELECTION wrote, so each level starts cold"""
+    from scraper_voting import COVERAGE_COLLECTION, sanitize_id
+    from proposition_scheduler import STATE_COLLECTION
+
+    delete_query(db, db.collection('ballot_propositions').where('election_date', '==', BENCH_ELECTION))
+    delete_query(db, db.collection(STATE_COLLECTION).where('election_date', '==', BENCH_ELECTION))
+    db.collection(COVERAGE_COLLECTION).document(sanitize_id(BENCH_ELECTION)).delete()
+
+
+# -------------------------
+# Scenarios
+# -------------------------
+def run_voter_level(concurrency, args, standin):
+    from scraper_user_info import build_driver, get_complete_voter_info
+    from fetch_voter_info import has_voter_data
+    from scraper_service import VOTER_JOB_TIMEOUT
+    from worker_pool import ScrapeWorkerPool
+
+    pool = ScrapeWorkerPool({'voter': lambda: build_driver(headless=True)}, workers=concurrency)
+    with ResourceSampler() as sampler:
+        started = time.time()
+        futures = [pool.submit('voter_info', i, get_complete_voter_info, *bench_voter(i),
+                               driver_kind='voter', timeout=VOTER_JOB_TIMEOUT)
+                   for i in range(args.lookups)]
+        results = [f.result() for f in futures]
+        elapsed = time.time() - started
+        pool.shutdown()
+
+    ok = [r for r in results if r.status == 'completed' and has_voter_data(r.value)]
+    return level_report(concurrency, 'lookups', len(results), len(ok),
+                        [r.duration for r in ok], elapsed, sampler)
+
+
+def run_ballot_level(concurrency, args, standin):
+    from scraper_voting import scrape_and_track, get_driver, db
+    from scraper_service import BALLOT_JOB_TIMEOUT
+    from parish_registry import PARISH_CODES
+    from worker_pool import ScrapeWorkerPool
+
+    fixtures = standin.portal.fixtures
+    parishes = sorted(parish for (election_date, parish), ids in fixtures.by_parish.items()
+                      if election_date == BENCH_ELECTION and ids)[:args.parishes]
+
+    clear_bench_election(db)
+    pool = ScrapeWorkerPool({'ballot': get_driver}, workers=concurrency)
+    with ResourceSampler() as sampler:
+        started = time.time()
+        futures = [pool.submit('ballot_propositions', parish, scrape_and_track,
+                               f"{parish} - {PARISH_CODES[parish]}", BENCH_ELECTION,
+                               driver_kind='ballot', timeout=BALLOT_JOB_TIMEOUT)
+                   for parish in parishes]
+        results = [f.result() for f in futures]
+        elapsed = time.time() - started
+        pool.shutdown()
+
+    ok = [r for r in results if r.status == 'completed']
+    scraped = sum(len(fixtures.by_parish[(BENCH_ELECTION, r.key)]) for r in ok)
+    return level_report(concurrency, 'parishes', len(results), len(ok),
+                        [r.duration for r in ok], elapsed, sampler,
+                        propositions=scraped, propositions_per_s=round(scraped / max(elapsed, 1e-6), 3))
+
+
+def run_service_level(concurrency, args, standin):
+    import tempfile
+    import scraper_service
+    from scraper_service import ScraperService, db
+    from scraper_user_info import build_driver
+    from scraper_voting import get_driver
+    from worker_pool import ScrapeWorkerPool
+    from job_queue import JobQueue
+
+    # Ballot follow-ups scrape the election the stand-in serves, not the calendar's
+    scraper_service.get_default_election = lambda: BENCH_ELECTION
+
+    run_id = uuid.uuid4().hex[:8]
+    seeded_at = {}
+    voter_done, ballots_done, failures = {}, [], []
+
+    class BenchService(ScraperService):
+        def on_voter_scraper_done(self, user_id, result):
+            if result.status == 'completed':
+                voter_done[user_id] = time.time()
+            else:
+                failures.append(result.status)
+            super().on_voter_scraper_done(user_id, result)
+
+        def on_ballot_scraper_done(self, parish, result):
+            ballots_done.append(result.status)
+            super().on_ballot_scraper_done(parish, result)
+
+    clear_bench_election(db)
+    queue_dir = tempfile.mkdtemp(prefix="bench_jobs_")
+    service = BenchService(job_queue=JobQueue(os.path.join(queue_dir, "jobs.db")))
+    service.pool.shutdown()
+    service.pool = ScrapeWorkerPool({
+        'voter': lambda: build_driver(headless=True),
+        'ballot': get_driver,
+    }, workers=concurrency)
+    service.summaries_enabled = False  # benchmark_summaries.py covers summaries
+
+    user_ids = [f"bench_{run_id}_{i:05d}" for i in range(args.users)]
+    with ResourceSampler() as sampler:
+        service.start_listeners()
+        started = time.time()
+        batch = db.batch()
+        for i, user_id in enumerate(user_ids):
+            first, last, zip_code, month, year = bench_voter(i)
+            batch.set(db.collection('users').document(user_id), {
+                'first_name': first, 'last_name': last, 'zip_code': zip_code,
+                'birth_month': month, 'birth_year': year, 'needs_voter_lookup': True,
+            })
+            seeded_at[user_id] = time.time()
+        batch.commit()
+
+        deadline = started + args.service_timeout
+        while time.time() < deadline:
+            service.process_events(max_wait=0.2)
+            service.dispatch_jobs()
+            with service.active_lock:
+                idle = not service.active_jobs
+            if idle and len(voter_done) >= len(user_ids) and service.events.empty():
+                break
+        elapsed = time.time() - started
+        service.stop_listeners()
+        service.pool.shutdown()
+        service.summary_pool.shutdown()
+
+    if not args.keep:
+        for start in range(0, len(user_ids), 500):
+            batch = db.batch()
+            for user_id in user_ids[start:start + 500]:
+                batch.delete(db.collection('users').document(user_id))
+            batch.commit()
+
+    latencies = [voter_done[u] - seeded_at[u] for u in user_ids if u in voter_done]
+    return level_report(concurrency, 'users', len(user_ids), len(latencies), latencies, elapsed, sampler,
+                        failed_attempts=len(failures), ballot_jobs=len(ballots_done),
+                        timed_out=len(voter_done) < len(user_ids), queue=service.jobs.stats())
+
+
+RUNNERS = {'voter': run_voter_level, 'ballot': run_ballot_level, 'service': run_service_level}
+UNITS = {'voter': 'lookups', 'ballot': 'parishes', 'service': 'users'}
+
+
+def run_benchmark(args) -> dict:
+    from portal_standin import start_standin
+
+    standin = start_standin(fixtures={"elections": [BENCH_ELECTION]}, latency=args.latency,
+                            jitter=args.jitter, error_rate=args.error_rate,
+                            rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    # The scrapers read these at import; the per-host limiter must not be
+    # what caps the sweep
+    os.environ["SOS_BASE_URL"] = standin.base_url
+    os.environ.setdefault("SOS_MIN_INTERVAL", "0")
+    os.environ.setdefault("SOS_MAX_IN_FLIGHT", str(max(args.concurrency) * 2))
+    os.environ.setdefault("SCRAPER_AUDIT_LOG", "0")
+    os.environ.setdefault("LLM_BACKEND", "stub")
+
+    results = {'commit': git_commit(), 'config': vars(args), 'scenarios': {}}
+    try:
+        for scenario in args.scenarios:
+            levels = results['scenarios'][scenario] = []
+            for concurrency in args.concurrency:
+                print(f"\n▶️  {scenario} @ {concurrency} worker(s)...")
+                levels.append(RUNNERS[scenario](concurrency, args, standin))
+        results['standin'] = standin.portal.snapshot()
+    finally:
+        standin.shutdown()
+        if not args.keep and {'ballot', 'service'} & set(args.scenarios):
+            from firebase_client import get_db
+            clear_bench_election(get_db())
+    return results
+
+
+def compare(results, baseline):
+    """Throughput change per (scenario, concurrency) against an earlier run"""
+    rows = []
+    for scenario, levels in results['scenarios'].items():
+        key = f"{UNITS[scenario]}_per_s"
+        before = {l['concurrency']: l[key] for l in baseline.get('scenarios', {}).get(scenario, [])}
+        for level in levels:
+            old = before.get(level['concurrency'])
+            if old:
+                rows.append((scenario, level['concurrency'], old, level[key], (level[key] - old) / old * 100))
+    return rows
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_benchmark(args)
+
+    print("\n" + "=" * 60)
+    print(f"PIPELINE BENCHMARK ({results['commit'] or 'unknown commit'})")
+    print("=" * 60)
+    for scenario, levels in results['scenarios'].items():
+        unit = UNITS[scenario]
+        print(f"\n{scenario}:")
+        for level in levels:
+            latency = level['latency_s']
+            print(f"  {level['concurrency']:>3} worker(s)  {level[f'{unit}_per_s']:>8} {unit}/s  "
+                  f"{level['succeeded']}/{level[unit]} ok  "
+                  f"p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s  "
+                  f"RSS {level['peak_rss_mb']} MB  Chrome {level['peak_chrome_processes']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f))
+        print(f"\nAgainst {args.baseline}:")
+        for scenario, concurrency, old, new, change in rows:
+            print(f"  {scenario:8} @ {concurrency:>3}  {old} -> {new}  ({change:+.1f}%)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
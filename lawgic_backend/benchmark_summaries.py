@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the proposition summary job
+Seeds synthetic propositions into the Firestore emulator and runs the real
+add_summaries_to_all_propositions() job against the local stub LLM backend,
+then reports propositions/second, tokens/second and tail latency.
+
+    firebase emulators:start --only firestore
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmark_summaries.py \
+        --propositions 200 --workers 8 --latency 0.8 --error-rate 0.02 --json out.json
+"""
+
+import os
+import sys
+import json
+import uuid
+import argparse
+
+if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+    print("❌ FIRESTORE_EMULATOR_HOST is not set")
+    print("   The benchmark writes propositions - run it against the emulator only")
+    sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the summary job against the stub LLM backend")
+    parser.add_argument("--propositions", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--long-share", type=float, default=0.1,
+                        help="Share of propositions long enough to be chunked")
+    parser.add_argument("--duplicate-share", type=float, default=0.2,
+                        help="Share of propositions repeating another's text (cache hits)")
+    parser.add_argument("--latency", type=float, default=0.8, help="Stub seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, default=600, help="Quota the limiter enforces")
+    parser.add_argument("--tpm", type=float, default=4000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded propositions behind")
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def proposition_text(i, run_id, long):
+    paragraph = (f"Section {i}. Shall the parish levy a {i % 9 + 1} mills property tax for "
+                 f"ten years, beginning in 2026, to fund road maintenance ({run_id})? ")
+    if long:
+        return "\n\n".join(paragraph * 6 for _ in range(40))
+    return paragraph * 4
+
+
+def seed_propositions(db, args, election_date, run_id):
+    import random
+
+    rng = random.Random(args.seed)
+    batch = db.batch()
+    doc_ids = []
+    for i in range(args.propositions):
+        # Duplicates reuse an earlier proposition's title and text
+        source = rng.randrange(i) if i and rng.random() < args.duplicate_share else i
+        doc_id = f"bench_{run_id}_{i:05d}"
+        batch.set(db.collection('ballot_propositions').document(doc_id), {
+            'title': f"Bench Proposition No. {source}",
+            'full_text': proposition_text(source, run_id, rng.random() < args.long_share),
+            'parish': 'BENCH - 00',
+            'election_date': election_date,
+            'summary_status': 'pending',
+        })
+        doc_ids.append(doc_id)
+        if len(doc_ids) % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return doc_ids
+
+
+def delete_docs(db, doc_ids):
+    for start in range(0, len(doc_ids), 500):
+        batch = db.batch()
+        for doc_id in doc_ids[start:start + 500]:
+            batch.delete(db.collection('ballot_propositions').document(doc_id))
+        batch.commit()
+
+
+def run_benchmark(args) -> dict:
+    # The limiter reads its quota at import
+    os.environ["LLM_RPM"] = str(args.rpm)
+    os.environ["LLM_TPM"] = str(args.tpm)
+
+    import add_ai_summaries as summaries
+    from llm_backend import StubBackend
+
+    backend = StubBackend(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    summaries.set_backend(backend)
+
+    run_id = uuid.uuid4().hex[:8]
+    election_date = f"BENCH-{run_id}"
+    doc_ids = seed_propositions(summaries.db, args, election_date, run_id)
+
+    try:
+        stats = summaries.add_summaries_to_all_propositions(
+            election_date=election_date, workers=args.workers, restart=True)
+    finally:
+        if not args.keep:
+            delete_docs(summaries.db, doc_ids)
+
+    elapsed = max(stats['elapsed'], 1e-6)
+    tokens = stats['input_tokens'] + stats['output_tokens']
+    latencies = stats['latencies']
+    return {
+        'config': vars(args),
+        'propositions': stats['processed'],
+        'updated': stats['updated'],
+        'failed': stats['failed'],
+        'elapsed_s': round(elapsed, 2),
+        'propositions_per_s': round(stats['updated'] / elapsed, 2),
+        'tokens_per_s': round(tokens / elapsed),
+        'tokens_per_proposition': round(tokens / stats['updated']) if stats['updated'] else 0,
+        'api_calls': stats['api_calls'],
+        'backend_errors': backend.errors,
+        'latency_s': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies), 3) if latencies else 0.0,
+        },
+        'quota': summaries.limiter.stats(),
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_benchmark(args)
+
+    print("\n" + "=" * 60)
+    print("SUMMARY BENCHMARK")
+    print("=" * 60)
+    print(f"Propositions:     {results['updated']}/{results['propositions']} "
+          f"({results['failed']} failed) in {results['elapsed_s']}s")
+    print(f"Throughput:       {results['propositions_per_s']} propositions/s, "
+          f"{results['tokens_per_s']} tokens/s")
+    print(f"Tokens/summary:   {results['tokens_per_proposition']}")
+    print(f"API calls:        {results['api_calls']} ({results['backend_errors']} injected errors)")
+    latency = results['latency_s']
+    print(f"Latency:          p50 {latency['p50']}s  p95 {latency['p95']}s  "
+          f"p99 {latency['p99']}s  max {latency['max']}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Election Calendar Discovery + Pre-election Warm-up
+Reads the election dropdown on the SOS PropositionText page, keeps the
+`elections` collection up to date, and in the days before each election
+pre-scrapes propositions for every parish and pre-generates AI summaries
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.support.ui import Select
+from selenium.webdriver.common.by import By
+from firebase_admin import firestore
+
+from scraper_voting import (
+    db,
+    BASE_URL,
+    DEFAULT_ELECTION,
+    get_driver,
+    sanitize_id,
+    scrape_and_track,
+)
+from host_limiter import CircuitOpen, polite, polite_get, polite_driver_get
+
+# -------------------------
+# Config
+# -------------------------
+ELECTIONS_COLLECTION = "elections"
+WARMUP_DAYS = 7          # Start warming this many days before election day
+SYNC_INTERVAL = 6 * 3600  # How often the calendar is re-read from the portal
+SYNC_RETRY_BASE = 5 * 60  # First retry after a failed sync, doubling up to SYNC_INTERVAL
+WARMUP_FAILURE_TOLERANCE = 0.05  # Share of parishes that may fail before a warm-up is retried
+
+
+def parse_election_date(election_date: str):
+    """Parse the dropdown's MM/DD/YYYY text, None if it isn't a date"""
+    try:
+        return datetime.strptime(election_date.strip(), "%m/%d/%Y")
+    except ValueError:
+        return None
+
+
+def fetch_election_options() -> list:
+    """Read the election dropdown options (plain HTTP first, Selenium fallback)"""
+    try:
+        r = polite_get(BASE_URL, timeout=12)
+        r.raise_for_status()
+        soup = BeautifulSoup(r.text, "html.parser")
+        select = soup.select_one("select#MainContent_ddlElection") or soup.find("select")
+        if select:
+            options = [o.get_text(strip=True) for o in select.find_all("option")]
+            options = [o for o in options if parse_election_date(o)]
+            if options:
+                return options
+    except CircuitOpen:
+        raise
+    except Exception as e:
+        print(f"[CAL] Plain fetch of election list failed: {e}")
+
+    driver = get_driver()
+    try:
+        polite_driver_get(driver, BASE_URL)
+        time.sleep(1.0)
+        try:
+            select = Select(driver.find_element(By.ID, "MainContent_ddlElection"))
+        except Exception:
+            select = Select(driver.find_elements(By.TAG_NAME, "select")[0])
+        options = [o.text.strip() for o in select.options]
+        return [o for o in options if parse_election_date(o)]
+    finally:
+        driver.quit()
+
+
+def fetch_parish_options(election_date: str) -> list:
+    """Read the parish dropdown for an election (it is populated by postback)"""
+    driver = get_driver()
+    try:
+        polite_driver_get(driver, BASE_URL)
+        time.sleep(1.0)
+        try:
+            select_election = Select(driver.find_element(By.ID, "MainContent_ddlElection"))
+        except Exception:
+            select_election = Select(driver.find_elements(By.TAG_NAME, "select")[0])
+        with polite(BASE_URL):
+            select_election.select_by_visible_text(election_date)
+            time.sleep(1.2)
+
+        try:
+            select_parish = Select(driver.find_element(By.ID, "MainContent_ddlParish"))
+        except Exception:
+            select_parish = Select(driver.find_elements(By.TAG_NAME, "select")[1])
+        # Skip placeholder entries like "-- Select Parish --"
+        return [o.text.strip() for o in select_parish.options if ' - ' in o.text]
+    finally:
+        driver.quit()
+
+
+def sync_elections() -> list:
+    """
+    Refresh the `elections` collection from the portal dropdown.
+    Returns the upcoming election dates, soonest first.
+    """
+    options = fetch_election_options()
+    today = datetime.utcnow().date()
+    seen_ids = set()
+
+    for election_date in options:
+        election_day = parse_election_date(election_date)
+        doc_id = sanitize_id(election_date)
+        seen_ids.add(doc_id)
+        db.collection(ELECTIONS_COLLECTION).document(doc_id).set({
+            "election_date": election_date,
+            "election_day": election_day,
+            "upcoming": election_day.date() >= today,
+            "on_portal": True,
+            "last_seen_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+
+    # Elections that dropped off the dropdown are no longer offered
+    for doc in db.collection(ELECTIONS_COLLECTION).where("on_portal", "==", True).stream():
+        if doc.id not in seen_ids:
+            doc.reference.update({"on_portal": False, "upcoming": False})
+
+    upcoming = sorted(
+        (o for o in options if parse_election_date(o).date() >= today),
+        key=parse_election_date,
+    )
+    print(f"[CAL] {len(options)} election(s) on portal, {len(upcoming)} upcoming")
+    return upcoming
+
+
+def get_upcoming_elections() -> list:
+    """Upcoming election docs from Firestore, soonest first"""
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    docs = db.collection(ELECTIONS_COLLECTION)\
+        .where("election_day", ">=", today)\
+        .order_by("election_day")\
+        .get()
+    return [d.to_dict() for d in docs if d.to_dict().get("on_portal", True)]
+
+
+def get_default_election() -> str:
+    """Soonest upcoming election, falling back to the configured default"""
+    try:
+        upcoming = get_upcoming_elections()
+        if upcoming:
+            return upcoming[0]["election_date"]
+    except Exception as e:
+        print(f"[CAL] Could not read election calendar: {e}")
+    return DEFAULT_ELECTION
+
+
+def warm_up_election(election_date: str, summarize: bool = True, enqueue=None) -> dict:
+    """
+    Pre-scrape every parish for an election and pre-generate its summaries
+    (unless summarize is False - the scraper service summarizes new
+    propositions as they are written). Parishes already tracked by the
+    re-scrape scheduler are re-checked incrementally instead of scraped
+    from scratch.
+
+    With enqueue(parish_name, election_date), untracked parishes are handed
+    to the caller's job queue instead of scraped here, and tracked ones are
+    left to the scheduler. A queued parish isn't scraped yet, so it counts
+    against the election like a failure until a later warm-up finds it tracked.
+
+    The election is marked warm only if at most WARMUP_FAILURE_TOLERANCE of
+    its parishes failed or are still queued; otherwise the next
+    run_warmups() tries again.
+    """
+    from proposition_scheduler import STATE_COLLECTION, state_doc_id, recheck_parish
+
+    print("="*60)
+    print(f"🔥 WARMING UP ELECTION {election_date}")
+    print("="*60)
+
+    stats = {"parishes": 0, "scraped": 0, "rechecked": 0, "queued": 0, "failed": 0}
+    parishes = fetch_parish_options(election_date)
+    stats["parishes"] = len(parishes)
+
+    for parish_name in parishes:
+        try:
+            state = db.collection(STATE_COLLECTION).document(state_doc_id(parish_name, election_date)).get()
+            if enqueue:
+                if not state.exists:
+                    enqueue(parish_name, election_date)
+                    stats["queued"] += 1
+            elif state.exists:
+                recheck_parish(parish_name, election_date)
+                stats["rechecked"] += 1
+            elif scrape_and_track(parish_name, election_date):
+                stats["scraped"] += 1
+            else:
+                stats["failed"] += 1
+        except Exception as e:
+            print(f"[CAL] Error warming {parish_name}: {e}")
+            stats["failed"] += 1
+
+    # Summaries are generated up front so the app never shows a bare proposition
+    if summarize:
+        try:
+            from add_ai_summaries import add_summaries_to_all_propositions, get_backend
+            get_backend()
+            add_summaries_to_all_propositions(election_date=election_date)
+        except RuntimeError as e:
+            print(f"[CAL] Skipping summaries - {e}")
+        except Exception as e:
+            print(f"[CAL] Error generating summaries: {e}")
+
+    # No parish list at all means the portal page failed, not an empty election
+    stats["warm"] = (stats["parishes"] > 0
+                     and stats["failed"] + stats["queued"] <= WARMUP_FAILURE_TOLERANCE * stats["parishes"])
+    update = {"warmup_stats": stats, "last_warmup_at": firestore.SERVER_TIMESTAMP}
+    if stats["warm"]:
+        update["warmed_at"] = firestore.SERVER_TIMESTAMP
+    db.collection(ELECTIONS_COLLECTION).document(sanitize_id(election_date)).set(update, merge=True)
+
+    if stats["warm"]:
+        print(f"[CAL] Warm-up done: {stats}")
+    else:
+        print(f"[CAL] Warm-up incomplete, will retry: {stats}")
+    return stats
+
+
+def due_warmups(now: datetime = None) -> list:
+    """Upcoming elections within WARMUP_DAYS that aren't warm yet, soonest first"""
+    now = now or datetime.utcnow()
+    due = []
+    for election in get_upcoming_elections():
+        election_day = parse_election_date(election["election_date"])
+        if election_day - now > timedelta(days=WARMUP_DAYS):
+            continue
+        if election.get("warmed_at"):
+            continue  # The re-scrape scheduler keeps it fresh from here
+        due.append(election["election_date"])
+    return due
+
+
+def run_warmups(now: datetime = None, summarize: bool = True) -> int:
+    """Warm up every upcoming election within WARMUP_DAYS that isn't warm yet"""
+    warmed = 0
+    for election_date in due_warmups(now):
+        if warm_up_election(election_date, summarize=summarize)["warm"]:
+            warmed += 1
+    return warmed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--warm":
+        # python election_calendar.py --warm 11/15/2025
+        warm_up_election(sys.argv[2] if len(sys.argv) > 2 else get_default_election())
+    else:
+        for election_date in sync_elections():
+            print(f"  - {election_date}")
+        run_warmups()
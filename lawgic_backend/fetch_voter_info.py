@@ -1,29 +1,105 @@
 """
 Complete Voter Info Fetcher - Windows Compatible
 Fetches voter information AND voting location, updates Firestore
+
+    python fetch_voter_info.py <user_id>
+    python fetch_voter_info.py --bulk users.txt [--workers N]   (one id per line, - for stdin)
+    python fetch_voter_info.py --bulk-missing [--workers N]     (users still flagged for lookup)
 """
 
 from scraper_user_info import get_complete_voter_info
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import firestore
+from firebase_client import get_db
+from parish_registry import canonical_parish
 import sys
+import time
+import queue
+import threading
+
+from scraper_user_info import build_driver
+from worker_pool import ScrapeWorkerPool, WORKERS
 
 # Initialize Firebase
 try:
-    cred = credentials.Certificate("firebase_config.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
+    db = get_db()
     print("[OK] Firebase initialized")
 except Exception as e:
     print(f"[ERROR] Error initializing Firebase: {e}")
     print("Make sure firebase_config.json is in the current directory")
-    sys.exit(1)
+    if __name__ == "__main__":
+        sys.exit(1)
+    raise
+
+# Fields the portal lookup needs, and the voter fields it writes back
+LOOKUP_FIELDS = ['first_name', 'last_name', 'zip_code', 'birth_month', 'birth_year']
+VOTER_FIELDS = [
+    'voter_status', 'voter_parish', 'voter_ward_precinct', 'voter_party',
+    'voter_full_name', 'voting_location_name', 'voting_location_address',
+]
+# Read alongside the lookup fields so unchanged results can skip the write
+STORED_FIELDS = LOOKUP_FIELDS + VOTER_FIELDS + ['needs_voter_lookup']
+
+
+def has_voter_data(result: dict) -> bool:
+    """Scraper result has data (either success=True or has parish/status fields)"""
+    return bool((result.get('success') == True) or result.get('parish') or result.get('status'))
+
+
+def build_voter_update(result: dict) -> dict:
+    """Firestore fields to write for a successful scraper result"""
+    update_data = {}
+    
+    # Add voter registration fields
+    if result.get('status'):
+        update_data['voter_status'] = result['status']
+    if result.get('parish'):
+        # Store the canonical "NAME - CODE" form up front - no fix-up pass later
+        parish = canonical_parish(result['parish'])
+        if not parish:
+            print(f"[WARN] Unknown parish '{result['parish']}', saving as-is")
+        update_data['voter_parish'] = parish or result['parish']
+    if result.get('ward_precinct'):
+        update_data['voter_ward_precinct'] = result['ward_precinct']
+    if result.get('party'):
+        update_data['voter_party'] = result['party']
+    if result.get('name'):
+        update_data['voter_full_name'] = result['name']
+    
+    # Add voting location fields
+    if result.get('voting_location_name'):
+        update_data['voting_location_name'] = result['voting_location_name']
+    if result.get('voting_location_address'):
+        update_data['voting_location_address'] = result['voting_location_address']
+    
+    # Update timestamp and take the user out of the lookup queue
+    update_data['voter_info_updated_at'] = firestore.SERVER_TIMESTAMP
+    update_data['needs_voter_lookup'] = False
+    return update_data
+
+
+def changed_voter_fields(update_data: dict, stored: dict) -> dict:
+    """
+    Trim a full update down to what differs from the stored user. A lookup
+    that found nothing new only records voter_info_verified_at, so nightly
+    re-verification doesn't rewrite every user.
+    """
+    changes = {k: v for k, v in update_data.items()
+               if k in VOTER_FIELDS and stored.get(k) != v}
+    if stored.get('needs_voter_lookup') is not False:
+        changes['needs_voter_lookup'] = False
+    if changes:
+        changes['voter_info_updated_at'] = firestore.SERVER_TIMESTAMP
+    changes['voter_info_verified_at'] = firestore.SERVER_TIMESTAMP
+    return changes
 
 
 def fetch_and_save_complete_info(user_id: str, first_name: str, last_name: str,
-                                 zip_code: str, birth_month: int, birth_year: int):
+                                 zip_code: str, birth_month: int, birth_year: int,
+                                 driver=None, stored: dict = None):
     """
-    Fetch complete voter info (registration + voting location) and save to Firestore
+    Fetch complete voter info (registration + voting location) and save to Firestore.
+    Pass the user's `stored` fields to write only what changed.
+    Returns the fields written, or False on failure.
     """
     print("\n" + "="*60)
     print("FETCHING COMPLETE VOTER INFORMATION")
@@ -42,7 +118,8 @@ def fetch_and_save_complete_info(user_id: str, first_name: str, last_name: str,
         zip_code=zip_code,
         birth_month=birth_month,
         birth_year=birth_year,
-        headless=True  # Set to False to see browser
+        headless=True,  # Set to False to see browser
+        driver=driver
     )
     
     # Debug: Show what was returned
@@ -50,10 +127,8 @@ def fetch_and_save_complete_info(user_id: str, first_name: str, last_name: str,
     for key in result.keys():
         print(f"  - {key}: {result[key]}")
     
-    # Check if we got data (either success=True or has parish/status fields)
-    has_data = (result.get('success') == True) or result.get('parish') or result.get('status')
-    
-    if not has_data:
+    # Check if we got data
+    if not has_voter_data(result):
         print(f"\n[ERROR] Error: {result.get('error', 'Unknown error - no data returned')}")
         return False
     
@@ -77,54 +152,41 @@ def fetch_and_save_complete_info(user_id: str, first_name: str, last_name: str,
     # Update Firestore
     print("\n[INFO] Updating Firestore...")
     try:
-        update_data = {}
-        
-        # Add voter registration fields
-        if result.get('status'):
-            update_data['voter_status'] = result['status']
-        if result.get('parish'):
-            update_data['voter_parish'] = result['parish']
-        if result.get('ward_precinct'):
-            update_data['voter_ward_precinct'] = result['ward_precinct']
-        if result.get('party'):
-            update_data['voter_party'] = result['party']
-        if result.get('name'):
-            update_data['voter_full_name'] = result['name']
-        
-        # Add voting location fields
-        if result.get('voting_location_name'):
-            update_data['voting_location_name'] = result['voting_location_name']
-        if result.get('voting_location_address'):
-            update_data['voting_location_address'] = result['voting_location_address']
-        
-        # Update timestamp
-        update_data['voter_info_updated_at'] = firestore.SERVER_TIMESTAMP
+        update_data = build_voter_update(result)
+        if stored is not None:
+            update_data = changed_voter_fields(update_data, stored)
+        else:
+            update_data['voter_info_verified_at'] = firestore.SERVER_TIMESTAMP
         
         # Save to Firestore
         db.collection('users').document(user_id).update(update_data)
-        print("[SUCCESS] Firestore updated successfully!")
+        if 'voter_info_updated_at' in update_data:
+            print("[SUCCESS] Firestore updated successfully!")
+        else:
+            print("[SUCCESS] Voter info unchanged - recorded verification only")
         
         print("\n" + "="*60)
         print("DONE! User's voter information has been saved.")
         print("="*60)
         print("\nFirestore fields updated:")
         for key, value in update_data.items():
-            if key != 'voter_info_updated_at':
+            if key in VOTER_FIELDS:
                 print(f"  {key}: {value}")
         
-        return True
+        return update_data
         
     except Exception as e:
         print(f"[ERROR] Error updating Firestore: {e}")
         return False
 
 
-def fetch_from_firestore(user_id: str):
+def fetch_from_firestore(user_id: str, driver=None):
     """Get user data from Firestore and fetch complete voter info"""
     print(f"[INFO] Reading user data from Firestore for: {user_id}")
     
     try:
-        user_doc = db.collection('users').document(user_id).get()
+        # Only the lookup and voter fields, not the whole profile
+        user_doc = db.collection('users').document(user_id).get(field_paths=STORED_FIELDS)
         
         if not user_doc.exists:
             print(f"[ERROR] User document not found: {user_id}")
@@ -133,8 +195,7 @@ def fetch_from_firestore(user_id: str):
         user_data = user_doc.to_dict()
         
         # Check if user has required fields
-        required_fields = ['first_name', 'last_name', 'zip_code', 'birth_month', 'birth_year']
-        missing_fields = [f for f in required_fields if f not in user_data]
+        missing_fields = [f for f in LOOKUP_FIELDS if f not in user_data]
         
         if missing_fields:
             print(f"[ERROR] User is missing required fields: {', '.join(missing_fields)}")
@@ -148,7 +209,9 @@ def fetch_from_firestore(user_id: str):
             last_name=user_data['last_name'],
             zip_code=user_data['zip_code'],
             birth_month=user_data['birth_month'],
-            birth_year=user_data['birth_year']
+            birth_year=user_data['birth_year'],
+            driver=driver,
+            stored=user_data
         )
         
     except Exception as e:
@@ -156,6 +219,152 @@ def fetch_from_firestore(user_id: str):
         return False
 
 
+# -------------------------
+# Bulk mode
+# -------------------------
+BULK_READ_CHUNK = 100     # Users per get_all call
+BULK_WRITE_BATCH = 200    # Updates per WriteBatch commit
+BULK_LOOKUP_TIMEOUT = 120
+PROGRESS_EVERY = 25
+
+
+def read_user_ids(source: str) -> list:
+    """User ids from a file (one per line), or stdin when source is '-'"""
+    stream = sys.stdin if source == '-' else open(source)
+    try:
+        ids = [line.strip() for line in stream if line.strip() and not line.startswith('#')]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return list(dict.fromkeys(ids))  # Dedupe, keep order
+
+
+def users_needing_lookup() -> list:
+    """Ids of users still flagged needs_voter_lookup, read a page at a time"""
+    query = db.collection('users')\
+        .where('needs_voter_lookup', '==', True)\
+        .select(['needs_voter_lookup'])\
+        .order_by('__name__')\
+        .limit(500)
+    ids = []
+    last = None
+    while True:
+        page = (query.start_after(last) if last else query).get()
+        ids.extend(doc.id for doc in page)
+        if len(page) < 500:
+            return ids
+        last = page[-1]
+
+
+def iter_user_docs(user_ids: list):
+    """Yield user snapshots (lookup + voter fields only) using batched get_all reads"""
+    for i in range(0, len(user_ids), BULK_READ_CHUNK):
+        refs = [db.collection('users').document(uid) for uid in user_ids[i:i + BULK_READ_CHUNK]]
+        yield from db.get_all(refs, field_paths=STORED_FIELDS)
+
+
+def lookup_voter(user_data: dict, driver=None):
+    """One portal lookup; returns the scraper result or False"""
+    result = get_complete_voter_info(
+        first_name=user_data['first_name'],
+        last_name=user_data['last_name'],
+        zip_code=user_data['zip_code'],
+        birth_month=user_data['birth_month'],
+        birth_year=user_data['birth_year'],
+        headless=True,
+        driver=driver
+    )
+    return result if has_voter_data(result) else False
+
+
+def bulk_fetch(user_ids: list, workers: int = WORKERS) -> dict:
+    """
+    Look up many users in one process: lookups run concurrently on warm
+    browsers and updates are committed in batches.
+    """
+    total = len(user_ids)
+    print(f"[BULK] {total} users, {workers} worker(s)")
+    
+    pool = ScrapeWorkerPool({'voter': lambda: build_driver(headless=True)}, workers)
+    results = queue.Queue()
+    slots = threading.Semaphore(workers * 2)  # Don't read far ahead of the workers
+    stats = {'updated': 0, 'unchanged': 0, 'failed': 0, 'skipped': 0}
+    stored = {}  # user_id -> stored fields, while its lookup is in flight
+    state = {'batch': db.batch(), 'pending': 0, 'finished': 0}
+    started = time.time()
+    
+    def commit():
+        if state['pending']:
+            state['batch'].commit()
+            state['batch'] = db.batch()
+            state['pending'] = 0
+    
+    def report():
+        done = state['finished'] + stats['skipped']
+        rate = state['finished'] / max(time.time() - started, 1e-6)
+        eta = (total - done) / rate if rate else 0
+        print(f"[BULK] {done}/{total} - {stats['updated']} updated, {stats['unchanged']} unchanged, "
+              f"{stats['failed']} failed, {stats['skipped']} skipped ({rate:.2f}/s, ~{eta / 60:.0f} min left)")
+    
+    def handle(result):
+        state['finished'] += 1
+        user_data = stored.pop(result.key, {})
+        if result.status == 'completed':
+            changes = changed_voter_fields(build_voter_update(result.value), user_data)
+            ref = db.collection('users').document(result.key)
+            state['batch'].update(ref, changes)
+            state['pending'] += 1
+            stats['updated' if 'voter_info_updated_at' in changes else 'unchanged'] += 1
+            if state['pending'] >= BULK_WRITE_BATCH:
+                commit()
+        else:
+            stats['failed'] += 1
+            print(f"[BULK] {result.key}: {result.status} {result.error or ''}")
+        if state['finished'] % PROGRESS_EVERY == 0:
+            report()
+    
+    def drain(wait=0.0):
+        try:
+            handle(results.get(timeout=wait) if wait else results.get_nowait())
+            while True:
+                handle(results.get_nowait())
+        except queue.Empty:
+            pass
+    
+    def on_done(result):
+        results.put(result)
+        slots.release()
+    
+    submitted = 0
+    try:
+        for snap in iter_user_docs(user_ids):
+            user_data = snap.to_dict() if snap.exists else None
+            if not user_data or any(f not in user_data for f in LOOKUP_FIELDS):
+                stats['skipped'] += 1
+                continue
+            
+            # Results are written from this thread, so drain while waiting for a slot
+            while not slots.acquire(timeout=0.5):
+                drain()
+            stored[snap.id] = user_data
+            pool.submit('voter_info', snap.id, lookup_voter, user_data,
+                        driver_kind='voter', timeout=BULK_LOOKUP_TIMEOUT, on_done=on_done)
+            submitted += 1
+            drain()
+        
+        while state['finished'] < submitted:
+            drain(wait=1.0)
+    except KeyboardInterrupt:
+        print("\n[BULK] Interrupted - saving finished lookups")
+    finally:
+        drain()
+        commit()
+        pool.shutdown(wait=False)
+    
+    report()
+    return stats
+
+
 def interactive_mode():
     """Interactive mode to enter user information"""
     print("\n" + "="*60)
@@ -186,7 +395,17 @@ def interactive_mode():
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    workers = WORKERS
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    
+    if len(sys.argv) > 2 and sys.argv[1] == "--bulk":
+        stats = bulk_fetch(read_user_ids(sys.argv[2]), workers)
+        sys.exit(0 if not stats['failed'] else 1)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bulk-missing":
+        stats = bulk_fetch(users_needing_lookup(), workers)
+        sys.exit(0 if not stats['failed'] else 1)
+    elif len(sys.argv) > 1:
         # Command line mode - automatically fetch from Firestore
         user_id = sys.argv[1]
         print(f"[INFO] Fetching voter info for user: {user_id}\n")
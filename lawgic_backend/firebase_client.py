@@ -0,0 +1,42 @@
+"""
+Shared Firebase Client
+Initializes Firebase once per process and hands out the Firestore client.
+Set FIRESTORE_EMULATOR_HOST (e.g. localhost:8080) to run against the
+Firestore emulator instead of the real project.
+"""
+
+import os
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+FIREBASE_CRED_PATH = os.environ.get("FIREBASE_CRED_PATH", "firebase_config.json")
+EMULATOR_PROJECT_ID = os.environ.get("GCLOUD_PROJECT", "lawgic-emulator")
+
+_db = None
+
+
+def using_emulator() -> bool:
+    return bool(os.environ.get("FIRESTORE_EMULATOR_HOST"))
+
+
+def get_db():
+    """Return the process-wide Firestore client, initializing Firebase once"""
+    global _db
+    if _db is not None:
+        return _db
+
+    if using_emulator():
+        # The emulator accepts any project id and needs no service account
+        from google.cloud import firestore as gcloud_firestore
+        _db = gcloud_firestore.Client(project=EMULATOR_PROJECT_ID)
+        return _db
+
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        cred = credentials.Certificate(FIREBASE_CRED_PATH)
+        firebase_admin.initialize_app(cred)
+
+    _db = firestore.client()
+    return _db
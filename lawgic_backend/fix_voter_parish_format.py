@@ -1,49 +1,39 @@
 """
 Fix User Parish Format
 Updates user's voter_parish to include parish code
+
+    python fix_voter_parish_format.py <user_id>
+    python fix_voter_parish_format.py --all [--dry-run] [--restart]
+
+--all scans every user a page at a time, rewrites the ones that need it
+in batched writes and saves its position to CURSOR_FILE after each page,
+so an interrupted run picks up where it stopped.
 """
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+import os
 import sys
+import time
+
+from firebase_client import get_db
+from parish_registry import canonical_parish
 
 # Initialize Firebase
 try:
-    cred = credentials.Certificate("firebase_config.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
+    db = get_db()
     print("✅ Firebase initialized")
 except Exception as e:
     print(f"❌ Error: {e}")
     sys.exit(1)
 
-# Parish code mapping
-PARISH_CODES = {
-    'ACADIA': '01', 'ALLEN': '02', 'ASCENSION': '03', 'ASSUMPTION': '04',
-    'AVOYELLES': '05', 'BEAUREGARD': '06', 'BIENVILLE': '07', 'BOSSIER': '08',
-    'CADDO': '09', 'CALCASIEU': '10', 'CALDWELL': '11', 'CAMERON': '12',
-    'CATAHOULA': '13', 'CLAIBORNE': '14', 'CONCORDIA': '15', 'DE SOTO': '16',
-    'EAST BATON ROUGE': '17', 'EAST CARROLL': '18', 'EAST FELICIANA': '19',
-    'EVANGELINE': '20', 'FRANKLIN': '21', 'GRANT': '22', 'IBERIA': '23',
-    'IBERVILLE': '24', 'JACKSON': '25', 'JEFFERSON': '26', 'JEFFERSON DAVIS': '27',
-    'LAFAYETTE': '28', 'LAFOURCHE': '29', 'LA SALLE': '30', 'LINCOLN': '31',
-    'LIVINGSTON': '32', 'MADISON': '33', 'MOREHOUSE': '34', 'NATCHITOCHES': '35',
-    'ORLEANS': '36', 'OUACHITA': '37', 'PLAQUEMINES': '38', 'POINTE COUPEE': '39',
-    'RAPIDES': '40', 'RED RIVER': '41', 'RICHLAND': '42', 'SABINE': '43',
-    'ST. BERNARD': '44', 'ST. CHARLES': '45', 'ST. HELENA': '46', 'ST. JAMES': '47',
-    'ST. JOHN THE BAPTIST': '48', 'ST. LANDRY': '49', 'ST. MARTIN': '50',
-    'ST. MARY': '51', 'ST. TAMMANY': '52', 'TANGIPAHOA': '53', 'TENSAS': '54',
-    'TERREBONNE': '55', 'UNION': '56', 'VERMILION': '57', 'VERNON': '58',
-    'WASHINGTON': '59', 'WEBSTER': '60', 'WEST BATON ROUGE': '61',
-    'WEST CARROLL': '62', 'WEST FELICIANA': '63', 'WINN': '64',
-}
+PAGE_SIZE = 500  # Users read per page, and written per batch (Firestore's batch limit)
+CURSOR_FILE = "parish_migration.cursor"
 
 def fix_user_parish(user_id):
     """Fix parish format for a specific user"""
     try:
         # Get user doc
         user_ref = db.collection('users').document(user_id)
-        user_doc = user_ref.get()
+        user_doc = user_ref.get(field_paths=['voter_parish'])
         
         if not user_doc.exists:
             print(f"❌ User not found: {user_id}")
@@ -58,18 +48,14 @@ def fix_user_parish(user_id):
         
         print(f"Current parish: {current_parish}")
         
-        # Get parish code
-        parish_upper = current_parish.strip().upper()
-        code = PARISH_CODES.get(parish_upper)
+        # Resolve any spelling variant to "NAME - CODE"
+        new_parish = canonical_parish(current_parish)
         
-        if not code:
+        if not new_parish:
             print(f"⚠️  No code found for parish: {current_parish}")
             print("   Using parish as-is")
             return False
         
-        # Create new format
-        new_parish = f"{parish_upper} - {code}"
-        
         if current_parish == new_parish:
             print(f"✅ Parish already in correct format: {new_parish}")
             return True
@@ -87,49 +73,111 @@ def fix_user_parish(user_id):
         return False
 
 
-def fix_all_users():
-    """Fix parish format for all users"""
+def parish_update_for(user_doc):
+    """New voter_parish for a scanned user, or None if it's already fine"""
+    current_parish = (user_doc.to_dict() or {}).get('voter_parish')
+    
+    if not current_parish:
+        return None
+    
+    new_parish = canonical_parish(current_parish)
+    
+    if not new_parish or current_parish == new_parish:
+        return None
+    return new_parish
+
+
+def read_cursor():
     try:
-        users = db.collection('users').stream()
-        
-        count = 0
-        updated = 0
-        
-        for user_doc in users:
-            count += 1
-            user_id = user_doc.id
-            user_data = user_doc.to_dict()
-            current_parish = user_data.get('voter_parish')
+        with open(CURSOR_FILE) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_cursor(user_id):
+    # Write-then-rename so a crash never leaves a half-written cursor
+    tmp = CURSOR_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(user_id)
+    os.replace(tmp, CURSOR_FILE)
+
+
+def fix_all_users(dry_run=False, restart=False):
+    """Fix parish format for all users (batched, resumable)"""
+    if restart and os.path.exists(CURSOR_FILE):
+        os.remove(CURSOR_FILE)
+    
+    # Only the parish field, a page at a time. Firestore can't filter on
+    # "doesn't end with a code", so that check happens per document.
+    query = db.collection('users')\
+        .select(['voter_parish'])\
+        .order_by('__name__')\
+        .limit(PAGE_SIZE)
+    
+    last_id = None if dry_run else read_cursor()
+    if last_id:
+        print(f"Resuming after user {last_id}")
+    
+    count = 0
+    updated = 0
+    started = time.time()
+    
+    try:
+        while True:
+            page_query = query
+            if last_id:
+                page_query = query.start_after({'__name__': db.collection('users').document(last_id)})
+            page = page_query.get()
+            if not page:
+                break
             
-            if not current_parish:
-                continue
+            batch = db.batch()
+            changes = 0
+            for user_doc in page:
+                new_parish = parish_update_for(user_doc)
+                if new_parish:
+                    print(f"{'Would update' if dry_run else 'Updating'} {user_doc.id}: "
+                          f"{user_doc.to_dict().get('voter_parish')} → {new_parish}")
+                    batch.update(user_doc.reference, {'voter_parish': new_parish})
+                    changes += 1
             
-            # Get parish code
-            parish_upper = current_parish.strip().upper()
-            code = PARISH_CODES.get(parish_upper)
+            if changes and not dry_run:
+                batch.commit()
             
-            if not code:
-                continue
+            count += len(page)
+            updated += changes
+            last_id = page[-1].id
+            if not dry_run:
+                save_cursor(last_id)
             
-            new_parish = f"{parish_upper} - {code}"
+            elapsed = max(time.time() - started, 1e-6)
+            print(f"  {count} scanned, {updated} {'to update' if dry_run else 'updated'} "
+                  f"({count / elapsed:.0f} docs/s)")
             
-            if current_parish != new_parish:
-                print(f"Updating {user_id}: {current_parish} → {new_parish}")
-                db.collection('users').document(user_id).update({
-                    'voter_parish': new_parish
-                })
-                updated += 1
-        
-        print(f"\n✅ Checked {count} users, updated {updated}")
-        
+            if len(page) < PAGE_SIZE:
+                break
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted after {count} users - run again to resume")
+        return
     except Exception as e:
         print(f"❌ Error: {e}")
+        print("   Run again to resume from the last completed page")
+        return
+    
+    if not dry_run and os.path.exists(CURSOR_FILE):
+        os.remove(CURSOR_FILE)
+    
+    elapsed = max(time.time() - started, 1e-6)
+    verb = "would update" if dry_run else "updated"
+    print(f"\n✅ Checked {count} users, {verb} {updated} "
+          f"in {elapsed:.1f}s ({count / elapsed:.0f} docs/s)")
 
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         if sys.argv[1] == "--all":
-            fix_all_users()
+            fix_all_users(dry_run="--dry-run" in sys.argv, restart="--restart" in sys.argv)
         else:
             user_id = sys.argv[1]
             fix_user_parish(user_id)
@@ -0,0 +1,217 @@
+"""
+Per-host Politeness Limiter
+Every request to the SOS portal goes through one of these, so the API
+server, the scraper service and manual scripts in the same process share
+one budget per host:
+
+- max in-flight requests, with an AIMD concurrency limit under it that
+  grows while the portal is healthy and halves when it slows down or
+  answers 429/5xx
+- a minimum spacing between request starts
+- a circuit breaker that stops sending for a while after repeated
+  failures, then lets one probe request through
+
+Limits are per process. Separate processes (API server + service) each
+get their own budget, so size SOS_MAX_IN_FLIGHT with that in mind.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+# -------------------------
+# Config
+# -------------------------
+# Root of the SOS voter portal. Point it at portal_standin.py (e.g.
+# http://localhost:8099) to run every scraper offline.
+SOS_BASE_URL = os.environ.get("SOS_BASE_URL", "https://voterportal.sos.la.gov").rstrip("/")
+MAX_IN_FLIGHT = int(os.environ.get("SOS_MAX_IN_FLIGHT", "4"))
+MIN_INTERVAL = float(os.environ.get("SOS_MIN_INTERVAL", "0.5"))  # Seconds between request starts
+ACQUIRE_TIMEOUT = 120          # Give up waiting for a slot after this long
+SLOW_FACTOR = 2.0              # Latency this many times the baseline counts as a slowdown
+SLOW_FLOOR = 2.0               # ...but never below this many seconds
+BREAKER_FAILURES = 5           # Consecutive failures that open the circuit
+BREAKER_COOLDOWN = 60          # Seconds the circuit stays open before a probe
+
+
+class CircuitOpen(Exception):
+    """The host is failing; requests are refused until the cooldown ends"""
+
+
+class HostBusy(Exception):
+    """No request slot became free within the acquire timeout"""
+
+
+class RetryableStatus(Exception):
+    """The host answered 429 or 5xx"""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Slot:
+    """Handed to the caller inside HostLimiter.slot(); report the HTTP status if there is one"""
+
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+
+    def record(self, status, retry_after=None):
+        self.status = status
+        self.retry_after = retry_after
+
+
+class HostLimiter:
+    def __init__(self, host, max_in_flight=MAX_IN_FLIGHT, min_interval=MIN_INTERVAL):
+        self.host = host
+        self.max_in_flight = max_in_flight
+        self.min_interval = min_interval
+
+        self.limit = float(min(2, max_in_flight))  # AIMD concurrency limit
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.baseline = None                       # Slow-moving EWMA of healthy latency
+
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+        self._cond = threading.Condition()
+
+    # --- admission ---------------------------------------------------
+
+    def _admit(self, now):
+        """Returns (admitted, seconds to wait); caller holds the lock"""
+        if self.open_until:
+            if now < self.open_until:
+                raise CircuitOpen(f"{self.host} circuit open for another {self.open_until - now:.0f}s")
+            # Half-open: exactly one probe request at a time
+            if self.probing:
+                return False, 1.0
+            if self.in_flight == 0:
+                self.probing = True
+                return True, 0.0
+            return False, 1.0
+
+        if self.in_flight >= int(self.limit):
+            return False, None
+        if now < self.next_start:
+            return False, self.next_start - now
+        return True, 0.0
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                admitted, wait = self._admit(now)
+                if admitted:
+                    self.in_flight += 1
+                    self.next_start = max(now, self.next_start) + self.min_interval
+                    return now
+                if now >= deadline:
+                    raise HostBusy(f"No free slot for {self.host} after {timeout}s")
+                self._cond.wait(min(wait or deadline - now, deadline - now))
+
+    def release(self, started, ok, retry_after=None):
+        latency = time.time() - started
+        with self._cond:
+            self.in_flight -= 1
+            self.probing = False
+
+            slow = (self.baseline is not None
+                    and latency > max(SLOW_FLOOR, self.baseline * SLOW_FACTOR))
+
+            if ok and not slow:
+                # Additive increase: roughly +1 per window of successful requests
+                self.limit = min(self.max_in_flight, self.limit + 1.0 / self.limit)
+                self.baseline = latency if self.baseline is None else 0.9 * self.baseline + 0.1 * latency
+                self.failures = 0
+                self.open_until = 0.0
+            else:
+                # Multiplicative decrease on errors, 429/5xx and latency spikes
+                self.limit = max(1.0, self.limit / 2)
+                if not ok:
+                    self.failures += 1
+                    if self.failures >= BREAKER_FAILURES or self.open_until:
+                        self.open_until = time.time() + BREAKER_COOLDOWN
+                        print(f"[LIMITER] {self.host}: circuit open for {BREAKER_COOLDOWN}s "
+                              f"after {self.failures} failures")
+
+            if retry_after:
+                self.next_start = max(self.next_start, time.time() + retry_after)
+
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, timeout=ACQUIRE_TIMEOUT):
+        """
+        Hold one request slot. An exception inside the block, or a recorded
+        429/5xx status, counts as a failure.
+        """
+        started = self.acquire(timeout)
+        slot = _Slot()
+        ok = False
+        try:
+            yield slot
+            ok = not (slot.status == 429 or (slot.status or 0) >= 500)
+        finally:
+            self.release(started, ok, slot.retry_after)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "host": self.host,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "baseline_latency": round(self.baseline, 3) if self.baseline else None,
+                "failures": self.failures,
+                "circuit_open": self.open_until > time.time(),
+            }
+
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def limiter_for(url: str) -> HostLimiter:
+    """The shared limiter for a URL's host"""
+    host = urlparse(url).netloc.lower() or url
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = HostLimiter(host)
+        return _limiters[host]
+
+
+def polite(url: str, timeout=ACQUIRE_TIMEOUT):
+    """Context manager holding a request slot for url's host"""
+    return limiter_for(url).slot(timeout)
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def polite_get(url: str, **kwargs):
+    """requests.get through the host limiter; raises RetryableStatus on 429/5xx"""
+    with polite(url) as slot:
+        r = requests.get(url, **kwargs)
+        slot.record(r.status_code, _retry_after(r))
+    if r.status_code == 429 or r.status_code >= 500:
+        raise RetryableStatus(r.status_code, _retry_after(r))
+    return r
+
+
+def polite_driver_get(driver, url: str):
+    """driver.get through the host limiter"""
+    with polite(url):
+        driver.get(url)
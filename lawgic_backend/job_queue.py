@@ -0,0 +1,538 @@
+"""
+Durable Scraper Job Queue
+Queue for scraper jobs with idempotent keys, priority lanes, exponential
+backoff retries and dead-lettering. Jobs survive restarts: any job that was
+running when its process died is put back on the queue.
+
+Two backends share one interface:
+  - JobQueue (SQLite) for a single service process
+  - FirestoreJobQueue for several service replicas, which claim jobs with
+    time-limited leases so a job runs on one replica at a time and is picked
+    up again if that replica dies. A named leadership lease (e.g. for
+    housekeeping) is held by one replica at a time in the same way. Its
+    queries need composite indexes on
+    (status, priority, next_run_at), (status, priority, job_type,
+    next_run_at), (status, lease_expires_at) and (status, updated_at);
+    Firestore prints a creation link on first use.
+"""
+
+import os
+import json
+import uuid
+import random
+import socket
+import hashlib
+import sqlite3
+import threading
+import time
+
+# -------------------------
+# Config
+# -------------------------
+JOB_BACKEND = os.environ.get("SCRAPER_JOB_BACKEND", "sqlite")  # or "firestore"
+JOB_DB_PATH = os.environ.get("SCRAPER_JOB_DB", "scraper_jobs.db")
+JOB_COLLECTION = "scraper_jobs"
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30        # seconds before the first retry
+BACKOFF_MAX = 60 * 60    # never wait more than an hour between retries
+REQUEUE_COOLDOWN = 10 * 60  # a just-completed job isn't re-queued by stale events
+LEASE_SECONDS = 10 * 60  # how long a replica owns a claimed job without a heartbeat
+LEADER_LEASE_SECONDS = 5 * 60  # how long a replica stays leader without renewing
+LEADER_COLLECTION = "scraper_leaders"
+
+# Priority lanes - lower runs first
+PRIORITY_INTERACTIVE = 0   # A user just signed up / changed their profile
+PRIORITY_NORMAL = 5
+PRIORITY_BULK = 10         # Reconciliation passes and bulk re-verification
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+DEAD = "dead"
+
+
+def job_id_for(job_type: str, key: str) -> str:
+    """Idempotent job id, e.g. voter_info:<uid> or ballot:<parish>|<election>"""
+    return f"{job_type}:{key}"
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.5)
+
+
+class JobQueue:
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                job_key TEXT NOT NULL,
+                payload TEXT,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_run_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS jobs_ready
+            ON jobs (status, priority, next_run_at)
+        """)
+
+    def _row_to_job(self, row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        return job
+
+    def recover(self) -> int:
+        """Put jobs that were running when the last process died back on the queue"""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (PENDING, time.time(), RUNNING),
+            )
+            return cur.rowcount
+
+    def enqueue(self, job_type, key, payload=None, priority=PRIORITY_NORMAL, force=False) -> bool:
+        """
+        Add a job unless an identical one is already pending or running.
+        A duplicate at a higher priority promotes the existing job. Completed
+        jobs are re-queued once REQUEUE_COOLDOWN has passed; dead-lettered
+        ones only with force=True.
+        Returns True if the job was (re)queued.
+        """
+        job_id = job_id_for(job_type, key)
+        now = time.time()
+        payload_json = json.dumps(payload) if payload is not None else None
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT status, priority, payload, updated_at FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, job_type, job_key, payload, priority, status,"
+                        " attempts, next_run_at, created_at, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                        (job_id, job_type, key, payload_json or "{}", priority, PENDING, now, now, now),
+                    )
+                    queued = True
+                elif row["status"] in (PENDING, RUNNING):
+                    if priority < row["priority"]:
+                        self._conn.execute(
+                            "UPDATE jobs SET priority = ?, updated_at = ? WHERE id = ?",
+                            (priority, now, job_id),
+                        )
+                    queued = False
+                elif row["status"] == DEAD and not force:
+                    queued = False
+                elif (row["status"] == COMPLETED and not force
+                      and now - row["updated_at"] < REQUEUE_COOLDOWN):
+                    queued = False
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, payload = ?, priority = ?, attempts = 0,"
+                        " next_run_at = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                        (PENDING, payload_json or row["payload"], priority, now, now, job_id),
+                    )
+                    queued = True
+
+                self._conn.execute("COMMIT")
+                return queued
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, limit=1, job_types=None) -> list:
+        """
+        Atomically take up to `limit` ready jobs, highest priority first
+        (only jobs of the given types, if any)
+        """
+        now = time.time()
+        type_filter, type_args = "", ()
+        if job_types:
+            type_filter = f" AND job_type IN ({', '.join('?' * len(job_types))})"
+            type_args = tuple(job_types)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND next_run_at <= ?" + type_filter +
+                    " ORDER BY priority, next_run_at, created_at LIMIT ?",
+                    (PENDING, now) + type_args + (limit,),
+                ).fetchall()
+                for row in rows:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?"
+                        " WHERE id = ?",
+                        (RUNNING, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        jobs = [self._row_to_job(row) for row in rows]
+        for job in jobs:
+            job["attempts"] += 1
+            job["status"] = RUNNING
+        return jobs
+
+    def renew(self, job_ids):
+        """Lease heartbeat - a single process owns every job, so nothing to do"""
+        return len(job_ids)
+
+    def reap_expired_leases(self) -> int:
+        """No leases to expire; crashed jobs are handled by recover() at startup"""
+        return 0
+
+    def acquire_leadership(self, name) -> bool:
+        """A single process is always the leader"""
+        return True
+
+    def release_leadership(self, name):
+        pass
+
+    def complete(self, job_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (COMPLETED, time.time(), job_id),
+            )
+
+    def fail(self, job_id, error=None) -> str:
+        """Schedule a retry with backoff, or dead-letter after MAX_ATTEMPTS"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return DEAD
+
+            if row["attempts"] >= MAX_ATTEMPTS:
+                status, next_run_at = DEAD, now
+            else:
+                status, next_run_at = PENDING, now + backoff_delay(row["attempts"])
+
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, next_run_at = ?, last_error = ?, updated_at = ?"
+                " WHERE id = ?",
+                (status, next_run_at, error, now, job_id),
+            )
+            return status
+
+    def dead_letters(self, limit=100) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY updated_at DESC LIMIT ?",
+                (DEAD, limit),
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def purge_completed(self, older_than=7 * 24 * 3600) -> int:
+        """Drop old completed rows so the queue file doesn't grow forever"""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status = ? AND updated_at < ?",
+                (COMPLETED, time.time() - older_than),
+            )
+            return cur.rowcount
+
+
+class FirestoreJobQueue:
+    """
+    Job queue shared by several service replicas through a Firestore
+    collection. Claims are compare-and-set transactions that stamp the job
+    with this replica's id and a lease expiry; the owner renews the lease
+    while the job runs, and acks are ignored if the lease was lost.
+    """
+
+    def __init__(self, db=None, collection=JOB_COLLECTION, owner=None):
+        from firebase_admin import firestore
+        from firebase_client import get_db
+
+        self._firestore = firestore
+        self.db = db or get_db()
+        self.collection = self.db.collection(collection)
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.path = f"firestore:{collection}"
+
+    def _ref(self, job_id):
+        # Job ids contain '/' (election dates), which Firestore ids can't
+        return self.collection.document(hashlib.sha1(job_id.encode("utf-8")).hexdigest())
+
+    def _transact(self, fn):
+        """Run fn(transaction) in a retrying Firestore transaction"""
+        return self._firestore.transactional(fn)(self.db.transaction())
+
+    def recover(self) -> int:
+        """At startup only other replicas' dead jobs can be reclaimed"""
+        return self.reap_expired_leases()
+
+    def reap_expired_leases(self) -> int:
+        """Return jobs whose owner's lease expired (replica died) to the queue"""
+        now = time.time()
+        expired = self.collection\
+            .where("status", "==", RUNNING)\
+            .where("lease_expires_at", "<", now)\
+            .get()
+
+        recovered = 0
+        for snap in expired:
+            def release(transaction, ref=snap.reference):
+                current = ref.get(transaction=transaction)
+                data = current.to_dict() or {}
+                if data.get("status") != RUNNING or data.get("lease_expires_at", 0) >= now:
+                    return False
+                transaction.update(ref, {
+                    "status": PENDING,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "updated_at": now,
+                })
+                return True
+
+            if self._transact(release):
+                recovered += 1
+        return recovered
+
+    def acquire_leadership(self, name) -> bool:
+        """
+        Take or renew the named leadership lease. True while this replica
+        holds it; another replica can only take over once it has gone
+        LEADER_LEASE_SECONDS without a renewal.
+        """
+        ref = self.db.collection(LEADER_COLLECTION).document(name)
+
+        def take(transaction):
+            now = time.time()
+            data = ref.get(transaction=transaction).to_dict() or {}
+            if data.get("owner") not in (None, self.owner) and data.get("lease_expires_at", 0) >= now:
+                return False
+            transaction.set(ref, {
+                "owner": self.owner,
+                "lease_expires_at": now + LEADER_LEASE_SECONDS,
+                "acquired_at": data.get("acquired_at") if data.get("owner") == self.owner else now,
+            })
+            return True
+
+        return self._transact(take)
+
+    def release_leadership(self, name):
+        """Hand the lease back at shutdown so another replica takes over at once"""
+        ref = self.db.collection(LEADER_COLLECTION).document(name)
+
+        def release(transaction):
+            data = ref.get(transaction=transaction).to_dict() or {}
+            if data.get("owner") == self.owner:
+                transaction.update(ref, {"owner": None, "lease_expires_at": 0})
+
+        self._transact(release)
+
+    def enqueue(self, job_type, key, payload=None, priority=PRIORITY_NORMAL, force=False) -> bool:
+        """Same rules as JobQueue.enqueue, applied atomically in a transaction"""
+        job_id = job_id_for(job_type, key)
+        ref = self._ref(job_id)
+
+        def write(transaction):
+            now = time.time()
+            snap = ref.get(transaction=transaction)
+            data = snap.to_dict() if snap.exists else None
+
+            if data is None:
+                transaction.set(ref, {
+                    "id": job_id,
+                    "job_type": job_type,
+                    "job_key": key,
+                    "payload": payload or {},
+                    "priority": priority,
+                    "status": PENDING,
+                    "attempts": 0,
+                    "next_run_at": now,
+                    "last_error": None,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                return True
+
+            if data["status"] in (PENDING, RUNNING):
+                if priority < data["priority"]:
+                    transaction.update(ref, {"priority": priority, "updated_at": now})
+                return False
+            if data["status"] == DEAD and not force:
+                return False
+            if (data["status"] == COMPLETED and not force
+                    and now - data["updated_at"] < REQUEUE_COOLDOWN):
+                return False
+
+            transaction.update(ref, {
+                "status": PENDING,
+                "payload": payload if payload is not None else data.get("payload", {}),
+                "priority": priority,
+                "attempts": 0,
+                "next_run_at": now,
+                "last_error": None,
+                "updated_at": now,
+            })
+            return True
+
+        return self._transact(write)
+
+    def claim(self, limit=1, job_types=None) -> list:
+        """
+        Lease up to `limit` ready jobs (of the given types, if any), highest
+        priority lane first. Each candidate is re-checked inside a
+        transaction, so two replicas racing for the same job can't both win it.
+        """
+        claimed = []
+        for lane in (PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK):
+            if len(claimed) >= limit:
+                break
+
+            now = time.time()
+            query = self.collection\
+                .where("status", "==", PENDING)\
+                .where("priority", "==", lane)
+            if job_types:
+                query = query.where("job_type", "in", list(job_types))
+            candidates = query\
+                .where("next_run_at", "<=", now)\
+                .order_by("next_run_at")\
+                .limit(limit - len(claimed))\
+                .get()
+
+            for snap in candidates:
+                def take(transaction, ref=snap.reference):
+                    current = ref.get(transaction=transaction)
+                    data = current.to_dict() or {}
+                    if data.get("status") != PENDING:
+                        return None  # Another replica got there first
+                    data.update({
+                        "status": RUNNING,
+                        "attempts": data.get("attempts", 0) + 1,
+                        "lease_owner": self.owner,
+                        "lease_expires_at": time.time() + LEASE_SECONDS,
+                        "updated_at": time.time(),
+                    })
+                    transaction.update(ref, {k: data[k] for k in (
+                        "status", "attempts", "lease_owner", "lease_expires_at", "updated_at")})
+                    return data
+
+                job = self._transact(take)
+                if job:
+                    claimed.append(job)
+        return claimed
+
+    def renew(self, job_ids) -> int:
+        """Heartbeat: extend the lease on jobs this replica is still running"""
+        renewed = 0
+        for job_id in job_ids:
+            ref = self._ref(job_id)
+
+            def extend(transaction):
+                data = ref.get(transaction=transaction).to_dict() or {}
+                if data.get("status") != RUNNING or data.get("lease_owner") != self.owner:
+                    return False
+                transaction.update(ref, {"lease_expires_at": time.time() + LEASE_SECONDS})
+                return True
+
+            if self._transact(extend):
+                renewed += 1
+        return renewed
+
+    def _ack(self, job_id, build_update):
+        """Apply an ack only if this replica still holds the job's lease"""
+        ref = self._ref(job_id)
+
+        def write(transaction):
+            data = ref.get(transaction=transaction).to_dict() or {}
+            if data.get("status") != RUNNING or data.get("lease_owner") != self.owner:
+                print(f"  ⚠️  Lease on {job_id} was lost - result dropped")
+                return None
+            update = build_update(data)
+            update.update({"lease_owner": None, "lease_expires_at": None, "updated_at": time.time()})
+            transaction.update(ref, update)
+            return update["status"]
+
+        return self._transact(write)
+
+    def complete(self, job_id):
+        self._ack(job_id, lambda data: {"status": COMPLETED, "last_error": None})
+
+    def fail(self, job_id, error=None) -> str:
+        def update(data):
+            if data.get("attempts", 0) >= MAX_ATTEMPTS:
+                return {"status": DEAD, "last_error": error}
+            return {
+                "status": PENDING,
+                "next_run_at": time.time() + backoff_delay(data.get("attempts", 0)),
+                "last_error": error,
+            }
+
+        return self._ack(job_id, update) or PENDING
+
+    def dead_letters(self, limit=100) -> list:
+        docs = self.collection.where("status", "==", DEAD).limit(limit).get()
+        return [d.to_dict() for d in docs]
+
+    def stats(self) -> dict:
+        counts = {}
+        for status in (PENDING, RUNNING, COMPLETED, DEAD):
+            result = self.collection.where("status", "==", status).count().get()
+            counts[status] = result[0][0].value
+        return {k: v for k, v in counts.items() if v}
+
+    def purge_completed(self, older_than=7 * 24 * 3600) -> int:
+        old = self.collection\
+            .where("status", "==", COMPLETED)\
+            .where("updated_at", "<", time.time() - older_than)\
+            .limit(500)\
+            .get()
+        batch = self.db.batch()
+        for snap in old:
+            batch.delete(snap.reference)
+        batch.commit()
+        return len(old)
+
+
+def open_job_queue():
+    """The queue backend selected by SCRAPER_JOB_BACKEND"""
+    if JOB_BACKEND == "firestore":
+        return FirestoreJobQueue()
+    return JobQueue()
+
+
+if __name__ == "__main__":
+    import sys
+
+    queue = open_job_queue()
+    if len(sys.argv) > 1 and sys.argv[1] == "--dead":
+        for job in queue.dead_letters():
+            print(f"{job['id']}  attempts={job['attempts']}  error={job['last_error']}")
+    elif len(sys.argv) > 3 and sys.argv[1] == "--retry":
+        # python job_queue.py --retry voter_info <uid>
+        job_type, key = sys.argv[2], sys.argv[3]
+        print("Re-queued" if queue.enqueue(job_type, key, force=True) else "Already queued")
+    else:
+        print(f"Job queue {queue.path}: {queue.stats()}")
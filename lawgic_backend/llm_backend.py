@@ -0,0 +1,175 @@
+"""
+LLM Backends for Proposition Summaries
+Two backends share one interface - generate(prompt, json_output,
+max_output_tokens) returning an LLMResponse:
+  - GeminiBackend calls the Gemini API (needs GEMINI_API_KEY)
+  - StubBackend answers locally with canned, correctly formatted
+    summaries after a configurable delay, and fails a configurable share
+    of calls, so the summary pipeline can be run and benchmarked offline
+
+Answers, delays and injected failures are derived from the prompt (and
+how many times it has been sent), so a stub run is repeatable whatever
+order the worker threads reach it in.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+
+from llm_limiter import RateLimited, estimate_tokens
+
+# -------------------------
+# Config
+# -------------------------
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini")   # or "stub"
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+STUB_LATENCY = float(os.environ.get("LLM_STUB_LATENCY", "0.8"))       # Seconds per call
+STUB_JITTER = float(os.environ.get("LLM_STUB_JITTER", "0.3"))         # +/- seconds
+STUB_ERROR_RATE = float(os.environ.get("LLM_STUB_ERROR_RATE", "0"))   # Share of calls that fail
+STUB_RATE_LIMIT_RATE = float(os.environ.get("LLM_STUB_429_RATE", "0"))  # Share answered with a 429
+STUB_SECONDS_PER_1K_OUTPUT = 0.5  # Longer answers take longer, like the real API
+
+
+class LLMResponse:
+    def __init__(self, text, input_tokens=0, output_tokens=0):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+    def __repr__(self):
+        return f"LLMResponse({self.input_tokens} in, {self.output_tokens} out)"
+
+
+class GeminiBackend:
+    """Google Gemini through google.generativeai"""
+
+    def __init__(self, api_key=None, model_name=GEMINI_MODEL):
+        if api_key is None:
+            try:
+                from config_key import GEMINI_API_KEY as api_key
+            except ImportError:
+                api_key = None
+        if not api_key or api_key == 'YOUR_GEMINI_API_KEY_HERE':
+            raise RuntimeError(
+                "Gemini API key not found. Copy your key from lib/config/api_keys.dart "
+                "into config_key.py as GEMINI_API_KEY = 'your_key_here', "
+                "or set LLM_BACKEND=stub to run without one."
+            )
+
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, json_output=False, max_output_tokens=None):
+        config = {}
+        if json_output:
+            config["response_mime_type"] = "application/json"
+        if max_output_tokens:
+            config["max_output_tokens"] = max_output_tokens
+        response = self.model.generate_content(prompt, generation_config=config or None)
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            response.text,
+            getattr(usage, 'prompt_token_count', 0) if usage else 0,
+            getattr(usage, 'candidates_token_count', 0) if usage else 0,
+        )
+
+
+class StubBackend:
+    """
+    Local stand-in for the Gemini API. Recognizes the three prompt shapes
+    add_ai_summaries.py sends (single, packed JSON and chunk notes) and
+    answers each in the format its parser expects.
+    """
+
+    def __init__(self, latency=STUB_LATENCY, jitter=STUB_JITTER, error_rate=STUB_ERROR_RATE,
+                 rate_limit_rate=STUB_RATE_LIMIT_RATE, seed=0):
+        self.model_name = "stub"
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.calls = 0
+        self.errors = 0
+        self._seen = {}  # prompt digest -> times sent, so retries can succeed
+        self._lock = threading.Lock()
+
+    def _rng(self, prompt):
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        with self._lock:
+            self.calls += 1
+            attempt = self._seen[digest] = self._seen.get(digest, 0) + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def generate(self, prompt, json_output=False, max_output_tokens=None):
+        rng = self._rng(prompt)
+        roll = rng.random()
+
+        if json_output:
+            text = self._batch_answer(prompt)
+        elif "Below is part" in prompt:
+            text = self._chunk_answer(prompt, rng)
+        else:
+            text = self._summary_answer(prompt)
+        output_tokens = estimate_tokens(text)
+        if max_output_tokens:
+            output_tokens = min(output_tokens, max_output_tokens)
+
+        delay = self.latency + rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, delay + output_tokens / 1000 * STUB_SECONDS_PER_1K_OUTPUT))
+
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.errors += 1
+            raise RateLimited("429 stub quota exceeded")
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise RuntimeError("500 stub backend error")
+        return LLMResponse(text, estimate_tokens(prompt), output_tokens)
+
+    @staticmethod
+    def _title(prompt):
+        match = re.search(r'^Proposition Title: (.*)$', prompt, re.MULTILINE)
+        return match.group(1).strip() if match else "this proposition"
+
+    @classmethod
+    def _fields(cls, title):
+        return {
+            "summary": f"{title} would change local law as described in its text. "
+                       f"It affects residents of the parish.",
+            "key_points": [f"{title} takes effect if approved",
+                           "It applies parish-wide",
+                           "It changes how the affected funds are used"],
+            "yes_vote": f"A yes vote approves {title}.",
+            "no_vote": f"A no vote rejects {title} and keeps current law.",
+        }
+
+    def _summary_answer(self, prompt):
+        fields = self._fields(self._title(prompt))
+        points = "\n".join(f"- {point}" for point in fields["key_points"])
+        return (f"SUMMARY:\n{fields['summary']}\n\nKEY POINTS:\n{points}\n\n"
+                f"YES VOTE:\n{fields['yes_vote']}\n\nNO VOTE:\n{fields['no_vote']}")
+
+    def _batch_answer(self, prompt):
+        answer = {}
+        for item_id, title in re.findall(r'^\[(\w+)\]\nProposition Title: (.*)$', prompt, re.MULTILINE):
+            answer[item_id] = self._fields(title.strip())
+        return json.dumps(answer)
+
+    def _chunk_answer(self, prompt, rng):
+        return "\n".join(f"- Provision {i + 1} of this part" for i in range(rng.randint(3, 6)))
+
+
+def open_llm_backend():
+    """The backend selected by LLM_BACKEND"""
+    if LLM_BACKEND == "stub":
+        return StubBackend()
+    return GeminiBackend()
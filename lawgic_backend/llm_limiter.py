@@ -0,0 +1,125 @@
+"""
+LLM Quota Limiter
+Token buckets for requests-per-minute and tokens-per-minute, shared by
+every summary worker in the process. Rates drop when the API answers 429
+and climb back toward the configured quota as calls succeed.
+"""
+
+import os
+import re
+import threading
+import time
+
+# -------------------------
+# Config
+# -------------------------
+LLM_RPM = float(os.environ.get("LLM_RPM", "15"))          # Requests per minute
+LLM_TPM = float(os.environ.get("LLM_TPM", "1000000"))     # Tokens per minute
+BURST_SECONDS = 10       # Buckets hold this many seconds' worth of quota
+MIN_RATE_FRACTION = 0.1  # Never throttle below this share of the quota
+RECOVERY_STEP = 0.05     # Share of the quota regained per successful call
+
+# A 429 status in an error message, not just any "429" (ids, byte counts)
+RATE_LIMIT_MESSAGE = re.compile(
+    r"\b(?:HTTP|status|code)\W*429\b"
+    r"|\b429\W+(?:Too Many Requests|RESOURCE.EXHAUSTED|Resource has been exhausted)",
+    re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting"""
+    return max(1, len(text or "") // 4)
+
+
+class RateLimited(Exception):
+    """The API refused the call for quota reasons (HTTP 429)"""
+
+    def __init__(self, message="rate limited", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    if isinstance(error, RateLimited):
+        return True
+    code = getattr(error, "code", None)
+    status = getattr(error, "status_code", None)
+    return (code == 429 or status == 429 or type(error).__name__ == "ResourceExhausted"
+            or RATE_LIMIT_MESSAGE.search(str(error)) is not None)
+
+
+class _Bucket:
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.rate = per_minute  # Current (adaptive) rate
+        self.level = self.capacity
+        self.updated = time.time()
+
+    @property
+    def capacity(self):
+        return max(1.0, self.rate * BURST_SECONDS / 60)
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate / 60)
+        self.updated = now
+
+    def wait_for(self, amount):
+        """Seconds until `amount` is available (0 if it already is)"""
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing * 60 / self.rate
+
+
+class LLMRateLimiter:
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        """Block until one request and `tokens` tokens fit in the quota"""
+        while True:
+            with self._lock:
+                now = time.time()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                # A request bigger than the whole bucket waits for a full bucket
+                tokens_needed = min(tokens, self.tokens.capacity)
+                wait = max(self.paused_until - now,
+                           self.requests.wait_for(1),
+                           self.tokens.wait_for(tokens_needed))
+                if wait <= 0:
+                    self.requests.level -= 1
+                    self.tokens.level -= tokens
+                    return
+            time.sleep(min(wait, 5.0))
+
+    def record_usage(self, estimated: int, actual: int):
+        """Correct the token bucket once the real usage is known"""
+        if actual:
+            with self._lock:
+                self.tokens.level -= actual - estimated
+
+    def on_success(self):
+        with self._lock:
+            for bucket in (self.requests, self.tokens):
+                bucket.rate = min(bucket.per_minute, bucket.rate + bucket.per_minute * RECOVERY_STEP)
+
+    def on_rate_limited(self, retry_after=None):
+        """Halve both rates and pause everyone briefly"""
+        with self._lock:
+            self.throttled += 1
+            for bucket in (self.requests, self.tokens):
+                bucket.rate = max(bucket.per_minute * MIN_RATE_FRACTION, bucket.rate / 2)
+                bucket.level = min(bucket.level, 0.0)
+            pause = retry_after if retry_after else 60 / self.requests.rate
+            self.paused_until = max(self.paused_until, time.time() + pause)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rpm": round(self.requests.rate, 1),
+                "tpm": round(self.tokens.rate),
+                "throttled": self.throttled,
+            }
@@ -0,0 +1,113 @@
+"""
+Louisiana Parish Registry
+Single source for parish names and SOS codes. Everything that stores or
+compares a parish uses the canonical "NAME - CODE" form the SOS portal's
+parish dropdown shows, e.g. "EAST BATON ROUGE - 17".
+
+Lookups go through an alias index built once at import, so spelling
+variants ("Saint Tammany", "DeSoto", "LaSalle", "East Baton Rouge
+Parish", "17") resolve with a single dict lookup.
+"""
+
+import re
+from typing import Optional
+
+PARISH_CODES = {
+    'ACADIA': '01', 'ALLEN': '02', 'ASCENSION': '03', 'ASSUMPTION': '04',
+    'AVOYELLES': '05', 'BEAUREGARD': '06', 'BIENVILLE': '07', 'BOSSIER': '08',
+    'CADDO': '09', 'CALCASIEU': '10', 'CALDWELL': '11', 'CAMERON': '12',
+    'CATAHOULA': '13', 'CLAIBORNE': '14', 'CONCORDIA': '15', 'DE SOTO': '16',
+    'EAST BATON ROUGE': '17', 'EAST CARROLL': '18', 'EAST FELICIANA': '19',
+    'EVANGELINE': '20', 'FRANKLIN': '21', 'GRANT': '22', 'IBERIA': '23',
+    'IBERVILLE': '24', 'JACKSON': '25', 'JEFFERSON': '26', 'JEFFERSON DAVIS': '27',
+    'LAFAYETTE': '28', 'LAFOURCHE': '29', 'LA SALLE': '30', 'LINCOLN': '31',
+    'LIVINGSTON': '32', 'MADISON': '33', 'MOREHOUSE': '34', 'NATCHITOCHES': '35',
+    'ORLEANS': '36', 'OUACHITA': '37', 'PLAQUEMINES': '38', 'POINTE COUPEE': '39',
+    'RAPIDES': '40', 'RED RIVER': '41', 'RICHLAND': '42', 'SABINE': '43',
+    'ST. BERNARD': '44', 'ST. CHARLES': '45', 'ST. HELENA': '46', 'ST. JAMES': '47',
+    'ST. JOHN THE BAPTIST': '48', 'ST. LANDRY': '49', 'ST. MARTIN': '50',
+    'ST. MARY': '51', 'ST. TAMMANY': '52', 'TANGIPAHOA': '53', 'TENSAS': '54',
+    'TERREBONNE': '55', 'UNION': '56', 'VERMILION': '57', 'VERNON': '58',
+    'WASHINGTON': '59', 'WEBSTER': '60', 'WEST BATON ROUGE': '61',
+    'WEST CARROLL': '62', 'WEST FELICIANA': '63', 'WINN': '64',
+}
+
+CODE_TO_NAME = {code: name for name, code in PARISH_CODES.items()}
+
+# Common names that don't normalize to the official one on their own
+EXTRA_ALIASES = {
+    'EBR': 'EAST BATON ROUGE',
+    'WBR': 'WEST BATON ROUGE',
+    'BATON ROUGE': 'EAST BATON ROUGE',
+    'NEW ORLEANS': 'ORLEANS',
+    'ST JOHN': 'ST. JOHN THE BAPTIST',
+    'VERMILLION': 'VERMILION',
+    'POINT COUPEE': 'POINTE COUPEE',
+    'JEFF DAVIS': 'JEFFERSON DAVIS',
+}
+
+# Per-word rewrites applied before the words are joined into a key
+_WORD_MAP = {'SAINT': 'ST', 'STE': 'ST', 'E': 'EAST', 'W': 'WEST'}
+_DROP_WORDS = {'PARISH', 'OF'}
+
+
+def _key(text: str) -> str:
+    """
+    Spelling-insensitive lookup key: case, punctuation, spacing, "Saint"
+    vs "St." and a "Parish" suffix all fold away, so "St. Tammany Parish"
+    and "SAINT TAMMANY" share the key "STTAMMANY".
+    """
+    words = re.findall(r'[A-Z0-9]+', text.upper())
+    return ''.join(_WORD_MAP.get(w, w) for w in words if w not in _DROP_WORDS)
+
+
+def _build_index() -> dict:
+    index = {}
+    for name in PARISH_CODES:
+        index[_key(name)] = name
+    for alias, name in EXTRA_ALIASES.items():
+        index[_key(alias)] = name
+    return index
+
+
+_ALIAS_INDEX = _build_index()
+
+
+def _resolve_name(text: str) -> Optional[str]:
+    text = text.strip()
+    if text.isdigit():
+        return CODE_TO_NAME.get(text.zfill(2))
+    return _ALIAS_INDEX.get(_key(text))
+
+
+def parish_name(parish: str) -> Optional[str]:
+    """Official parish name for any variant or code, e.g. "desoto" -> "DE SOTO" """
+    if not parish:
+        return None
+    # "NAME - CODE" (or "CODE - NAME"): trust whichever part resolves, name first
+    parts = [p for p in parish.split(' - ') if p.strip()]
+    for part in sorted(parts, key=lambda p: p.strip().isdigit()):
+        name = _resolve_name(part)
+        if name:
+            return name
+    return None
+
+
+def parish_code(parish: str) -> Optional[str]:
+    """Two-digit SOS code for any variant, e.g. "Saint Tammany" -> "52" """
+    name = parish_name(parish)
+    return PARISH_CODES[name] if name else None
+
+
+def canonical_parish(parish: str) -> Optional[str]:
+    """
+    "East Baton Rouge" or "EAST BATON ROUGE - 17" -> "EAST BATON ROUGE - 17".
+    Returns None if the name isn't a known parish.
+    """
+    name = parish_name(parish)
+    return f"{name} - {PARISH_CODES[name]}" if name else None
+
+
+def display_parish(name: str) -> str:
+    """"ST. JOHN THE BAPTIST" -> "St. John The Baptist", as the portal's results page shows it"""
+    return " ".join(word.capitalize() for word in name.split())
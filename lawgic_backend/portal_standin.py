@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Offline Stand-in for the Louisiana SOS Voter Portal
+Serves the pages the scrapers read, in the shape they expect:
+
+  /Home/VoterLogin                      login form; POST renders the results
+                                        page (or an alert-danger error)
+  /Voting/Index/ElectionDayVoting?uid=  polling place for a voter
+  /PropositionText                      election + parish dropdowns; each
+                                        change posts the form back, and the
+                                        parish postback lists the propositions
+  /PropositionText/PropositionText/Detail?referendumId=N
+                                        proposition text, with ETag /
+                                        Last-Modified and 304s
+
+with configurable latency, jitter and injected 503/429 errors. Point the
+scrapers at it with SOS_BASE_URL:
+
+    python portal_standin.py --port 8099 --latency 0.2 --jitter 0.1 --error-rate 0.02
+    SOS_BASE_URL=http://localhost:8099 SOS_MIN_INTERVAL=0 python fetch_voter_info.py ...
+
+Voters: the built-in fixture voter (ASHTYN ROBERTS, 70817, 07/2003) plus
+any last name of the form VOTER<digits>, which always resolves to the same
+synthetic registration, so load tests can ask for as many unique voters as
+they like. --fixtures adds voters, elections and propositions from a JSON
+file (same keys as DEFAULT_FIXTURES).
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from parish_registry import PARISH_CODES, display_parish
+
+# -------------------------
+# Config
+# -------------------------
+DEFAULT_PORT = 8099
+LAST_MODIFIED = "Mon, 01 Sep 2025 00:00:00 GMT"
+PROPOSITIONS_PER_PARISH = (0, 4)   # Synthetic propositions per parish and election
+LONG_TEXT_SHARE = 0.1              # Share of synthetic propositions with long texts
+NO_RECORD_ERROR = "No voter record was found matching the information entered."
+
+DEFAULT_FIXTURES = {
+    "elections": ["11/15/2025", "12/13/2025"],
+    # (FIRST, LAST, ZIP, MM/YYYY) -> registration
+    "voters": [
+        {
+            "first_name": "ASHTYN", "last_name": "ROBERTS", "zip_code": "70817",
+            "birth": "07/2003", "name": "Ashtyn Elizabeth Roberts", "parish": "EAST BATON ROUGE",
+            "ward_precinct": "03/016", "status": "Active", "party": "No Party",
+            "location_name": "SHENANDOAH ELEMENTARY SCHOOL",
+            "location_address": "16555 APPOMATTOX AVE", "location_city": "BATON ROUGE, LA 70817",
+        },
+    ],
+    # Extra propositions: {"election_date", "parish", "title", "text"}
+    "propositions": [],
+}
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class PortalFixtures:
+    """Voters, elections and propositions the stand-in serves"""
+
+    def __init__(self, fixtures=None, seed=0):
+        fixtures = fixtures or {}
+        self.elections = fixtures.get("elections") or DEFAULT_FIXTURES["elections"]
+        self.voters = {}
+        for voter in DEFAULT_FIXTURES["voters"] + fixtures.get("voters", []):
+            key = (voter["first_name"].upper(), voter["last_name"].upper(), voter["zip_code"], voter["birth"])
+            self.voters[key] = voter
+
+        # referendumId -> proposition, and (election, parish) -> [referendumId]
+        self.propositions = {}
+        self.by_parish = {}
+        rng = random.Random(seed)
+        for election_date in self.elections:
+            for parish in PARISH_CODES:
+                for i in range(rng.randint(*PROPOSITIONS_PER_PARISH)):
+                    self._add(election_date, parish, *self._synthetic(parish, election_date, i, rng))
+        for prop in fixtures.get("propositions", []):
+            self._add(prop["election_date"], prop["parish"].upper(), prop["title"], prop["text"])
+
+    def _add(self, election_date, parish, title, text):
+        referendum_id = len(self.propositions) + 1
+        self.propositions[referendum_id] = {
+            "election_date": election_date, "parish": parish, "title": title, "text": text,
+            "etag": f'"{_digest(title, text)[:16]}"',
+        }
+        self.by_parish.setdefault((election_date, parish), []).append(referendum_id)
+
+    @staticmethod
+    def _synthetic(parish, election_date, index, rng):
+        mills = rng.randint(1, 20)
+        years = rng.choice([5, 10, 15])
+        purpose = rng.choice(["road maintenance", "fire protection", "public schools",
+                              "drainage improvements", "library services"])
+        title = f"Proposition No. {index + 1} of {display_parish(parish)} Parish - {purpose.title()} Tax"
+        paragraph = (f"Shall {display_parish(parish)} Parish levy a {mills} mills tax on all property "
+                     f"subject to taxation in the parish for a period of {years} years, beginning with "
+                     f"the year {election_date[-4:]}, for the purpose of {purpose}?")
+        if rng.random() < LONG_TEXT_SHARE:
+            sections = [f"Section {n}. {paragraph} The proceeds shall be dedicated and used "
+                        f"solely for {purpose}, including salaries, equipment and capital "
+                        f"improvements." for n in range(1, 41)]
+            return title, "\n\n".join(sections)
+        return title, paragraph
+
+    def find_voter(self, first_name, last_name, zip_code, birth):
+        key = (first_name.strip().upper(), last_name.strip().upper(), zip_code.strip(), birth.strip())
+        if key in self.voters:
+            return self.voters[key]
+        if re.fullmatch(r"VOTER\d+", key[1]) and re.fullmatch(r"\d{5}", key[2]):
+            # Synthetic voter: same inputs, same registration, every time
+            h = int(_digest(*key), 16)
+            parishes = sorted(PARISH_CODES)
+            parish = parishes[h % len(parishes)]
+            return {
+                "name": f"{key[0].capitalize()} Voter", "parish": parish,
+                "ward_precinct": f"{h % 9 + 1:02d}/{h % 97 + 1:02d}", "status": "Active",
+                "party": ["Democrat", "Republican", "No Party"][h % 3],
+                "location_name": f"{parish} COMMUNITY CENTER {h % 50 + 1}",
+                "location_address": f"{h % 9000 + 100} MAIN ST",
+                "location_city": f"{parish.title()}, LA {key[2]}",
+            }
+        return None
+
+    def voter_uid(self, voter) -> str:
+        d = _digest(voter["name"], voter["parish"], voter["ward_precinct"])
+        return f"{d[:8]}-{d[8:12]}-{d[12:16]}-{d[16:20]}-{d[20:32]}"
+
+
+class PortalStandIn:
+    """Page rendering, fault injection and request stats for one server"""
+
+    def __init__(self, fixtures=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=0):
+        self.fixtures = fixtures if isinstance(fixtures, PortalFixtures) else PortalFixtures(fixtures, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._uids = {}  # uid -> voter, for the polling-place page
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "not_modified": 0, "by_path": {}}
+
+    # -------------------------
+    # Fault injection
+    # -------------------------
+    def inject(self, path):
+        """Sleep for the configured latency; returns an error status to send, if any"""
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["by_path"][path] = self.stats["by_path"].get(path, 0) + 1
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            roll = self._rng.random()
+        time.sleep(max(0.0, delay))
+
+        with self._lock:
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return 503
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    # -------------------------
+    # Pages
+    # -------------------------
+    @staticmethod
+    def page(title, body):
+        return (f"<!DOCTYPE html><html><head><title>{escape(title)}</title></head>"
+                f"<body><div id=\"MainContent\">{body}</div></body></html>")
+
+    def login_page(self, error=None):
+        alert = f'<div class="alert alert-danger">{escape(error)}</div>' if error else ""
+        return self.page("Voter Portal - Login", f"""
+<h1>Search by Voter</h1>{alert}
+<form method="post" action="/Home/VoterLogin">
+  <input type="text" name="FirstName" id="FirstName">
+  <input type="text" name="LastName" id="LastName">
+  <input type="text" name="ZipCode" id="ZipCode">
+  <input type="text" name="MonthYear" id="MonthYear" placeholder="MM/YYYY">
+  <button type="submit">Login</button>
+</form>""")
+
+    def results_page(self, form):
+        voter = self.fixtures.find_voter(form.get("FirstName", ""), form.get("LastName", ""),
+                                         form.get("ZipCode", ""), form.get("MonthYear", ""))
+        if voter is None:
+            return self.login_page(NO_RECORD_ERROR)
+        uid = self.fixtures.voter_uid(voter)
+        with self._lock:
+            self._uids[uid] = voter
+        # Same layout as the real results page: one summary line, then links
+        return self.page("Voter Portal - Home", f"""
+<div class="voter-summary">
+  <span><b>Name:</b> {escape(voter['name'])}</span>
+  <span><b>Party:</b> {escape(voter['party'])}</span>
+  <span><b>Parish:</b> {escape(display_parish(voter['parish']))}</span>
+  <span><b>Ward/Precinct:</b> {escape(voter['ward_precinct'])}</span>
+  <span><b>Status:</b> {escape(voter['status'])}</span>
+</div>
+<h3>Quick Links</h3>
+<ul>
+  <li><a href="/Voting/Index/EarlyVoting?uid={uid}">My Early Voting Location</a></li>
+  <li><a href="/Voting/Index/ElectionDayVoting?uid={uid}">My Election Day Voting Location</a></li>
+  <li><a href="/Voting/Index/SampleBallot?uid={uid}">My Sample Ballot</a></li>
+</ul>
+<p>Copyright &copy; 2025 Louisiana Department of State.</p>""")
+
+    def location_page(self, uid):
+        with self._lock:
+            voter = self._uids.get(uid)
+        if voter is None:
+            return None
+        return self.page("Election Day Voting", f"""
+<h2>ELECTION DAY VOTING</h2>
+<div>Your polling place is open from 7:00 a.m. to 8:00 p.m. on election day.</div>
+<p><strong>{escape(voter['location_name'])}</strong><br>
+{escape(voter['location_address'])}<br>
+{escape(voter['location_city'])}</p>""")
+
+    def proposition_list_page(self, form):
+        election_date = form.get("ddlElection", "")
+        parish_option = form.get("ddlParish", "")
+        if election_date not in self.fixtures.elections:
+            election_date, parish_option = "", ""
+
+        election_options = ['<option value="">-- Select Election --</option>'] + [
+            f'<option value="{escape(e)}"{" selected" if e == election_date else ""}>{escape(e)}</option>'
+            for e in self.fixtures.elections
+        ]
+        parish_options = ['<option value="">-- Select Parish --</option>']
+        if election_date:
+            # The parish list only exists after the election postback
+            for name, code in PARISH_CODES.items():
+                text = f"{name} - {code}"
+                selected = " selected" if text == parish_option else ""
+                parish_options.append(f'<option value="{escape(text)}"{selected}>{escape(text)}</option>')
+
+        links = ""
+        if election_date and parish_option:
+            parish = parish_option.rsplit(" - ", 1)[0]
+            ids = self.fixtures.by_parish.get((election_date, parish), [])
+            items = "".join(
+                f'<li><a href="/PropositionText/PropositionText/Detail?referendumId={rid}">'
+                f'{escape(self.fixtures.propositions[rid]["title"])}</a></li>'
+                for rid in ids
+            )
+            links = f"<ul>{items}</ul>" if ids else "<p>No propositions for this parish.</p>"
+
+        return self.page("Proposition Text", f"""
+<h1>Proposition Text</h1>
+<form method="post" action="/PropositionText">
+  <select id="MainContent_ddlElection" name="ddlElection" onchange="this.form.submit()">
+    {''.join(election_options)}
+  </select>
+  <select id="MainContent_ddlParish" name="ddlParish" onchange="this.form.submit()">
+    {''.join(parish_options)}
+  </select>
+</form>
+{links}""")
+
+    def proposition_page(self, referendum_id):
+        prop = self.fixtures.propositions.get(referendum_id)
+        if prop is None:
+            return None, None
+        paragraphs = "".join(f"<p>{escape(p)}</p>" for p in prop["text"].split("\n\n"))
+        body = f"""
+<a href="/PropositionText">Back to Proposition List</a>
+<div id="MainContent_ContentPlaceHolder1">
+<h2>{escape(prop['title'])}</h2>
+{paragraphs}
+</div>"""
+        return self.page(prop["title"], body), prop["etag"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PortalStandIn/1.0"
+
+    def log_message(self, format, *args):
+        pass  # Quiet - benchmarks push thousands of requests through here
+
+    @property
+    def portal(self) -> PortalStandIn:
+        return self.server.portal
+
+    def _send(self, status, body="", content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        return {k: v[0] for k, v in parse_qs(raw, keep_blank_values=True).items()}
+
+    def _route(self, form=None):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/") or "/"
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if path == "/__stats":
+            return self._send(200, json.dumps(self.portal.snapshot()), "application/json")
+
+        status = self.portal.inject(path)
+        if status == 429:
+            return self._send(429, "Too Many Requests", "text/plain", {"Retry-After": "1"})
+        if status:
+            return self._send(status, "Service Unavailable", "text/plain")
+
+        if path == "/Home/VoterLogin":
+            html = self.portal.results_page(form) if form is not None else self.portal.login_page()
+            return self._send(200, html)
+        if path == "/Voting/Index/ElectionDayVoting":
+            html = self.portal.location_page(query.get("uid", ""))
+            return self._send(200, html) if html else self._send(404, "Not Found", "text/plain")
+        if path == "/PropositionText":
+            return self._send(200, self.portal.proposition_list_page(form or {}))
+        if path == "/PropositionText/PropositionText/Detail":
+            try:
+                referendum_id = int(query.get("referendumId", ""))
+            except ValueError:
+                referendum_id = None
+            html, etag = self.portal.proposition_page(referendum_id)
+            if html is None:
+                return self._send(404, "Not Found", "text/plain")
+            validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+            if self.headers.get("If-None-Match") == etag:
+                with self.portal._lock:
+                    self.portal.stats["not_modified"] += 1
+                return self._send(304, "", headers=validators)
+            return self._send(200, html, headers=validators)
+        return self._send(404, "Not Found", "text/plain")
+
+    def do_GET(self):
+        self._route()
+
+    def do_HEAD(self):
+        self._route()
+
+    def do_POST(self):
+        self._route(self._form())
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, portal: PortalStandIn, host="127.0.0.1", port=DEFAULT_PORT):
+        super().__init__((host, port), _Handler)
+        self.portal = portal
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_standin(port=0, host="127.0.0.1", **options) -> StandInServer:
+    """
+    Run a stand-in on a background thread (port 0 picks a free port).
+    options are PortalStandIn's; call .shutdown() when done.
+    """
+    server = StandInServer(PortalStandIn(**options), host, port)
+    thread = threading.Thread(target=server.serve_forever, name="portal-standin", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the SOS voter portal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share answered 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="JSON file with extra voters/elections/propositions")
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            fixtures = json.load(f)
+
+    portal = PortalStandIn(fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    server = StandInServer(portal, args.host, args.port)
+    print(f"SOS portal stand-in on {server.base_url} "
+          f"({len(portal.fixtures.propositions)} propositions, {len(portal.fixtures.elections)} elections)")
+    print(f"  export SOS_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nServed {portal.snapshot()['requests']} requests")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Incremental Proposition Re-scrape Scheduler
+Re-checks each (election, parish) proposition list on a cadence that
+tightens as election day approaches, and only fetches/writes detail pages
+whose link set or content actually changed
+"""
+
+import sys
+import time
+import hashlib
+from datetime import datetime, timedelta
+
+from firebase_admin import firestore
+
+from scraper_voting import (
+    db,
+    get_driver,
+    get_parish_code_from_name,
+    get_proposition_links,
+    fetch_proposition_page,
+    save_proposition,
+    sanitize_id,
+    record_parish_coverage,
+)
+
+# -------------------------
+# Config
+# -------------------------
+STATE_COLLECTION = "proposition_scrape_state"
+POLL_INTERVAL = 300  # How often the standalone loop looks for due checks
+
+# (days until election, re-check interval) - first matching row wins
+CHECK_CADENCE = [
+    (30, timedelta(days=7)),
+    (7, timedelta(days=1)),
+    (1, timedelta(hours=6)),
+    (0, timedelta(hours=1)),
+]
+
+# Re-fetch every detail page (with conditional GET) on every Nth check even
+# if the link set is unchanged, to catch in-place text edits
+FULL_VERIFY_EVERY = 4
+
+
+def parse_election_date(election_date: str) -> datetime:
+    """Parse the dropdown's MM/DD/YYYY election date"""
+    return datetime.strptime(election_date.strip(), "%m/%d/%Y")
+
+
+def check_interval_for(election_date: str, now: datetime = None):
+    """
+    How long to wait before the next check of this election's propositions.
+    Returns None once the election is over (stop checking).
+    """
+    now = now or datetime.utcnow()
+    days_left = (parse_election_date(election_date).date() - now.date()).days
+
+    if days_left < 0:
+        return None
+
+    for min_days, interval in CHECK_CADENCE:
+        if days_left >= min_days:
+            return interval
+    return CHECK_CADENCE[-1][1]
+
+
+def link_set_hash(links) -> str:
+    """Order-independent hash of a proposition link list"""
+    joined = "\n".join(sorted(f"{txt}\t{href}" for txt, href in links))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def state_doc_id(parish_name: str, election_date: str) -> str:
+    return sanitize_id(f"{parish_name}_{election_date}")
+
+
+def page_key(href: str) -> str:
+    """Firestore map keys can't contain '/' or '.', so hash the href"""
+    return hashlib.sha1(href.encode("utf-8")).hexdigest()
+
+
+def track_parish(parish_name: str, election_date: str, pages: dict = None):
+    """
+    Start tracking an (election, parish) pair. If `pages` returned by
+    scrape_parish_for_election is given, it becomes the baseline so the
+    first scheduled check doesn't re-fetch everything.
+    """
+    if ' - ' not in parish_name:
+        parish_name = get_parish_code_from_name(parish_name)
+
+    state_ref = db.collection(STATE_COLLECTION).document(state_doc_id(parish_name, election_date))
+    if state_ref.get().exists and pages is None:
+        return
+
+    data = {
+        "parish": parish_name,
+        "election_date": election_date,
+        "next_check_at": datetime.utcnow(),
+    }
+
+    if pages is not None:
+        now = datetime.utcnow()
+        interval = check_interval_for(election_date, now)
+        data.update({
+            "link_set_hash": link_set_hash((p["link_text"], href) for href, p in pages.items()),
+            "pages": {page_key(href): dict(p, href=href) for href, p in pages.items()},
+            "checks": 0,
+            "last_checked_at": now,
+            "last_changed_at": now,
+            "next_check_at": now + interval if interval else None,
+        })
+
+    state_ref.set(data, merge=True)
+    print(f"[SCHED] Tracking {parish_name} / {election_date}")
+
+
+def seed_from_existing_propositions() -> int:
+    """
+    Track every (election, parish) pair that already has propositions, and
+    backfill the parish coverage index for them
+    """
+    pairs = {}
+    props = db.collection("ballot_propositions").select(["parish", "election_date"]).stream()
+    for prop in props:
+        data = prop.to_dict()
+        if data.get("parish") and data.get("election_date"):
+            pair = (data["parish"], data["election_date"])
+            pairs[pair] = pairs.get(pair, 0) + 1
+
+    for (parish_name, election_date), count in sorted(pairs.items()):
+        record_parish_coverage(parish_name, election_date, count)
+        if check_interval_for(election_date) is not None:
+            track_parish(parish_name, election_date)
+    return len(pairs)
+
+
+def recheck_parish(parish_name: str, election_date: str, driver=None) -> dict:
+    """
+    Re-check one (election, parish) pair against its stored state.
+
+    The link list is always read (one page load). Detail pages are fetched
+    only for new links, or for every link on a periodic full verification
+    pass, and are written to Firestore only when their content hash changed.
+    Returns counts of what was fetched/written.
+    """
+    stats = {"fetched": 0, "written": 0, "removed": 0, "changed": False}
+
+    state_ref = db.collection(STATE_COLLECTION).document(state_doc_id(parish_name, election_date))
+    state_doc = state_ref.get()
+    state = state_doc.to_dict() if state_doc.exists else {}
+    pages = dict(state.get("pages", {}))
+    checks = state.get("checks", 0) + 1
+
+    own_driver = driver is None
+    if own_driver:
+        driver = get_driver()
+
+    try:
+        links = get_proposition_links(driver, parish_name, election_date)
+        if links is None:
+            # The portal no longer lists this election (or parish for it).
+            # Stop tracking instead of diffing against nothing, which would
+            # delete every stored proposition as withdrawn.
+            print(f"[SCHED] {parish_name} / {election_date} is no longer listed - untracking")
+            state_ref.set({
+                "parish": parish_name,
+                "election_date": election_date,
+                "next_check_at": None,
+                "untracked_at": datetime.utcnow(),
+                "untracked_reason": "not listed on the portal",
+            }, merge=True)
+            stats["untracked"] = True
+            return stats
+
+        new_link_hash = link_set_hash(links)
+        links_changed = new_link_hash != state.get("link_set_hash")
+        full_verify = not pages or checks % FULL_VERIFY_EVERY == 0
+
+        current_keys = set()
+        for txt, href in links:
+            key = page_key(href)
+            current_keys.add(key)
+            known = pages.get(key)
+
+            if known and not full_verify:
+                continue
+
+            headers = {}
+            validators = (known or {}).get("validators", {})
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+            page = fetch_proposition_page(driver, txt, href, headers=headers)
+            stats["fetched"] += 1
+            if page is None:
+                continue  # 304 Not Modified
+
+            if known and known.get("content_hash") == page["content_hash"]:
+                pages[key]["validators"] = page["validators"]
+                continue
+
+            doc_id = save_proposition(parish_name, election_date, page)
+            if known and known.get("doc_id") and known["doc_id"] != doc_id:
+                # Title changed, so the doc id did too - drop the stale copy
+                db.collection("ballot_propositions").document(known["doc_id"]).delete()
+            pages[key] = {
+                "href": href,
+                "link_text": txt,
+                "doc_id": doc_id,
+                "title": page["title"],
+                "content_hash": page["content_hash"],
+                "validators": page["validators"],
+            }
+            stats["written"] += 1
+
+        # Propositions that disappeared from the list were withdrawn
+        for key in list(pages):
+            if key not in current_keys:
+                doc_id = pages.pop(key).get("doc_id")
+                if doc_id:
+                    db.collection("ballot_propositions").document(doc_id).delete()
+                stats["removed"] += 1
+
+        now = datetime.utcnow()
+        stats["changed"] = links_changed or stats["written"] > 0 or stats["removed"] > 0
+        interval = check_interval_for(election_date, now)
+
+        update = {
+            "parish": parish_name,
+            "election_date": election_date,
+            "link_set_hash": new_link_hash,
+            "pages": pages,
+            "checks": checks,
+            "last_checked_at": now,
+            "next_check_at": now + interval if interval else None,
+            "last_changed_at": now if stats["changed"] else state.get("last_changed_at"),
+        }
+        # Overwrite (no merge) so removed page keys don't linger in the map
+        state_ref.set(update)
+        if stats["changed"]:
+            record_parish_coverage(parish_name, election_date, len(pages))
+
+        print(f"[SCHED] {parish_name} / {election_date}: "
+              f"{len(links)} links, fetched {stats['fetched']}, "
+              f"wrote {stats['written']}, removed {stats['removed']}")
+        return stats
+
+    finally:
+        if own_driver:
+            driver.quit()
+
+
+def due_pairs(limit: int = 20) -> list:
+    """(parish, election_date) for tracked pairs whose next_check_at has passed"""
+    due = db.collection(STATE_COLLECTION)\
+        .where("next_check_at", "<=", datetime.utcnow())\
+        .order_by("next_check_at")\
+        .limit(limit)\
+        .get()
+    return [(d.to_dict()["parish"], d.to_dict()["election_date"]) for d in due]
+
+
+def recheck_or_defer(parish_name: str, election_date: str, driver=None) -> dict:
+    """
+    recheck_parish, but on an error push the pair's next check back an hour
+    (so one broken page doesn't keep coming up as due) before re-raising
+    """
+    try:
+        return recheck_parish(parish_name, election_date, driver=driver)
+    except Exception as e:
+        db.collection(STATE_COLLECTION).document(state_doc_id(parish_name, election_date)).update({
+            "next_check_at": datetime.utcnow() + timedelta(hours=1),
+            "last_error": str(e),
+            "last_error_at": firestore.SERVER_TIMESTAMP,
+        })
+        raise
+
+
+def run_due_checks(limit: int = 20) -> int:
+    """Re-check every tracked pair whose next_check_at has passed"""
+    due = due_pairs(limit)
+    if not due:
+        return 0
+
+    driver = get_driver()
+    checked = 0
+    try:
+        for parish_name, election_date in due:
+            try:
+                recheck_or_defer(parish_name, election_date, driver=driver)
+                checked += 1
+            except Exception as e:
+                print(f"[SCHED] Error re-checking {parish_name} ({election_date}): {e}")
+    finally:
+        driver.quit()
+
+    return checked
+
+
+def run():
+    """Standalone scheduler loop"""
+    print("="*60)
+    print("🗓️  PROPOSITION RE-SCRAPE SCHEDULER")
+    print("="*60)
+    print(f"Looking for due checks every {POLL_INTERVAL} seconds")
+    print("Press Ctrl+C to stop")
+
+    while True:
+        try:
+            checked = run_due_checks()
+            if checked:
+                print(f"[SCHED] Re-checked {checked} parish list(s)")
+            time.sleep(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            print("\n🛑 Scheduler stopped")
+            break
+        except Exception as e:
+            print(f"[SCHED] Error in scheduler loop: {e}")
+            time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--track":
+        # python proposition_scheduler.py --track "EAST BATON ROUGE - 17" 11/15/2025
+        track_parish(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--seed":
+        print(f"[SCHED] Found {seed_from_existing_propositions()} existing parish/election pairs")
+    elif len(sys.argv) > 1 and sys.argv[1] == "--check":
+        recheck_parish(sys.argv[2], sys.argv[3])
+    else:
+        run()
@@ -1,123 +1,174 @@
 #!/usr/bin/env python3
 """
 Background Scraper Service
-Monitors Firestore for new users and automatically runs scrapers
+Monitors Firestore for new users and automatically runs scrapers, and
+summarizes ballot propositions as soon as they are written
 """
 
+import os
 import time
-import subprocess
+import queue
 import threading
 from datetime import datetime, timedelta
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import firestore
+
+from firebase_client import get_db
+from proposition_scheduler import due_pairs, recheck_or_defer
+from election_calendar import (SYNC_INTERVAL, SYNC_RETRY_BASE, sync_elections, due_warmups,
+                               warm_up_election, get_default_election)
+from worker_pool import ScrapeWorkerPool
+from job_queue import open_job_queue, PRIORITY_INTERACTIVE, PRIORITY_BULK, DEAD
+from user_checkpoint import STATE_COLLECTION, ProcessedUserSet
+from fetch_voter_info import fetch_from_firestore
+from scraper_voting import scrape_and_track, get_parish_coverage, get_driver as build_ballot_driver
+from scraper_user_info import build_driver as build_voter_driver
+from parish_registry import canonical_parish
+from add_ai_summaries import (SUMMARY_WORKERS, STATUS_PENDING, backfill_summary_status,
+                              get_backend, summarize_pending)
 
 # Initialize Firebase
-cred = credentials.Certificate("firebase_config.json")
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+db = get_db()
 
 # Configuration
-CHECK_INTERVAL = 60  # Check every 60 seconds
+CHECK_INTERVAL = 60  # Housekeeping tick (scheduled re-scrapes, calendar)
+RECONCILE_INTERVAL = 15 * 60  # Full-scan safety net behind the listeners
+FLAG_SCAN_INTERVAL = 6 * 3600  # Flag users written without needs_voter_lookup
+HEARTBEAT_INTERVAL = 60  # Renew leases on running jobs / reap dead replicas' jobs
+HOUSEKEEPING_LEASE = "housekeeping"  # Only the replica holding it runs housekeeping
+USER_PARISHES_DOC = "user_parishes"  # Every parish a lookup has saved, so reconcile needn't scan users
+
+# Per-job timeouts (seconds)
+VOTER_JOB_TIMEOUT = 120
+BALLOT_JOB_TIMEOUT = 180
+RECHECK_JOB_TIMEOUT = 180
+WARMUP_JOB_TIMEOUT = 120  # Only lists the parishes; their scrapes are separate jobs
+SUMMARY_JOB_TIMEOUT = 300  # Long propositions take several rate-limited calls; can't be cancelled
+
+# Browser jobs and summary jobs run on separate pools, so a backlog of one
+# never holds up the other
+SCRAPE_JOB_TYPES = ('voter_info', 'ballot_propositions', 'recheck', 'warmup')
+SUMMARY_JOB_TYPES = ('summary',)
+
+# scraper_log is an optional audit trail; give entries an expire_at so a
+# Firestore TTL policy on that field prunes them
+AUDIT_LOG = os.environ.get("SCRAPER_AUDIT_LOG", "1") == "1"
+AUDIT_LOG_TTL_DAYS = 30
+
+# User scans read only these fields, a page at a time
+USER_LOOKUP_FIELDS = ['zip_code', 'birth_month', 'birth_year', 'voter_parish', 'needs_voter_lookup']
+SCAN_PAGE_SIZE = 500
+
+
+def needs_voter_info(user_data):
+    """
+    User has ZIP + birth info and either NO voter_parish yet or a
+    re-lookup requested by the app (see is_relookup)
+    """
+    return (user_data.get('zip_code') is not None
+            and user_data.get('birth_month') is not None
+            and user_data.get('birth_year') is not None
+            and (user_data.get('voter_parish') is None or is_relookup(user_data)))
+
+
+def is_relookup(user_data):
+    """The app re-flags users who already have a parish when their lookup fields change"""
+    return user_data.get('needs_voter_lookup') is True and user_data.get('voter_parish') is not None
 
-# Your actual scraper file names
-VOTER_SCRAPER_PATH = "fetch_voter_info.py"
-BALLOT_SCRAPER_PATH = "scraper_voting.py"
 
-# Parish code mapping for auto-fixing
-PARISH_CODES = {
-    'ACADIA': '01', 'ALLEN': '02', 'ASCENSION': '03', 'ASSUMPTION': '04',
-    'AVOYELLES': '05', 'BEAUREGARD': '06', 'BIENVILLE': '07', 'BOSSIER': '08',
-    'CADDO': '09', 'CALCASIEU': '10', 'CALDWELL': '11', 'CAMERON': '12',
-    'CATAHOULA': '13', 'CLAIBORNE': '14', 'CONCORDIA': '15', 'DE SOTO': '16',
-    'EAST BATON ROUGE': '17', 'EAST CARROLL': '18', 'EAST FELICIANA': '19',
-    'EVANGELINE': '20', 'FRANKLIN': '21', 'GRANT': '22', 'IBERIA': '23',
-    'IBERVILLE': '24', 'JACKSON': '25', 'JEFFERSON': '26', 'JEFFERSON DAVIS': '27',
-    'LAFAYETTE': '28', 'LAFOURCHE': '29', 'LA SALLE': '30', 'LINCOLN': '31',
-    'LIVINGSTON': '32', 'MADISON': '33', 'MOREHOUSE': '34', 'NATCHITOCHES': '35',
-    'ORLEANS': '36', 'OUACHITA': '37', 'PLAQUEMINES': '38', 'POINTE COUPEE': '39',
-    'RAPIDES': '40', 'RED RIVER': '41', 'RICHLAND': '42', 'SABINE': '43',
-    'ST. BERNARD': '44', 'ST. CHARLES': '45', 'ST. HELENA': '46', 'ST. JAMES': '47',
-    'ST. JOHN THE BAPTIST': '48', 'ST. LANDRY': '49', 'ST. MARTIN': '50',
-    'ST. MARY': '51', 'ST. TAMMANY': '52', 'TANGIPAHOA': '53', 'TENSAS': '54',
-    'TERREBONNE': '55', 'UNION': '56', 'VERMILION': '57', 'VERNON': '58',
-    'WASHINGTON': '59', 'WEBSTER': '60', 'WEST BATON ROUGE': '61',
-    'WEST CARROLL': '62', 'WEST FELICIANA': '63', 'WINN': '64',
-}
+def scan_users(query, fields, page_size=SCAN_PAGE_SIZE):
+    """
+    Stream (user_id, data) for a users query, projected to `fields` and
+    paged with document cursors so no single read holds the whole set.
+    """
+    query = query.select(fields).order_by('__name__').limit(page_size)
+    last = None
+    while True:
+        page = (query.start_after(last) if last else query).get()
+        for doc in page:
+            yield doc.id, doc.to_dict() or {}
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
 
 class ScraperService:
-    def __init__(self):
+    def __init__(self, job_queue=None):
         self.running = True
-        self.processed_users = set()  # Keep track of processed users
-        
-        # Verify scraper files exist
-        import os
-        print("\n🔍 Checking for scraper files...")
-        if not os.path.exists(VOTER_SCRAPER_PATH):
-            print(f"❌ Voter scraper not found: {VOTER_SCRAPER_PATH}")
-            print(f"   Current directory: {os.getcwd()}")
-        else:
-            print(f"✅ Found voter scraper: {VOTER_SCRAPER_PATH}")
-            
-        if not os.path.exists(BALLOT_SCRAPER_PATH):
-            print(f"❌ Ballot scraper not found: {BALLOT_SCRAPER_PATH}")
-        else:
-            print(f"✅ Found ballot scraper: {BALLOT_SCRAPER_PATH}")
-        print()
+        self.processed_users = ProcessedUserSet(db)  # Checkpointed, not rebuilt from scraper_log
+        self.next_calendar_sync = 0
+        self.calendar_sync_failures = 0
+        self.next_flag_scan = 0
+        
+        # Firestore listeners push work here from their own threads; the
+        # main loop drains it and hands jobs to the worker pool
+        self.events = queue.Queue()
+        self.users_watch = None
+        self.propositions_watch = None
+        self.last_reconcile = 0
+        
+        # Scrapes run in-process on a pool of workers with warm browsers
+        self.pool = ScrapeWorkerPool({
+            'voter': lambda: build_voter_driver(headless=True),
+            'ballot': build_ballot_driver,
+        })
+        
+        # Durable queue between "work found" and "work running": dedupes jobs,
+        # retries failures with backoff and survives restarts. With the
+        # Firestore backend several replicas share it via leases.
+        self.jobs = job_queue or open_job_queue()
+        self.active_jobs = {}  # job id -> job type, for jobs on either pool
+        self.active_lock = threading.Lock()
+        
+        # Leases are renewed from their own thread, so a scrape or a long
+        # reconcile on the main loop can't let them lapse
+        self.heartbeat_stop = threading.Event()
+        self.heartbeat_thread = None
+        
+        # Housekeeping (re-scrapes, calendar, purges, reconciles, backfills)
+        # runs on whichever replica holds the housekeeping lease
+        self.is_leader = False
+        self.backfilled = False
+        
+        # Summaries only wait on the LLM API; the shared limiter in
+        # add_ai_summaries keeps these workers inside the quota. There is no
+        # browser to close, so a summary that overruns its timeout still
+        # completes if it succeeds.
+        self.summary_pool = ScrapeWorkerPool({}, workers=SUMMARY_WORKERS, thread_name_prefix="summary")
+        self.summaries_enabled = True
         
     def load_processed_users(self):
-        """Load list of users we've already processed"""
+        """Load the processed-user checkpoint (one-time migration from scraper_log)"""
         try:
-            # Check scraper_log collection for already processed users
-            logs = db.collection('scraper_log').stream()
+            if self.processed_users.load():
+                print(f"Loaded {len(self.processed_users)} processed users")
+                return
+            
+            # No checkpoint yet - build it from the old log once, then never again
+            print("No processed-user checkpoint found, migrating from scraper_log...")
+            logs = db.collection('scraper_log')\
+                .where('status', '==', 'completed')\
+                .select(['user_id', 'scraper_type'])\
+                .stream()
             for log in logs:
                 data = log.to_dict()
-                if data.get('status') == 'completed':
+                if data.get('scraper_type', 'voter_info') == 'voter_info' and data.get('user_id'):
                     self.processed_users.add(data['user_id'])
+            self.processed_users.save(force=True)
             print(f"Loaded {len(self.processed_users)} processed users")
         except Exception as e:
             print(f"Error loading processed users: {e}")
     
-    def fix_parish_format(self, user_id):
-        """Automatically fix parish format after scraping"""
+    def save_checkpoint(self, force=False):
+        """Persist the processed-user checkpoint (rate limited unless forced)"""
         try:
-            user_ref = db.collection('users').document(user_id)
-            user_doc = user_ref.get()
-            
-            if not user_doc.exists:
-                return False
-            
-            user_data = user_doc.to_dict()
-            current_parish = user_data.get('voter_parish')
-            
-            if not current_parish:
-                return False
-            
-            # Check if already in correct format
-            if ' - ' in current_parish:
-                return True
-            
-            # Get parish code
-            parish_upper = current_parish.strip().upper()
-            code = PARISH_CODES.get(parish_upper)
-            
-            if not code:
-                print(f"     ⚠️  Could not find code for parish: {current_parish}")
-                return False
-            
-            # Create new format
-            new_parish = f"{parish_upper} - {code}"
-            
-            # Update Firestore
-            user_ref.update({'voter_parish': new_parish})
-            print(f"     ✓ Fixed parish format: {current_parish} → {new_parish}")
-            return True
-            
+            self.processed_users.save(force=force)
         except Exception as e:
-            print(f"     Error fixing parish format: {e}")
-            return False
+            print(f"Error saving processed-user checkpoint: {e}")
     
     def log_scraper_run(self, user_id, scraper_type, status, error=None):
-        """Log scraper execution to Firestore"""
+        """Log scraper execution to the scraper_log audit trail"""
+        if not AUDIT_LOG:
+            return
         try:
             db.collection('scraper_log').add({
                 'user_id': user_id,
@@ -125,164 +176,549 @@ class ScraperService:
                 'status': status,
                 'error': error,
                 'timestamp': firestore.SERVER_TIMESTAMP,
+                'expire_at': datetime.utcnow() + timedelta(days=AUDIT_LOG_TTL_DAYS),
             })
         except Exception as e:
             print(f"Error logging scraper run: {e}")
     
+    def flag_unchecked_users(self):
+        """
+        Set needs_voter_lookup on users that don't have it - created before
+        the app wrote it, or by anything else that doesn't - so the listener
+        and scans, which filter on the flag, see them. Reads only the lookup
+        fields, at most once every FLAG_SCAN_INTERVAL across replicas.
+        """
+        if time.time() < self.next_flag_scan:
+            return 0
+        
+        state_ref = db.collection(STATE_COLLECTION).document('user_flags')
+        state = state_ref.get()
+        last_scan = state.to_dict().get('needs_voter_lookup_scanned_at') if state.exists else None
+        if last_scan and time.time() - last_scan.timestamp() < FLAG_SCAN_INTERVAL:
+            self.next_flag_scan = last_scan.timestamp() + FLAG_SCAN_INTERVAL
+            return 0
+        
+        print("Scanning for users without needs_voter_lookup...")
+        flagged = 0
+        batch = db.batch()
+        for user_id, user_data in scan_users(db.collection('users'), USER_LOOKUP_FIELDS):
+            if 'needs_voter_lookup' in user_data:
+                continue
+            batch.update(db.collection('users').document(user_id),
+                         {'needs_voter_lookup': needs_voter_info(user_data)})
+            flagged += 1
+            if flagged % SCAN_PAGE_SIZE == 0:
+                batch.commit()
+                batch = db.batch()
+        batch.commit()
+        
+        state_ref.set({'needs_voter_lookup_scanned_at': firestore.SERVER_TIMESTAMP}, merge=True)
+        self.next_flag_scan = time.time() + FLAG_SCAN_INTERVAL
+        print(f"Flagged {flagged} user(s)")
+        return flagged
+    
     def check_for_new_voter_info(self):
         """Check for users who need voter info scraped"""
         try:
-            # Get ALL users (can't use multiple != filters in Firestore)
-            users = db.collection('users').stream()
+            # The app sets needs_voter_lookup on signup, so this only reads
+            # users still waiting - and only the fields we check
+            query = db.collection('users').where('needs_voter_lookup', '==', True)
             
-            for user_doc in users:
-                user_id = user_doc.id
-                user_data = user_doc.to_dict()
-                
-                # Skip if already processed
-                if user_id in self.processed_users:
+            for user_id, user_data in scan_users(query, USER_LOOKUP_FIELDS):
+                # Skip if already processed, unless the app asked for a re-lookup
+                if user_id in self.processed_users and not is_relookup(user_data):
                     continue
                 
-                # Check if user has the required info
-                has_zip = user_data.get('zip_code') is not None
-                has_birth_month = user_data.get('birth_month') is not None
-                has_birth_year = user_data.get('birth_year') is not None
-                has_voter_parish = user_data.get('voter_parish') is not None
-                
-                # Only scrape if has ZIP + birth but NO voter_parish
-                if has_zip and has_birth_month and has_birth_year and not has_voter_parish:
+                # Only scrape if has ZIP + birth but NO voter_parish (or a re-lookup)
+                if needs_voter_info(user_data):
                     print(f"\n🔍 Found new user needing voter info: {user_id}")
                     print(f"   ZIP: {user_data.get('zip_code')}")
                     print(f"   Birth: {user_data.get('birth_month')}/{user_data.get('birth_year')}")
-                    self.run_voter_scraper(user_id)
+                    self.enqueue_voter_lookup(user_id, PRIORITY_BULK)
                 
         except Exception as e:
             print(f"Error checking for new voter info: {e}")
     
     def check_for_new_ballot_needs(self):
-        """Check for users who need ballot propositions scraped"""
+        """
+        Check for parishes that need ballot propositions scraped.
+        
+        Reads the user parish set (kept by on_voter_scraper_done) and the
+        election's coverage index - two documents however many users there
+        are. Only the first run, before the set exists, scans users for it.
+        """
         try:
-            # Get users with voter_parish
-            users = db.collection('users').stream()
-            
-            parishes_to_scrape = set()
+            election_date = get_default_election()
+            covered = get_parish_coverage(election_date)
             
-            for user_doc in users:
-                user_data = user_doc.to_dict()
-                parish = user_data.get('voter_parish')
-                
-                if not parish:
-                    continue
-                
-                # Check if we already decided to scrape this parish
-                if parish in parishes_to_scrape:
-                    continue
-                
-                # Check if propositions exist for this parish
-                props = db.collection('ballot_propositions')\
-                    .where('parish', '==', parish)\
-                    .limit(1)\
-                    .get()
-                
-                if not props:
-                    print(f"\n🗳️  Found parish needing propositions: {parish}")
-                    parishes_to_scrape.add(parish)
+            state = db.collection(STATE_COLLECTION).document(USER_PARISHES_DOC).get()
+            if state.exists:
+                parishes = set(state.to_dict().get('parishes', []))
+            else:
+                parishes = self.seed_user_parishes()
             
-            # Scrape for each parish (use any user from that parish)
-            if parishes_to_scrape:
-                for parish in parishes_to_scrape:
-                    # Find any user with this parish
-                    users = db.collection('users').where('voter_parish', '==', parish).limit(1).get()
-                    if users:
-                        user_id = users[0].id
-                        self.run_ballot_scraper(user_id)
+            for parish in parishes - set(covered):
+                print(f"\n🗳️  Found parish needing propositions: {parish}")
+                self.enqueue_ballot_scrape(parish, election_date, PRIORITY_BULK)
                 
         except Exception as e:
             print(f"Error checking for ballot needs: {e}")
     
-    def run_voter_scraper(self, user_id):
-        """Run voter info scraper for a user"""
-        print(f"  ▶️  Starting voter scraper for {user_id}...")
+    def seed_user_parishes(self):
+        """
+        Build the user parish set from users whose lookup is done, reading
+        only their parish field. Runs once, for users looked up before the
+        set was kept.
+        """
+        print("Building user parish set...")
+        query = db.collection('users').where('needs_voter_lookup', '==', False)
         
-        try:
-            # Run without capturing output so we can see what's happening
-            result = subprocess.run(
-                ['python', VOTER_SCRAPER_PATH, user_id],
-                timeout=120,  # 2 minute timeout
-                # Don't capture output - let it print to console
-                stdin=subprocess.PIPE,
-                text=True
-            )
+        parishes = set()
+        for _, user_data in scan_users(query, ['voter_parish']):
+            parish = user_data.get('voter_parish')
+            if parish:
+                # Older users may still hold a raw name; coverage is keyed canonically
+                parishes.add(canonical_parish(parish) or parish)
+        
+        # A union, so parishes saved by lookups during the scan aren't lost
+        db.collection(STATE_COLLECTION).document(USER_PARISHES_DOC).set(
+            {'parishes': firestore.ArrayUnion(sorted(parishes))}, merge=True)
+        print(f"Found {len(parishes)} parish(es)")
+        return parishes
+    
+    def start_listeners(self):
+        """
+        Subscribe to users waiting for a voter lookup instead of polling.
+        
+        The needs_voter_lookup flag keeps the listener to just those users;
+        new parishes come from completed lookups (see on_voter_scraper_done)
+        and the reconciliation scan.
+        
+        A second listener follows propositions waiting for a summary:
+        save_proposition marks every new or changed proposition pending,
+        whichever scraper wrote it, and its initial snapshot replays any
+        backlog.
+        """
+        self.stop_listeners()
+        self.users_watch = db.collection('users')\
+            .where('needs_voter_lookup', '==', True)\
+            .on_snapshot(self.on_users_snapshot)
+        print("👂 Listening for user changes")
+        
+        if self.summaries_enabled:
+            self.propositions_watch = db.collection('ballot_propositions')\
+                .where('summary_status', '==', STATUS_PENDING)\
+                .on_snapshot(self.on_propositions_snapshot)
+            print("👂 Listening for propositions needing summaries")
+    
+    def listeners_alive(self):
+        watches = [self.users_watch]
+        if self.summaries_enabled:
+            watches.append(self.propositions_watch)
+        return all(w is not None and not getattr(w, '_closed', False) for w in watches)
+    
+    def stop_listeners(self):
+        for name in ('users_watch', 'propositions_watch'):
+            watch = getattr(self, name)
+            if watch is not None:
+                watch.unsubscribe()
+                setattr(self, name, None)
+    
+    def on_users_snapshot(self, docs, changes, read_time):
+        """Listener callback (runs on the watch thread) - only queue events here"""
+        for change in changes:
+            if change.type.name == 'REMOVED':
+                continue  # Lookup finished (flag cleared) or user deleted
+            
+            user_id = change.document.id
+            user_data = change.document.to_dict() or {}
+            relookup = is_relookup(user_data)
             
-            if result.returncode == 0:
-                print(f"  ✅ Voter scraper completed for {user_id}")
+            if (relookup or user_id not in self.processed_users) and needs_voter_info(user_data):
+                self.events.put(('voter_info', user_id, relookup))
+    
+    def on_propositions_snapshot(self, docs, changes, read_time):
+        """Listener callback (runs on the watch thread) - only queue events here"""
+        for change in changes:
+            if change.type.name == 'REMOVED':
+                continue  # Summarized (status cleared) or withdrawn
+            
+            prop_data = change.document.to_dict() or {}
+            self.events.put(('summary', change.document.id, prop_data.get('content_hash', '')))
+    
+    def process_events(self, max_wait=1.0):
+        """Handle queued listener events until the queue stays empty for max_wait"""
+        handled = 0
+        parishes_checked = set()
+        coverage = None  # Read once per batch of events, only if needed
+        
+        while True:
+            try:
+                event = self.events.get(timeout=max_wait)
+            except queue.Empty:
+                return handled
+            
+            try:
+                if event[0] == 'voter_info':
+                    user_id, relookup = event[1], event[2]
+                    if relookup or user_id not in self.processed_users:
+                        print(f"\n🔍 {'Profile change' if relookup else 'New user'} needing voter info: {user_id}")
+                        # A relookup is the app asking again after the last lookup
+                        # finished, so REQUEUE_COOLDOWN mustn't swallow it
+                        self.enqueue_voter_lookup(user_id, PRIORITY_INTERACTIVE, force=relookup)
+                elif event[0] == 'ballot':
+                    parish = canonical_parish(event[1]) or event[1]
+                    if parish in parishes_checked:
+                        continue
+                    parishes_checked.add(parish)
+                    if coverage is None:
+                        election_date = get_default_election()
+                        coverage = get_parish_coverage(election_date)
+                    if parish not in coverage:
+                        print(f"\n🗳️  Found parish needing propositions: {parish}")
+                        self.enqueue_ballot_scrape(parish, election_date, PRIORITY_INTERACTIVE)
+                elif event[0] == 'summary':
+                    self.enqueue_summary(event[1], event[2], PRIORITY_INTERACTIVE)
+                handled += 1
+            except Exception as e:
+                print(f"Error handling {event[0]} event: {e}")
+            finally:
+                self.events.task_done()
+    
+    def enqueue_voter_lookup(self, user_id, priority, force=False):
+        if self.jobs.enqueue('voter_info', user_id, priority=priority, force=force):
+            print(f"  ➕ Queued voter lookup for {user_id}")
+    
+    def enqueue_ballot_scrape(self, parish, election_date, priority):
+        # Keyed by parish + election so every user in a parish shares one job
+        key = f"{parish}|{election_date}"
+        payload = {'parish': parish, 'election_date': election_date}
+        if self.jobs.enqueue('ballot_propositions', key, payload, priority=priority):
+            print(f"  ➕ Queued ballot scrape for {parish} ({election_date})")
+    
+    def enqueue_recheck(self, parish, election_date):
+        key = f"{parish}|{election_date}"
+        payload = {'parish': parish, 'election_date': election_date}
+        if self.jobs.enqueue('recheck', key, payload, priority=PRIORITY_BULK):
+            print(f"  ➕ Queued re-check for {parish} ({election_date})")
+    
+    def enqueue_warmup(self, election_date):
+        # One job per election however many ticks or replicas notice it
+        if self.jobs.enqueue('warmup', election_date, {'election_date': election_date},
+                             priority=PRIORITY_BULK):
+            print(f"  ➕ Queued warm-up for election {election_date}")
+    
+    def enqueue_summary(self, prop_id, content_hash, priority):
+        # Keyed by content too, so text that changes right after a summary
+        # finished still gets a new job
+        key = f"{prop_id}|{content_hash}"
+        if self.jobs.enqueue('summary', key, {'prop_id': prop_id}, priority=priority):
+            print(f"  ➕ Queued summary for {prop_id[:50]}")
+    
+    def dispatch_jobs(self):
+        """Move ready jobs from the durable queue onto free pool workers"""
+        started = 0
+        for pool, job_types in ((self.pool, SCRAPE_JOB_TYPES), (self.summary_pool, SUMMARY_JOB_TYPES)):
+            with self.active_lock:
+                busy = sum(1 for job_type in self.active_jobs.values() if job_type in job_types)
+            free = pool.workers - busy
+            if free <= 0:
+                continue
+            
+            jobs = self.jobs.claim(limit=free, job_types=job_types)
+            for job in jobs:
+                with self.active_lock:
+                    self.active_jobs[job['id']] = job['job_type']
+                if job['job_type'] == 'voter_info':
+                    self.run_voter_scraper(job['job_key'], job['id'])
+                elif job['job_type'] == 'ballot_propositions':
+                    self.run_ballot_scraper(job['payload']['parish'], job['payload']['election_date'], job['id'])
+                elif job['job_type'] == 'recheck':
+                    self.run_recheck_job(job['payload']['parish'], job['payload']['election_date'], job['id'])
+                elif job['job_type'] == 'warmup':
+                    self.run_warmup_job(job['payload']['election_date'], job['id'])
+                elif job['job_type'] == 'summary':
+                    self.run_summary_job(job['payload']['prop_id'], job['id'])
+                else:
+                    self.finish_job(job['id'], 'error', f"Unknown job type {job['job_type']}")
+            started += len(jobs)
+        return started
+    
+    def finish_job(self, job_id, status, error=None):
+        """Acknowledge a job: completed jobs are done, anything else is retried"""
+        with self.active_lock:
+            self.active_jobs.pop(job_id, None)
+        if status == 'completed':
+            self.jobs.complete(job_id)
+        elif self.jobs.fail(job_id, error or status) == DEAD:
+            print(f"  ☠️  Job {job_id} dead-lettered: {error or status}")
+    
+    def heartbeat(self):
+        """
+        Keep leases on our running jobs (and the housekeeping lease, if we
+        hold it) alive and pick up jobs from dead replicas
+        """
+        try:
+            with self.active_lock:
+                running = list(self.active_jobs)
+            self.jobs.renew(running)
+            if self.is_leader:
+                self.is_leader = self.jobs.acquire_leadership(HOUSEKEEPING_LEASE)
+            reaped = self.jobs.reap_expired_leases()
+            if reaped:
+                print(f"\n♻️  Re-queued {reaped} job(s) abandoned by another replica")
+        except Exception as e:
+            print(f"Error during job heartbeat: {e}")
+    
+    def heartbeat_loop(self):
+        while not self.heartbeat_stop.wait(HEARTBEAT_INTERVAL):
+            self.heartbeat()
+    
+    def start_heartbeat(self):
+        self.heartbeat_stop.clear()
+        self.heartbeat_thread = threading.Thread(target=self.heartbeat_loop, name="heartbeat", daemon=True)
+        self.heartbeat_thread.start()
+    
+    def stop_heartbeat(self):
+        self.heartbeat_stop.set()
+        if self.heartbeat_thread is not None:
+            self.heartbeat_thread.join()
+            self.heartbeat_thread = None
+    
+    def run_backfills(self):
+        """One-time flag backfills; each records when it finished, so reruns are cheap"""
+        if self.summaries_enabled:
+            try:
+                backfill_summary_status()
+            except Exception as e:
+                print(f"Error backfilling summary_status: {e}")
+                return
+        self.backfilled = True
+    
+    def housekeeping(self):
+        """
+        Periodic work that must run once across all replicas, done only by
+        the replica holding the housekeeping lease
+        """
+        try:
+            was_leader = self.is_leader
+            self.is_leader = self.jobs.acquire_leadership(HOUSEKEEPING_LEASE)
+        except Exception as e:
+            print(f"Error acquiring housekeeping lease: {e}")
+            self.is_leader = False
+        if not self.is_leader:
+            return
+        if not was_leader:
+            print("\n👑 Took over housekeeping")
+        
+        if not self.backfilled:
+            self.run_backfills()
+        
+        try:
+            self.flag_unchecked_users()
+        except Exception as e:
+            print(f"Error flagging users without needs_voter_lookup: {e}")
+        
+        # Re-check tracked parishes whose propositions are due for refresh
+        self.run_scheduled_rescrapes()
+        
+        # Discover upcoming elections and queue their warm-up before traffic arrives
+        self.check_election_calendar()
+        
+        self.jobs.purge_completed()
+        
+        if time.time() - self.last_reconcile >= RECONCILE_INTERVAL:
+            self.reconcile()
+            print(f"\n{'='*60}")
+            print(f"Processed {len(self.processed_users)} users so far")
+            print(f"Job queue: {self.jobs.stats()}")
+            print(f"{'='*60}")
+    
+    def reconcile(self):
+        """Periodic full scan in case a listener event was missed"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(f"\n[{timestamp}] 🔄 Reconciliation pass...")
+        
+        # Check for users needing voter info
+        self.check_for_new_voter_info()
+        
+        # Check for users needing ballot propositions
+        self.check_for_new_ballot_needs()
+        
+        self.last_reconcile = time.time()
+    
+    def run_scheduled_rescrapes(self):
+        """Queue incremental re-scrapes of parish proposition lists that are due"""
+        try:
+            for parish, election_date in due_pairs():
+                self.enqueue_recheck(parish, election_date)
+        except Exception as e:
+            print(f"Error queueing scheduled re-scrapes: {e}")
+    
+    def check_election_calendar(self):
+        """Refresh upcoming elections and queue warm-ups for any that are close"""
+        if time.time() < self.next_calendar_sync:
+            return
+        
+        try:
+            sync_elections()
+            self.calendar_sync_failures = 0
+            self.next_calendar_sync = time.time() + SYNC_INTERVAL
+        except Exception as e:
+            # Back off instead of relaunching a browser every tick
+            self.calendar_sync_failures += 1
+            delay = min(SYNC_INTERVAL, SYNC_RETRY_BASE * 2 ** (self.calendar_sync_failures - 1))
+            self.next_calendar_sync = time.time() + delay
+            print(f"Error syncing election calendar (retrying in {delay // 60} min): {e}")
+            return
+        
+        try:
+            # The warm-up itself runs as jobs so it never holds up this loop
+            for election_date in due_warmups():
+                self.enqueue_warmup(election_date)
+        except Exception as e:
+            print(f"Error checking for due warm-ups: {e}")
+    
+    def run_voter_scraper(self, user_id, job_id):
+        """Start the voter info scraper for a user on the worker pool"""
+        print(f"  ▶️  Starting voter scraper for {user_id}...")
+        self.pool.submit('voter_info', job_id, fetch_from_firestore, user_id,
+                         driver_kind='voter', timeout=VOTER_JOB_TIMEOUT,
+                         on_done=lambda result: self.on_voter_scraper_done(user_id, result))
+    
+    def on_voter_scraper_done(self, user_id, result):
+        """Runs on the worker thread once a voter job finishes"""
+        try:
+            if result.status == 'completed':
+                print(f"  ✅ Voter scraper completed for {user_id} ({result.duration:.1f}s)")
                 self.processed_users.add(user_id)
                 self.log_scraper_run(user_id, 'voter_info', 'completed')
                 
-                # Verify data was actually saved to Firestore
-                try:
-                    user_doc = db.collection('users').document(user_id).get()
-                    if user_doc.exists and user_doc.to_dict().get('voter_parish'):
-                        print(f"     ✓ Verified: Parish saved to Firestore")
-                        
-                        # Auto-fix parish format
-                        self.fix_parish_format(user_id)
-                    else:
-                        print(f"     ⚠️  Warning: No parish data in Firestore")
-                except:
-                    pass
-            else:
+                # The job returns the fields it wrote, parish already canonical;
+                # an unchanged re-verification writes only voter_info_verified_at
+                written = result.value if isinstance(result.value, dict) else {}
+                parish = written.get('voter_parish')
+                if parish:
+                    print(f"     ✓ Saved parish: {parish}")
+                    db.collection(STATE_COLLECTION).document(USER_PARISHES_DOC).set(
+                        {'parishes': firestore.ArrayUnion([parish])}, merge=True)
+                    
+                    # New parish for this user - make sure its ballot is scraped
+                    self.events.put(('ballot', parish))
+                elif 'voter_info_updated_at' not in written:
+                    print("     ✓ Voter info unchanged, verified")
+                else:
+                    print("     ⚠️  Warning: No parish data saved")
+            elif result.status == 'timeout':
+                print(f"  ⏱️  Voter scraper timed out for {user_id}")
+                self.log_scraper_run(user_id, 'voter_info', 'timeout')
+            elif result.status == 'failed':
                 print(f"  ❌ Voter scraper failed for {user_id}")
-                print(f"     Return code: {result.returncode}")
-                self.log_scraper_run(user_id, 'voter_info', 'failed', f"Exit code {result.returncode}")
-                
-        except subprocess.TimeoutExpired:
-            print(f"  ⏱️  Voter scraper timed out for {user_id}")
-            self.log_scraper_run(user_id, 'voter_info', 'timeout')
-        except Exception as e:
-            print(f"  ❌ Error running voter scraper: {e}")
-            self.log_scraper_run(user_id, 'voter_info', 'error', str(e))
+                self.log_scraper_run(user_id, 'voter_info', 'failed', 'No voter data saved')
+            else:
+                print(f"  ❌ Error running voter scraper: {result.error}")
+                self.log_scraper_run(user_id, 'voter_info', 'error', result.error)
+        finally:
+            self.finish_job(result.key, result.status, result.error)
     
-    def run_ballot_scraper(self, user_id):
-        """Run ballot proposition scraper for a user"""
-        print(f"  ▶️  Starting ballot scraper for {user_id}...")
-        
+    def run_ballot_scraper(self, parish, election_date, job_id):
+        """Start the ballot proposition scraper for a parish on the worker pool"""
+        print(f"  ▶️  Starting ballot scraper for {parish} ({election_date})...")
+        self.pool.submit('ballot_propositions', job_id, scrape_and_track, parish, election_date,
+                         driver_kind='ballot', timeout=BALLOT_JOB_TIMEOUT,
+                         on_done=lambda result: self.on_ballot_scraper_done(parish, result))
+    
+    def on_ballot_scraper_done(self, parish, result):
+        """Runs on the worker thread once a ballot job finishes"""
         try:
-            result = subprocess.run(
-                ['python', BALLOT_SCRAPER_PATH, user_id],
-                timeout=180,  # 3 minute timeout
-                stdin=subprocess.PIPE,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ Ballot scraper completed for {user_id}")
-                self.log_scraper_run(user_id, 'ballot_propositions', 'completed')
-                
-                # Verify propositions were saved
-                try:
-                    user_doc = db.collection('users').document(user_id).get()
-                    if user_doc.exists:
-                        parish = user_doc.to_dict().get('voter_parish')
-                        if parish:
-                            props = db.collection('ballot_propositions').where('parish', '==', parish).limit(1).get()
-                            if props:
-                                print(f"     ✓ Verified: {len(props)} proposition(s) in Firestore")
-                            else:
-                                print(f"     ⚠️  Warning: No propositions found for {parish}")
-                except:
-                    pass
+            if result.status == 'completed':
+                print(f"  ✅ Ballot scraper completed for {parish} ({result.duration:.1f}s)")
+                self.log_scraper_run(parish, 'ballot_propositions', 'completed')
+            elif result.status == 'timeout':
+                print(f"  ⏱️  Ballot scraper timed out for {parish}")
+                self.log_scraper_run(parish, 'ballot_propositions', 'timeout')
+            elif result.status == 'failed':
+                print(f"  ❌ Ballot scraper failed for {parish}")
+                self.log_scraper_run(parish, 'ballot_propositions', 'failed', 'Scrape returned no propositions')
             else:
-                print(f"  ❌ Ballot scraper failed for {user_id}")
-                print(f"     Return code: {result.returncode}")
-                self.log_scraper_run(user_id, 'ballot_propositions', 'failed', f"Exit code {result.returncode}")
-                
-        except subprocess.TimeoutExpired:
-            print(f"  ⏱️  Ballot scraper timed out for {user_id}")
-            self.log_scraper_run(user_id, 'ballot_propositions', 'timeout')
-        except Exception as e:
-            print(f"  ❌ Error running ballot scraper: {e}")
-            self.log_scraper_run(user_id, 'ballot_propositions', 'error', str(e))
+                print(f"  ❌ Error running ballot scraper: {result.error}")
+                self.log_scraper_run(parish, 'ballot_propositions', 'error', result.error)
+        finally:
+            self.finish_job(result.key, result.status, result.error)
+    
+    def run_recheck_job(self, parish, election_date, job_id):
+        """Start an incremental re-check of a parish's propositions on the worker pool"""
+        print(f"  ▶️  Starting re-check for {parish} ({election_date})...")
+        self.pool.submit('recheck', job_id, recheck_or_defer, parish, election_date,
+                         driver_kind='ballot', timeout=RECHECK_JOB_TIMEOUT,
+                         on_done=lambda result: self.on_recheck_done(parish, result))
+    
+    def on_recheck_done(self, parish, result):
+        """Runs on the worker thread once a re-check job finishes"""
+        try:
+            if result.status == 'completed':
+                print(f"  ✅ Re-checked {parish}: {result.value} ({result.duration:.1f}s)")
+            elif result.status == 'timeout':
+                print(f"  ⏱️  Re-check timed out for {parish}")
+            else:
+                print(f"  ❌ Error re-checking {parish}: {result.error or result.status}")
+        finally:
+            self.finish_job(result.key, result.status, result.error)
+    
+    def run_warmup_job(self, election_date, job_id):
+        """List an election's parishes on the worker pool and queue their scrapes"""
+        print(f"  ▶️  Starting warm-up for election {election_date}...")
+        self.pool.submit('warmup', job_id, self.queue_warmup_scrapes, election_date,
+                         timeout=WARMUP_JOB_TIMEOUT,
+                         on_done=lambda result: self.on_warmup_done(election_date, result))
+    
+    def queue_warmup_scrapes(self, election_date):
+        """
+        Warm-up job body: a bulk ballot job for every parish the scheduler
+        isn't tracking yet. The queue retries those scrapes on its own, so
+        the warm-up only fails (and is retried) if the parish list can't be
+        read. The election stays unwarmed while scrapes are queued, and the
+        next calendar check warms it up again to see whether they landed.
+        """
+        stats = warm_up_election(
+            election_date, summarize=False,  # The listener summarizes new propositions
+            enqueue=lambda parish, date: self.enqueue_ballot_scrape(parish, date, PRIORITY_BULK))
+        return stats if stats['parishes'] else False
+    
+    def on_warmup_done(self, election_date, result):
+        """Runs on the worker thread once a warm-up job finishes"""
+        try:
+            if result.status == 'completed' and result.value['warm']:
+                print(f"  🔥 Election {election_date} is warm")
+            elif result.status == 'completed':
+                print(f"  🔥 Warm-up for {election_date} queued {result.value['queued']} parish scrape(s)")
+            elif result.status == 'failed':
+                print(f"  ❌ Warm-up for {election_date} could not list its parishes")
+            else:
+                print(f"  ❌ Error warming up {election_date}: {result.error or result.status}")
+        finally:
+            self.finish_job(result.key, result.status, result.error)
+    
+    def run_summary_job(self, prop_id, job_id):
+        """Start summarizing a proposition on the summary pool"""
+        print(f"  ▶️  Starting summary for {prop_id[:50]}...")
+        self.summary_pool.submit('summary', job_id, summarize_pending, prop_id,
+                                 timeout=SUMMARY_JOB_TIMEOUT,
+                                 on_done=lambda result: self.on_summary_done(prop_id, result))
+    
+    def on_summary_done(self, prop_id, result):
+        """Runs on the worker thread once a summary job finishes"""
+        try:
+            if result.status == 'completed':
+                print(f"  ✅ Summary {result.value} for {prop_id[:50]} ({result.duration:.1f}s)")
+            elif result.status == 'timeout':
+                print(f"  ⏱️  Summary timed out for {prop_id[:50]}")
+            elif result.status == 'failed':
+                print(f"  ❌ Summary failed for {prop_id[:50]}")
+            else:
+                print(f"  ❌ Error generating summary: {result.error}")
+        finally:
+            self.finish_job(result.key, result.status, result.error)
     
     def run(self):
         """Main service loop"""
@@ -290,48 +726,48 @@ class ScraperService:
         print("🚀 SCRAPER SERVICE STARTING")
         print("="*60)
         
-        # Show what scrapers were found
-        if VOTER_SCRAPER_PATH:
-            print(f"✅ Voter scraper: {VOTER_SCRAPER_PATH}")
-        else:
-            print("❌ Voter scraper: NOT FOUND")
-            print("   Please ensure voter scraper is in this directory")
-            
-        if BALLOT_SCRAPER_PATH:
-            print(f"✅ Ballot scraper: {BALLOT_SCRAPER_PATH}")
-        else:
-            print("❌ Ballot scraper: NOT FOUND")
-            print("   Please ensure ballot scraper is in this directory")
-        
-        print(f"Checking for new users every {CHECK_INTERVAL} seconds")
+        print(f"Running scrapers in-process on {self.pool.workers} worker(s)")
+        print(f"Listening for user changes (full reconciliation every {RECONCILE_INTERVAL}s)")
         print("Press Ctrl+C to stop")
         print("="*60)
         
         # Load previously processed users
         self.load_processed_users()
         
+        try:
+            get_backend()
+            print(f"Summarizing new propositions on {self.summary_pool.workers} worker(s)")
+        except RuntimeError as e:
+            self.summaries_enabled = False
+            print(f"⚠️  Summaries disabled - {e}")
+        
+        # Anything that was mid-run when we last stopped goes back on the queue
+        recovered = self.jobs.recover()
+        print(f"Job queue: {self.jobs.stats()} ({recovered} recovered after restart)")
+        self.start_heartbeat()
+        
+        # The listener's initial snapshot replays every user, so it doubles
+        # as the first reconciliation pass
+        self.start_listeners()
+        self.last_reconcile = time.time()
+        last_tick = 0
+        
         while self.running:
             try:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                print(f"\n[{timestamp}] 🔄 Checking for new scrapers to run...")
+                # React to user changes as they arrive
+                self.process_events()
                 
-                # Check for users needing voter info
-                self.check_for_new_voter_info()
+                # Start queued jobs on any idle workers
+                self.dispatch_jobs()
                 
-                # Check for users needing ballot propositions
-                self.check_for_new_ballot_needs()
+                if time.time() - last_tick >= CHECK_INTERVAL:
+                    last_tick = time.time()
+                    self.housekeeping()
+                    self.save_checkpoint()
                 
-                print(f"[{timestamp}] ✓ Check complete. Sleeping {CHECK_INTERVAL}s...")
-                
-                # Sleep with periodic heartbeat
-                for i in range(CHECK_INTERVAL):
-                    time.sleep(1)
-                    if i > 0 and i % 20 == 0:  # Print every 20 seconds
-                        print(f"  ... still running ({CHECK_INTERVAL - i}s remaining)")
-                
-                print(f"\n{'='*60}")
-                print(f"Processed {len(self.processed_users)} users so far")
-                print(f"{'='*60}")
+                if not self.listeners_alive():
+                    print("\n⚠️  Listener closed - resubscribing")
+                    self.start_listeners()
                 
             except KeyboardInterrupt:
                 print("\n\n🛑 Shutting down service...")
@@ -340,6 +776,17 @@ class ScraperService:
                 print(f"\n❌ Error in main loop: {e}")
                 time.sleep(CHECK_INTERVAL)
         
+        self.stop_listeners()
+        print("Waiting for running scrapes to finish...")
+        self.pool.shutdown()
+        self.summary_pool.shutdown()
+        self.stop_heartbeat()
+        if self.is_leader:
+            try:
+                self.jobs.release_leadership(HOUSEKEEPING_LEASE)
+            except Exception as e:
+                print(f"Error releasing housekeeping lease: {e}")
+        self.save_checkpoint(force=True)
         print("👋 Service stopped")
 
 
@@ -9,40 +9,65 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.webdriver.chrome.service import Service
+import os
 import time
 import re
 from typing import Dict, Optional
 
+from host_limiter import SOS_BASE_URL, polite, polite_driver_get
+
+# Set in the API image, which ships Debian's chromium; elsewhere Selenium
+# finds Chrome and its driver itself
+CHROME_BIN = os.environ.get("CHROME_BIN")
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
+
+
+def build_driver(headless=True):
+    """Create a Chrome WebDriver configured for the voter portal"""
+    chrome_options = Options()
+    if CHROME_BIN:
+        chrome_options.binary_location = CHROME_BIN
+    
+    if headless:
+        chrome_options.add_argument('--headless=new')
+    
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    
+    service = Service(CHROMEDRIVER_PATH) if CHROMEDRIVER_PATH else None
+    driver = webdriver.Chrome(options=chrome_options, service=service)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
 
 class CompleteVoterScraper:
     """Complete voter scraper - gets registration info AND voting location"""
     
-    BASE_URL = "https://voterportal.sos.la.gov"
+    BASE_URL = SOS_BASE_URL
     SEARCH_URL = f"{BASE_URL}/Home/VoterLogin"
     
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, driver=None):
+        """Pass `driver` to reuse a warm browser; it is left open afterwards"""
         self.headless = headless
-        self.driver = None
+        self.driver = driver
+        self.owns_driver = driver is None
         self.voter_uid = None
     
     def _setup_driver(self):
-        """Setup Chrome WebDriver"""
-        chrome_options = Options()
-        
-        if self.headless:
-            chrome_options.add_argument('--headless=new')
+        """Setup Chrome WebDriver (or reset a borrowed one)"""
+        if not self.owns_driver:
+            # Drop the previous voter's portal session
+            self.driver.delete_all_cookies()
+            return
         
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        self.driver = build_driver(self.headless)
     
     def _find_input_field(self, possible_names, possible_ids=None):
         """Try to find input field by multiple possible names/ids"""
@@ -83,7 +108,7 @@ class CompleteVoterScraper:
             
             # Step 1: Login and get basic voter info
             print(f"📄 Loading {self.SEARCH_URL}...")
-            self.driver.get(self.SEARCH_URL)
+            polite_driver_get(self.driver, self.SEARCH_URL)
             time.sleep(2)
             
             print("✍️  Filling login form...")
@@ -109,7 +134,8 @@ class CompleteVoterScraper:
             # Submit
             print("🔍 Submitting login...")
             submit_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit'], input[type='submit']")
-            submit_button.click()
+            with polite(self.SEARCH_URL):
+                submit_button.click()
             time.sleep(3)
             
             # Check for errors
@@ -157,7 +183,7 @@ class CompleteVoterScraper:
             traceback.print_exc()
             return {"success": False, "error": f"Unexpected error: {str(e)}"}
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 print("🔒 Closing browser...")
                 self.driver.quit()
     
@@ -204,7 +230,7 @@ class CompleteVoterScraper:
             location_url = f"{self.BASE_URL}/Voting/Index/ElectionDayVoting?uid={self.voter_uid}"
             print(f"  Loading: {location_url}")
             
-            self.driver.get(location_url)
+            polite_driver_get(self.driver, location_url)
             time.sleep(2)
             
             # Extract location information
@@ -335,9 +361,10 @@ class CompleteVoterScraper:
 
 
 def get_complete_voter_info(first_name: str, last_name: str, zip_code: str,
-                            birth_month: int, birth_year: int, headless: bool = True) -> Dict:
+                            birth_month: int, birth_year: int, headless: bool = True,
+                            driver=None) -> Dict:
     """Convenience function to get complete voter info including location"""
-    scraper = CompleteVoterScraper(headless=headless)
+    scraper = CompleteVoterScraper(headless=headless, driver=driver)
     return scraper.get_complete_voter_info(first_name, last_name, zip_code, birth_month, birth_year)
 
 
@@ -1,9 +1,9 @@
 import time
 import re
+import hashlib
 from datetime import datetime
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.support.ui import Select, WebDriverWait
@@ -11,28 +11,25 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_client import get_db
+from parish_registry import canonical_parish
+from host_limiter import (SOS_BASE_URL, CircuitOpen, HostBusy, RetryableStatus,
+                          polite, polite_get, polite_driver_get)
 
 # -------------------------
 # Config
 # -------------------------
-FIREBASE_CRED_PATH = "firebase_config.json"   
-BASE_URL = "https://voterportal.sos.la.gov/PropositionText"
+BASE_URL = f"{SOS_BASE_URL}/PropositionText"
 HEADLESS = True
 IMPLICIT_WAIT = 8
 PAGE_LOAD_WAIT = 1.0
+DEFAULT_ELECTION = "11/15/2025"
+COVERAGE_COLLECTION = "parish_coverage"
 
 # -------------------------
 # Init Firebase
 # -------------------------
-try:
-    firebase_admin.get_app()
-except ValueError:
-    cred = credentials.Certificate(FIREBASE_CRED_PATH)
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
+db = get_db()
 
 # -------------------------
 # Utility helpers
@@ -109,204 +106,313 @@ def get_driver():
 
 def get_parish_code_from_name(parish_name: str) -> str:
     """Convert parish name to format expected by dropdown"""
-    parish_codes = {
-        'ACADIA': '01', 'ALLEN': '02', 'ASCENSION': '03', 'ASSUMPTION': '04',
-        'AVOYELLES': '05', 'BEAUREGARD': '06', 'BIENVILLE': '07', 'BOSSIER': '08',
-        'CADDO': '09', 'CALCASIEU': '10', 'CALDWELL': '11', 'CAMERON': '12',
-        'CATAHOULA': '13', 'CLAIBORNE': '14', 'CONCORDIA': '15', 'DE SOTO': '16',
-        'EAST BATON ROUGE': '17', 'EAST CARROLL': '18', 'EAST FELICIANA': '19',
-        'EVANGELINE': '20', 'FRANKLIN': '21', 'GRANT': '22', 'IBERIA': '23',
-        'IBERVILLE': '24', 'JACKSON': '25', 'JEFFERSON': '26', 'JEFFERSON DAVIS': '27',
-        'LAFAYETTE': '28', 'LAFOURCHE': '29', 'LA SALLE': '30', 'LINCOLN': '31',
-        'LIVINGSTON': '32', 'MADISON': '33', 'MOREHOUSE': '34', 'NATCHITOCHES': '35',
-        'ORLEANS': '36', 'OUACHITA': '37', 'PLAQUEMINES': '38', 'POINTE COUPEE': '39',
-        'RAPIDES': '40', 'RED RIVER': '41', 'RICHLAND': '42', 'SABINE': '43',
-        'ST. BERNARD': '44', 'ST. CHARLES': '45', 'ST. HELENA': '46', 'ST. JAMES': '47',
-        'ST. JOHN THE BAPTIST': '48', 'ST. LANDRY': '49', 'ST. MARTIN': '50',
-        'ST. MARY': '51', 'ST. TAMMANY': '52', 'TANGIPAHOA': '53', 'TENSAS': '54',
-        'TERREBONNE': '55', 'UNION': '56', 'VERMILION': '57', 'VERNON': '58',
-        'WASHINGTON': '59', 'WEBSTER': '60', 'WEST BATON ROUGE': '61',
-        'WEST CARROLL': '62', 'WEST FELICIANA': '63', 'WINN': '64',
-    }
-    
-    parish_upper = parish_name.strip().upper()
-    code = parish_codes.get(parish_upper)
-    
-    if code:
-        return f"{parish_upper} - {code}"
-    else:
-        print(f"[WARN] Parish code not found for: {parish_name}, using as-is")
-        return parish_name
+    parish = canonical_parish(parish_name)
+    if parish:
+        return parish
+    print(f"[WARN] Parish code not found for: {parish_name}, using as-is")
+    return parish_name
 
 # -------------------------
-# Main scraping function
+# Scraping steps
 # -------------------------
-def scrape_parish_for_election(parish_name: str, election_date: str):
-    """Scrape ballot propositions for a parish and election"""
-    if ' - ' not in parish_name:
-        parish_name = get_parish_code_from_name(parish_name)
-    
-    print(f"[INFO] Scraping propositions for: {parish_name}, Election: {election_date}")
-    
-    driver = get_driver()
-    driver.get(BASE_URL)
+def content_hash(text: str) -> str:
+    """Stable hash of proposition text, used to detect content changes."""
+    normalized = re.sub(r'\s+', ' ', text or '').strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def get_proposition_links(driver, parish_name: str, election_date: str):
+    """
+    Select the election and parish on the PropositionText page and return
+    the deduplicated list of (link text, href) for proposition detail pages.
+    Returns None if the election or the parish is not in its dropdown -
+    never another election's links under this election's date.
+    """
+    polite_driver_get(driver, BASE_URL)
     time.sleep(PAGE_LOAD_WAIT)
 
-    try:
-        wait = WebDriverWait(driver, 12)
+    wait = WebDriverWait(driver, 12)
 
-        # 1) Select election date
-        try:
-            select_election = Select(driver.find_element(By.ID, "MainContent_ddlElection"))
-        except Exception:
-            selects = driver.find_elements(By.TAG_NAME, "select")
-            select_election = Select(selects[0])
-
-        found = False
-        for option in select_election.options:
-            if option.text.strip() == election_date:
+    # 1) Select election date
+    try:
+        select_election = Select(driver.find_element(By.ID, "MainContent_ddlElection"))
+    except Exception:
+        selects = driver.find_elements(By.TAG_NAME, "select")
+        select_election = Select(selects[0])
+
+    found = False
+    for option in select_election.options:
+        if option.text.strip() == election_date:
+            # Changing the dropdown posts back to the portal
+            with polite(BASE_URL):
                 select_election.select_by_visible_text(option.text)
-                found = True
-                break
-        if not found:
-            print(f"[WARN] Election date '{election_date}' not found. Available:")
-            for option in select_election.options:
-                print(f"  - {option.text}")
-            print("[INFO] Using first option.")
-            select_election.select_by_index(0)
+            found = True
+            break
+    if not found:
+        print(f"[WARN] Election date '{election_date}' not found. Available:")
+        for option in select_election.options:
+            print(f"  - {option.text}")
+        return None
 
-        time.sleep(0.8)
+    time.sleep(0.8)
 
-        # 2) Select parish
-        try:
-            select_parish = Select(driver.find_element(By.ID, "MainContent_ddlParish"))
-        except Exception:
-            selects = driver.find_elements(By.TAG_NAME, "select")
-            if len(selects) > 1:
-                select_parish = Select(selects[1])
-            else:
-                raise RuntimeError("Could not locate parish select element.")
-
-        found = False
-        for option in select_parish.options:
-            if option.text.strip().upper() == parish_name.strip().upper():
+    # 2) Select parish
+    try:
+        select_parish = Select(driver.find_element(By.ID, "MainContent_ddlParish"))
+    except Exception:
+        selects = driver.find_elements(By.TAG_NAME, "select")
+        if len(selects) > 1:
+            select_parish = Select(selects[1])
+        else:
+            raise RuntimeError("Could not locate parish select element.")
+
+    found = False
+    for option in select_parish.options:
+        if option.text.strip().upper() == parish_name.strip().upper():
+            with polite(BASE_URL):
                 select_parish.select_by_visible_text(option.text)
-                found = True
+                time.sleep(1.2)
+                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            found = True
+            break
+    if not found:
+        print(f"[WARN] Parish '{parish_name}' not found.")
+        return None
+
+    # 3) Parse proposition links
+    page_html = driver.page_source
+    soup = BeautifulSoup(page_html, "html.parser")
+
+    link_elements = []
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        
+        # Skip javascript and external links
+        if "javascript" in href.lower():
+            continue
+        
+        # Look for links to proposition detail pages
+        # The SOS website uses /PropositionText/PropositionText/Detail?referendumId=
+        if "/PropositionText/Detail" in href or "/Detail?referendumId=" in href:
+            txt = a.get_text(strip=True)
+            if txt:  # Only add if there's actual text
+                link_elements.append((txt, href))
+
+    # Deduplicate
+    seen = set()
+    links = []
+    for txt, href in link_elements:
+        key = (txt, href)
+        if key in seen:
+            continue
+        seen.add(key)
+        links.append((txt, href))
+
+    return links
+
+def fetch_proposition_page(driver, txt: str, href: str, headers: dict = None):
+    """
+    Fetch one proposition detail page and extract its title and text.
+    `headers` may carry conditional-GET validators (If-None-Match /
+    If-Modified-Since); returns None when the server answers 304.
+    """
+    url = urljoin(BASE_URL, href)
+    print(f"[INFO] Fetching: {txt[:60]}...")
+
+    validators = {}
+    try:
+        r = polite_get(url, timeout=12, headers=headers or {})
+        if r.status_code == 304:
+            print("  Not modified since last check")
+            return None
+        r.raise_for_status()
+        prop_soup = BeautifulSoup(r.text, "html.parser")
+        if r.headers.get('ETag'):
+            validators['etag'] = r.headers['ETag']
+        if r.headers.get('Last-Modified'):
+            validators['last_modified'] = r.headers['Last-Modified']
+    except (CircuitOpen, HostBusy, RetryableStatus):
+        # The portal is pushing back - don't retry the same page through Selenium
+        raise
+    except Exception:
+        print("[WARN] Using Selenium for this page")
+        polite_driver_get(driver, url)
+        time.sleep(0.8)
+        prop_soup = BeautifulSoup(driver.page_source, "html.parser")
+
+    # Extract main content
+    selectors = [
+        "div#MainContent_ContentPlaceHolder1",
+        "div#MainContent",
+        "div#ContentPlaceHolder1",
+        "div#Content",
+        "div.content",
+        "article",
+    ]
+    
+    main_text = None
+    for sel in selectors:
+        container = prop_soup.select_one(sel)
+        if container:
+            # Remove navigation elements
+            for nav in container.select('nav, .breadcrumb, a[href*="PropositionText"]'):
+                nav.decompose()
+            
+            text = container.get_text("\n", strip=True)
+            if len(text) > 80:
+                main_text = clean_proposition_text(text)
                 break
-        if not found:
-            print(f"[WARN] Parish '{parish_name}' not found.")
-            return
 
-        time.sleep(1.2)
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    if not main_text:
+        # Fallback
+        all_text = prop_soup.get_text(" ", strip=True)
+        main_text = clean_proposition_text(all_text)
 
-        # 3) Parse proposition links
-        page_html = driver.page_source
-        soup = BeautifulSoup(page_html, "html.parser")
+    # Extract proper title
+    title = extract_proposition_title(prop_soup, txt)
 
-        link_elements = []
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            
-            # Skip javascript and external links
-            if "javascript" in href.lower():
-                continue
-            
-            # Look for links to proposition detail pages
-            # The SOS website uses /PropositionText/PropositionText/Detail?referendumId=
-            if "/PropositionText/Detail" in href or "/Detail?referendumId=" in href:
-                txt = a.get_text(strip=True)
-                if txt:  # Only add if there's actual text
-                    link_elements.append((txt, href))
-
-        # Deduplicate
-        seen = set()
-        links = []
-        for txt, href in link_elements:
-            key = (txt, href)
-            if key in seen:
-                continue
-            seen.add(key)
-            links.append((txt, href))
+    print(f"  Title: {title}")
+    print(f"  Text length: {len(main_text)} chars")
 
-        print(f"[INFO] Found {len(links)} proposition links.")
+    return {
+        "title": title,
+        "full_text": main_text,
+        "full_text_url": url,
+        "content_hash": content_hash(main_text),
+        "validators": validators,
+    }
 
-        # 4) Visit each link and extract content
-        for txt, href in links:
-            url = urljoin(BASE_URL, href)
-            print(f"[INFO] Fetching: {txt[:60]}...")
-
-            try:
-                r = requests.get(url, timeout=12)
-                r.raise_for_status()
-                prop_soup = BeautifulSoup(r.text, "html.parser")
-            except Exception:
-                print("[WARN] Using Selenium for this page")
-                driver.get(url)
-                time.sleep(0.8)
-                prop_soup = BeautifulSoup(driver.page_source, "html.parser")
-
-            # Extract main content
-            selectors = [
-                "div#MainContent_ContentPlaceHolder1",
-                "div#MainContent",
-                "div#ContentPlaceHolder1",
-                "div#Content",
-                "div.content",
-                "article",
-            ]
-            
-            main_text = None
-            for sel in selectors:
-                container = prop_soup.select_one(sel)
-                if container:
-                    # Remove navigation elements
-                    for nav in container.select('nav, .breadcrumb, a[href*="PropositionText"]'):
-                        nav.decompose()
-                    
-                    text = container.get_text("\n", strip=True)
-                    if len(text) > 80:
-                        main_text = clean_proposition_text(text)
-                        break
-
-            if not main_text:
-                # Fallback
-                all_text = prop_soup.get_text(" ", strip=True)
-                main_text = clean_proposition_text(all_text)
-
-            # Extract proper title
-            title = extract_proposition_title(prop_soup, txt)
-
-            print(f"  Title: {title}")
-            print(f"  Text length: {len(main_text)} chars")
-
-            # Save to Firestore
-            doc_id = sanitize_id(f"{parish_name}_{election_date}_{title}")
-            data = {
-                "title": title,
-                "full_text": main_text,
-                "full_text_url": url,
+def save_proposition(parish_name: str, election_date: str, page: dict) -> str:
+    """
+    Write a fetched proposition page to Firestore, returns the doc id.
+    A page whose content_hash matches the stored one only has its
+    scrape time refreshed, so its summary and summary_status are kept.
+    """
+    doc_id = sanitize_id(f"{parish_name}_{election_date}_{page['title']}")
+    ref = db.collection("ballot_propositions").document(doc_id)
+
+    stored = ref.get(field_paths=["content_hash"])
+    if stored.exists and (stored.to_dict() or {}).get("content_hash") == page["content_hash"]:
+        print(f"  Unchanged in Firestore: {doc_id[:50]}")
+        ref.update({"full_text_url": page["full_text_url"], "scraped_at": datetime.utcnow()})
+        return doc_id
+
+    data = {
+        "title": page["title"],
+        "full_text": page["full_text"],
+        "full_text_url": page["full_text_url"],
+        "content_hash": page["content_hash"],
+        "parish": parish_name,
+        "election_date": election_date,
+        "source": BASE_URL,
+        "scraped_at": datetime.utcnow(),
+        # New or changed text needs a fresh summary; add_ai_summaries.py
+        # queries on this instead of scanning every proposition
+        "summary_status": "pending",
+    }
+
+    print(f"  Saving to Firestore: {doc_id[:50]}...")
+    ref.set(data)
+    return doc_id
+
+def record_parish_coverage(parish_name: str, election_date: str, proposition_count: int):
+    """
+    Note in the per-election coverage index that this parish has been
+    scraped, so the service can tell which parishes still need propositions
+    with one document read instead of one query per parish.
+    """
+    db.collection(COVERAGE_COLLECTION).document(sanitize_id(election_date)).set({
+        "election_date": election_date,
+        "parishes": {
+            sanitize_id(parish_name): {
                 "parish": parish_name,
-                "election_date": election_date,
-                "source": BASE_URL,
+                "proposition_count": proposition_count,
                 "scraped_at": datetime.utcnow(),
             }
+        },
+    }, merge=True)
 
-            print(f"  Saving to Firestore: {doc_id[:50]}...")
-            db.collection("ballot_propositions").document(doc_id).set(data)
-            time.sleep(0.25)
+def get_parish_coverage(election_date: str) -> dict:
+    """{parish name: proposition count} for every parish scraped for an election"""
+    doc = db.collection(COVERAGE_COLLECTION).document(sanitize_id(election_date)).get()
+    if not doc.exists:
+        return {}
+    parishes = doc.to_dict().get("parishes", {})
+    return {p["parish"]: p.get("proposition_count", 0) for p in parishes.values()}
+
+# -------------------------
+# Main scraping function
+# -------------------------
+def scrape_parish_for_election(parish_name: str, election_date: str, driver=None):
+    """
+    Scrape ballot propositions for a parish and election.
+    Returns {href: {link_text, doc_id, title, content_hash, validators}}
+    for every proposition saved, or None if the scrape failed.
+    Pass `driver` to reuse a warm browser; it is left open afterwards.
+    """
+    if ' - ' not in parish_name:
+        parish_name = get_parish_code_from_name(parish_name)
+    
+    print(f"[INFO] Scraping propositions for: {parish_name}, Election: {election_date}")
+    
+    own_driver = driver is None
+    if own_driver:
+        driver = get_driver()
+
+    try:
+        links = get_proposition_links(driver, parish_name, election_date)
+        if links is None:
+            return None
+
+        print(f"[INFO] Found {len(links)} proposition links.")
+
+        # 4) Visit each link and extract content
+        saved = {}
+        for txt, href in links:
+            page = fetch_proposition_page(driver, txt, href)
+            doc_id = save_proposition(parish_name, election_date, page)
+            saved[href] = {
+                "link_text": txt,
+                "doc_id": doc_id,
+                "title": page["title"],
+                "content_hash": page["content_hash"],
+                "validators": page["validators"],
+            }
 
         print(f"[INFO] ✅ Scrape finished! Saved {len(links)} propositions.")
+        return saved
 
     except Exception as err:
         print(f"[ERROR] {err}")
         import traceback
         traceback.print_exc()
+        return None
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
+
+
+def scrape_and_track(parish_name: str, election_date: str, driver=None) -> bool:
+    """
+    Scrape a parish, then record it in the coverage index and hand it to the
+    re-scrape scheduler. This is the unit of work for parish-keyed ballot
+    jobs, which don't need a user id.
+    """
+    if ' - ' not in parish_name:
+        parish_name = get_parish_code_from_name(parish_name)
+
+    pages = scrape_parish_for_election(parish_name, election_date, driver=driver)
+    if pages is None:
+        return False
+
+    record_parish_coverage(parish_name, election_date, len(pages))
+
+    # Hand the parish to the re-scrape scheduler so it stays fresh
+    from proposition_scheduler import track_parish
+    track_parish(parish_name, election_date, pages)
+    return True
 
 
-def scrape_for_user(user_id: str, election_date: str = None):
+def scrape_for_user(user_id: str, election_date: str = None, driver=None) -> bool:
     """Scrape for a specific user based on their parish"""
     print(f"[INFO] Fetching propositions for user: {user_id}")
     
@@ -315,29 +421,33 @@ def scrape_for_user(user_id: str, election_date: str = None):
         
         if not user_doc.exists:
             print(f"[ERROR] User not found: {user_id}")
-            return
+            return False
         
         user_data = user_doc.to_dict()
         parish = user_data.get('voter_parish')
         
         if not parish:
             print("[ERROR] User has no voter_parish")
-            return
+            return False
         
         print(f"[INFO] User's parish: {parish}")
         
         if not election_date:
-            election_date = "11/15/2025"
+            from election_calendar import get_default_election
+            election_date = get_default_election()
             print(f"[INFO] Using default election: {election_date}")
         
-        scrape_parish_for_election(parish, election_date)
+        if not scrape_and_track(parish, election_date, driver=driver):
+            return False
         
         print(f"[INFO] ✅ Done! Propositions saved for {parish}")
+        return True
         
     except Exception as e:
         print(f"[ERROR] {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 
 if __name__ == "__main__":
@@ -346,8 +456,9 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         user_id = sys.argv[1]
         election_date = sys.argv[2] if len(sys.argv) > 2 else None
-        scrape_for_user(user_id, election_date)
+        success = scrape_for_user(user_id, election_date)
+        sys.exit(0 if success else 1)
     else:
         PARISH = "EAST BATON ROUGE - 17"
-        ELECTION = "11/15/2025"
+        ELECTION = DEFAULT_ELECTION
         scrape_parish_for_election(PARISH, ELECTION)
\ No newline at end of file
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Test script for the summary text helpers
+Checks what prompt_text keeps and strips, how split_into_chunks cuts long
+texts, how a packed request's usage is shared, what the summary cache key
+depends on and that a failed packed request leaves its items to the
+per-item fallback. Nothing here reads or writes Firestore or calls a model.
+"""
+
+import add_ai_summaries
+from add_ai_summaries import (new_usage, prompt_text, set_backend, split_into_chunks, split_usage,
+                              summary_cache_key)
+from llm_backend import LLMResponse, StubBackend
+
+HEADER = """Proposition Text:
+Election Date: 11/15/2025
+Parish: ORLEANS
+Election Type: Municipal General
+
+"""
+
+BODY = """Shall the Parish of Orleans levy a 2.5 mills tax for ten years?
+
+Parish: Orleans shall levy the tax on all property subject to taxation.
+Copyright fees collected under this ordinance are dedicated to libraries.
+Election date: the tax expires after the general election in 2035."""
+
+FURNITURE = """
+
+Page 1 of 2
+Printer-Friendly
+Louisiana Secretary of State
+© 2025 Louisiana Secretary of State. All rights reserved.
+All Rights Reserved."""
+
+
+def report(checks):
+    ok = True
+    for name, passed in checks:
+        print(f"  {'✅' if passed else '❌'} {name}")
+        ok &= passed
+    return ok
+
+
+def test_prompt_text():
+    print("\n" + "=" * 60)
+    print("TEST: prompt_text strips headers and furniture only")
+    print("=" * 60)
+
+    text = prompt_text(HEADER + BODY + FURNITURE)
+    print(text)
+
+    checks = [
+        ("header block removed", not text.startswith(("Proposition", "Election", "Parish: ORLEANS"))),
+        ("first body line kept", text.startswith("Shall the Parish of Orleans")),
+        ("'Parish:' body line kept", "Parish: Orleans shall levy the tax" in text),
+        ("'Copyright' body line kept", "Copyright fees collected" in text),
+        ("'Election date:' body line kept", "Election date: the tax expires" in text),
+        ("page furniture removed", "Page 1 of 2" not in text and "Printer-Friendly" not in text),
+        ("copyright footer removed", "©" not in text and "All Rights Reserved" not in text),
+        ("blank lines collapsed", "\n\n\n" not in text),
+        # A body that opens with a header-looking sentence is left alone
+        ("sentence after 'Parish:' at the top kept",
+         prompt_text("Parish: Orleans shall levy a tax for drainage.")
+         == "Parish: Orleans shall levy a tax for drainage."),
+    ]
+    return report(checks)
+
+
+def test_split_into_chunks():
+    print("\n" + "=" * 60)
+    print("TEST: split_into_chunks")
+    print("=" * 60)
+
+    max_tokens = 50  # 200 characters
+    paragraphs = [f"Section {n}. " + "The proceeds shall be dedicated. " * 3 for n in range(1, 9)]
+    long_sentence = "x" * 450
+    text = "\n\n".join(paragraphs + [long_sentence])
+    chunks = split_into_chunks(text, max_tokens=max_tokens)
+
+    checks = [
+        ("short text is one chunk", split_into_chunks("One paragraph.", max_tokens) == ["One paragraph."]),
+        ("every chunk within budget", all(len(c) <= max_tokens * 4 for c in chunks)),
+        ("no text lost", "".join(text.split()) == "".join("".join(chunks).split())),
+        ("paragraphs not cut", all(p.strip() in "\n\n".join(chunks) for p in paragraphs)),
+        ("over-long sentence cut", sum(c.count("x") for c in chunks) == len(long_sentence)),
+    ]
+    print(f"  {len(text)} chars -> {len(chunks)} chunk(s)")
+    return report(checks)
+
+
+def test_split_usage():
+    print("\n" + "=" * 60)
+    print("TEST: split_usage shares a packed request")
+    print("=" * 60)
+
+    usage = {'input_tokens': 1001, 'output_tokens': 302, 'calls': 1}
+    shares = split_usage(usage, 3)
+    totals = new_usage()
+    for share in shares:
+        for field in totals:
+            totals[field] += share[field]
+
+    checks = [
+        ("one share per proposition", len(shares) == 3),
+        ("shares add up to the request", totals == usage),
+        ("one call, not one per proposition", sum(s['calls'] for s in shares) == 1),
+        ("shares differ by at most one", max(s['input_tokens'] for s in shares)
+         - min(s['input_tokens'] for s in shares) <= 1),
+    ]
+    return report(checks)
+
+
+def test_summary_cache_key():
+    print("\n" + "=" * 60)
+    print("TEST: summary cache key")
+    print("=" * 60)
+
+    backend = StubBackend(latency=0, jitter=0)
+    set_backend(backend)
+    title, text = "Proposition No. 1 - Road Tax", prompt_text(HEADER + BODY)
+    key = summary_cache_key(title, text)
+    again = summary_cache_key(title, text)
+
+    same_title = summary_cache_key("  proposition no. 1 -   ROAD TAX ", text)
+    same_text = summary_cache_key(title, prompt_text(BODY + FURNITURE))
+    other_text = summary_cache_key(title, text + " Amended.")
+    other_title = summary_cache_key("Proposition No. 2 - Road Tax", text)
+
+    add_ai_summaries.PROMPT_VERSION += 1
+    other_prompt = summary_cache_key(title, text)
+    add_ai_summaries.PROMPT_VERSION -= 1
+
+    backend.model_name = "another-model"
+    other_model = summary_cache_key(title, text)
+
+    return report([
+        ("stable hex digest", len(key) == 64 and again == key),
+        ("title case/spacing ignored", same_title == key),
+        ("header/furniture differences ignored", same_text == key),
+        ("changed text misses", other_text != key),
+        ("different title misses", other_title != key),
+        ("prompt version bump misses", other_prompt != key),
+        ("different model misses", other_model != key),
+    ])
+
+
+class EmptyCache:
+    """Just enough of a Firestore client for a summary cache with nothing in it"""
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return doc_id
+
+    def get_all(self, refs):
+        return []
+
+
+class BrokenBackend:
+    """Answers a packed request with text that isn't JSON, or not at all"""
+
+    model_name = "broken"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def generate(self, prompt, json_output=False, max_output_tokens=None):
+        if self.fail:
+            raise RuntimeError("500 backend error")
+        return LLMResponse("Sorry, I can't help with that.", 100, 10)
+
+
+def test_failed_batch():
+    print("\n" + "=" * 60)
+    print("TEST: a failed packed request falls back per item")
+    print("=" * 60)
+
+    items = [(f"prop-{n}", f"Proposition No. {n}", BODY) for n in range(1, 4)]
+    real_get_db = add_ai_summaries.get_db
+    add_ai_summaries.get_db = EmptyCache
+    try:
+        outcomes = []
+        for backend in (BrokenBackend(), BrokenBackend(fail=True)):
+            set_backend(backend)
+            try:
+                outcomes.append(add_ai_summaries.generate_summaries_batch(items))
+            except Exception as e:
+                print(f"  generate_summaries_batch raised {type(e).__name__}: {e}")
+                outcomes.append(None)
+    finally:
+        add_ai_summaries.get_db = real_get_db
+
+    return report([
+        ("non-JSON answer returns no summaries", outcomes[0] == {}),
+        ("failed call returns no summaries", outcomes[1] == {}),
+        ("nothing produced, nothing to share", split_usage(new_usage(), 0) == []),
+    ])
+
+
+def run_all_tests():
+    results = [
+        ("prompt_text", test_prompt_text()),
+        ("split_into_chunks", test_split_into_chunks()),
+        ("split_usage", test_split_usage()),
+        ("summary_cache_key", test_summary_cache_key()),
+        ("failed batch", test_failed_batch()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{name:20} {status}")
+
+    return all(passed for _, passed in results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
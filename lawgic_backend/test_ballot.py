@@ -1,19 +1,34 @@
 #!/usr/bin/env python3
 """
 Quick test script for ballot proposition scraper
+
+    python test_ballot.py [user_id] [--standin]
+
+--standin scrapes a local portal_standin instead of the live SOS portal
 """
 
-from scraper_voting import scrape_for_user
+import os
 import sys
 
+# The scrapers read SOS_BASE_URL at import, so the stand-in starts first
+if "--standin" in sys.argv:
+    from portal_standin import start_standin
+    standin = start_standin()
+    os.environ["SOS_BASE_URL"] = standin.base_url
+    os.environ.setdefault("SOS_MIN_INTERVAL", "0")
+    print(f"Using SOS portal stand-in at {standin.base_url}")
+
+from scraper_voting import scrape_for_user
+
 def main():
     print("="*70)
     print("BALLOT PROPOSITION SCRAPER TEST")
     print("="*70)
     print()
     
-    if len(sys.argv) > 1:
-        user_id = sys.argv[1]
+    args = [a for a in sys.argv[1:] if a != "--standin"]
+    if args:
+        user_id = args[0]
     else:
         user_id = input("Enter Firebase User ID: ").strip()
     
@@ -21,7 +36,7 @@ def main():
         print("❌ User ID required")
         return
     
-    election_date = input("Election date (press Enter for default '11/15/2025'): ").strip()
+    election_date = input("Election date (press Enter for the next upcoming election): ").strip()
     if not election_date:
         election_date = None  # Will use default
     
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test script for the durable job queue
+Runs the SQLite backend on a throwaway file - no Firestore needed
+"""
+
+import os
+import time
+import tempfile
+
+import job_queue
+from job_queue import (JobQueue, job_id_for, MAX_ATTEMPTS, PRIORITY_INTERACTIVE, PRIORITY_NORMAL,
+                       PRIORITY_BULK, PENDING, RUNNING, DEAD)
+
+
+def new_queue(path=None):
+    return JobQueue(path or os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
+
+def make_ready(queue, job_id):
+    """Skip a job's backoff wait"""
+    queue._conn.execute("UPDATE jobs SET next_run_at = 0 WHERE id = ?", (job_id,))
+
+
+def status_of(queue, job_id):
+    row = queue._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row["status"] if row else None
+
+
+def report(checks):
+    ok = True
+    for name, passed in checks:
+        print(f"  {'✅' if passed else '❌'} {name}")
+        ok &= passed
+    return ok
+
+
+def test_dedupe():
+    print("\n" + "=" * 60)
+    print("TEST: duplicate jobs are merged")
+    print("=" * 60)
+
+    queue = new_queue()
+    job_id = job_id_for("voter_info", "user-1")
+    first = queue.enqueue("voter_info", "user-1", priority=PRIORITY_BULK)
+    again = queue.enqueue("voter_info", "user-1", priority=PRIORITY_BULK)
+    promoted = queue.enqueue("voter_info", "user-1", priority=PRIORITY_INTERACTIVE)
+    priority = queue._conn.execute("SELECT priority FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+    claimed = queue.claim(limit=5)
+    while_running = queue.enqueue("voter_info", "user-1")
+    queue.complete(job_id)
+    after_complete = queue.enqueue("voter_info", "user-1")
+    forced = queue.enqueue("voter_info", "user-1", force=True)
+
+    return report([
+        ("first enqueue queues", first is True),
+        ("duplicate is not queued twice", again is False),
+        ("higher-priority duplicate promotes the job", promoted is False and priority == PRIORITY_INTERACTIVE),
+        ("one job claimed", len(claimed) == 1),
+        ("duplicate of a running job ignored", while_running is False),
+        ("just-completed job not re-queued", after_complete is False),
+        ("force re-queues it", forced is True and status_of(queue, job_id) == PENDING),
+    ])
+
+
+def test_priority_order():
+    print("\n" + "=" * 60)
+    print("TEST: higher priority lanes are claimed first")
+    print("=" * 60)
+
+    queue = new_queue()
+    queue.enqueue("ballot_propositions", "bulk", priority=PRIORITY_BULK)
+    queue.enqueue("ballot_propositions", "normal", priority=PRIORITY_NORMAL)
+    queue.enqueue("voter_info", "interactive", priority=PRIORITY_INTERACTIVE)
+
+    order = [job["job_key"] for job in queue.claim(limit=3)]
+    print(f"  Claimed: {order}")
+    return report([
+        ("interactive, normal, bulk", order == ["interactive", "normal", "bulk"]),
+        ("all marked running", queue.stats() == {RUNNING: 3}),
+        ("nothing left to claim", queue.claim(limit=3) == []),
+    ])
+
+
+def test_backoff_and_dead_letter():
+    print("\n" + "=" * 60)
+    print("TEST: failures back off, then dead-letter")
+    print("=" * 60)
+
+    queue = new_queue()
+    job_id = job_id_for("summary", "prop-1")
+    queue.enqueue("summary", "prop-1")
+
+    statuses = []
+    waited = True
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        make_ready(queue, job_id)
+        claimed = queue.claim()
+        if [job["attempts"] for job in claimed] != [attempt]:
+            print(f"  ❌ attempt {attempt} not claimed")
+            return False
+        statuses.append(queue.fail(job_id, f"error {attempt}"))
+        if statuses[-1] == PENDING:
+            # A failed job isn't ready again until its backoff has passed
+            next_run_at = queue._conn.execute(
+                "SELECT next_run_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            waited &= next_run_at > time.time() and queue.claim() == []
+
+    print(f"  Statuses: {statuses}")
+    dead = queue.dead_letters()
+    return report([
+        ("retried until MAX_ATTEMPTS", statuses == [PENDING] * (MAX_ATTEMPTS - 1) + [DEAD]),
+        ("retries wait out their backoff", waited),
+        ("dead letter keeps the last error", [j["last_error"] for j in dead] == [f"error {MAX_ATTEMPTS}"]),
+        ("dead job not re-queued by events", queue.enqueue("summary", "prop-1") is False),
+        ("force revives it", queue.enqueue("summary", "prop-1", force=True) is True),
+        ("backoff grows", job_queue.BACKOFF_BASE * 0.5 <= job_queue.backoff_delay(1)
+         < job_queue.backoff_delay(4) <= job_queue.BACKOFF_MAX * 1.5),
+    ])
+
+
+def test_recover():
+    print("\n" + "=" * 60)
+    print("TEST: running jobs survive a restart")
+    print("=" * 60)
+
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    queue = new_queue(path)
+    queue.enqueue("voter_info", "user-1")
+    queue.enqueue("voter_info", "user-2")
+    queue.claim(limit=1)
+
+    # A new process opens the same file; the old one died mid-job
+    restarted = new_queue(path)
+    recovered = restarted.recover()
+    return report([
+        ("one job recovered", recovered == 1),
+        ("both pending again", restarted.stats() == {PENDING: 2}),
+        ("both claimable", len(restarted.claim(limit=5)) == 2),
+    ])
+
+
+def test_claim_by_type():
+    print("\n" + "=" * 60)
+    print("TEST: claim(job_types=...) only takes those types")
+    print("=" * 60)
+
+    queue = new_queue()
+    queue.enqueue("summary", "prop-1", priority=PRIORITY_INTERACTIVE)
+    queue.enqueue("voter_info", "user-1", priority=PRIORITY_BULK)
+    queue.enqueue("warmup", "11/15/2025", priority=PRIORITY_BULK)
+
+    scrapes = [job["job_type"] for job in queue.claim(limit=5, job_types=("voter_info", "warmup"))]
+    summaries = [job["job_type"] for job in queue.claim(limit=5, job_types=("summary",))]
+    print(f"  Scrape pool: {scrapes}, summary pool: {summaries}")
+
+    queue.complete(job_id_for("summary", "prop-1"))
+    kept = queue.purge_completed()
+    purged = queue.purge_completed(older_than=-1)
+    return report([
+        ("summary left for its own pool", sorted(scrapes) == ["voter_info", "warmup"]),
+        ("summary pool gets it", summaries == ["summary"]),
+        ("purge keeps fresh completed rows", kept == 0),
+        ("purge drops old completed rows", purged == 1
+         and status_of(queue, job_id_for("summary", "prop-1")) is None),
+    ])
+
+
+def run_all_tests():
+    results = [
+        ("Dedupe", test_dedupe()),
+        ("Priority order", test_priority_order()),
+        ("Backoff/dead letter", test_backoff_and_dead_letter()),
+        ("Recover", test_recover()),
+        ("Claim by type", test_claim_by_type()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{name:20} {status}")
+
+    return all(passed for _, passed in results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
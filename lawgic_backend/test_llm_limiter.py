@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM quota limiter
+Uses small made-up quotas so each wait is about a second - no API calls
+"""
+
+import time
+
+from llm_limiter import (LLMRateLimiter, RateLimited, estimate_tokens, is_rate_limit_error,
+                         BURST_SECONDS, MIN_RATE_FRACTION)
+
+
+def report(checks):
+    ok = True
+    for name, passed in checks:
+        print(f"  {'✅' if passed else '❌'} {name}")
+        ok &= passed
+    return ok
+
+
+def timed(fn, *args):
+    started = time.time()
+    fn(*args)
+    return time.time() - started
+
+
+def test_request_bucket():
+    print("\n" + "=" * 60)
+    print("TEST: requests-per-minute bucket")
+    print("=" * 60)
+
+    limiter = LLMRateLimiter(rpm=60, tpm=1_000_000)
+    burst = int(60 * BURST_SECONDS / 60)
+    burst_time = sum(timed(limiter.acquire, 1) for _ in range(burst))
+    wait = timed(limiter.acquire, 1)
+    print(f"  {burst} calls in {burst_time:.2f}s, next waited {wait:.2f}s")
+    return report([
+        ("burst goes straight through", burst_time < 0.5),
+        ("next call waits about a second", 0.7 <= wait <= 2.0),
+    ])
+
+
+def test_token_bucket():
+    print("\n" + "=" * 60)
+    print("TEST: tokens-per-minute bucket")
+    print("=" * 60)
+
+    limiter = LLMRateLimiter(rpm=6000, tpm=6000)  # 1000-token bucket, 100 tokens/s
+    full = timed(limiter.acquire, 1000)
+    wait = timed(limiter.acquire, 100)
+    print(f"  Full bucket took {full:.2f}s, 100 more tokens waited {wait:.2f}s")
+
+    # A request bigger than the bucket still runs once the bucket is full
+    oversized = LLMRateLimiter(rpm=6000, tpm=6000)
+    big = timed(oversized.acquire, 5000)
+
+    # Real usage above the estimate is charged to the next caller
+    corrected = LLMRateLimiter(rpm=6000, tpm=6000)
+    corrected.acquire(100)
+    corrected.record_usage(100, 1000)
+    overrun = timed(corrected.acquire, 100)
+    print(f"  Oversized request {big:.2f}s, after an overrun {overrun:.2f}s")
+    return report([
+        ("full bucket is immediate", full < 0.5),
+        ("100 tokens wait about a second", 0.7 <= wait <= 2.0),
+        ("oversized request doesn't deadlock", big < 0.5),
+        ("overrun is paid back", 0.7 <= overrun <= 2.5),
+    ])
+
+
+def test_adaptive_rate():
+    print("\n" + "=" * 60)
+    print("TEST: 429s halve the rate, successes recover it")
+    print("=" * 60)
+
+    limiter = LLMRateLimiter(rpm=60, tpm=60_000)
+    limiter.on_rate_limited(retry_after=1)
+    halved = limiter.stats()
+    paused = timed(limiter.acquire, 1)
+
+    for _ in range(10):
+        limiter.on_rate_limited(retry_after=0.01)
+    floor = limiter.stats()
+
+    for _ in range(100):
+        limiter.on_success()
+    recovered = limiter.stats()
+    print(f"  halved {halved}, floor {floor}, recovered {recovered}")
+    return report([
+        ("first 429 halves both rates", halved["rpm"] == 30 and halved["tpm"] == 30_000),
+        ("retry_after pauses callers", paused >= 0.9),
+        ("rate never drops below the floor", floor["rpm"] == 60 * MIN_RATE_FRACTION),
+        ("429s are counted", floor["throttled"] == 11),
+        ("successes climb back to the quota, not past it", recovered["rpm"] == 60
+         and recovered["tpm"] == 60_000),
+    ])
+
+
+def test_helpers():
+    print("\n" + "=" * 60)
+    print("TEST: estimate_tokens / is_rate_limit_error")
+    print("=" * 60)
+
+    class ResourceExhausted(Exception):
+        pass
+
+    class HttpError(Exception):
+        code = 429
+
+    return report([
+        ("~4 characters per token", estimate_tokens("x" * 400) == 100),
+        ("empty text still costs a token", estimate_tokens("") == 1 and estimate_tokens(None) == 1),
+        ("RateLimited", is_rate_limit_error(RateLimited())),
+        ("ResourceExhausted by name", is_rate_limit_error(ResourceExhausted("quota"))),
+        ("code 429", is_rate_limit_error(HttpError())),
+        ("429 in the message", is_rate_limit_error(Exception("HTTP 429 Too Many Requests"))),
+        ("429 status text", is_rate_limit_error(Exception("429 RESOURCE_EXHAUSTED. Quota exceeded"))),
+        ("429 inside a number isn't", not is_rate_limit_error(Exception("message id 14290 failed"))),
+        ("a count of 429 isn't", not is_rate_limit_error(Exception("read 429 bytes, expected 512"))),
+        ("other errors aren't", not is_rate_limit_error(ValueError("bad JSON"))),
+    ])
+
+
+def run_all_tests():
+    results = [
+        ("Request bucket", test_request_bucket()),
+        ("Token bucket", test_token_bucket()),
+        ("Adaptive rate", test_adaptive_rate()),
+        ("Helpers", test_helpers()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{name:20} {status}")
+
+    return all(passed for _, passed in results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
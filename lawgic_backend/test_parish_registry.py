@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for the parish registry
+Checks that spelling variants seen from users, the voter portal and older
+Firestore data all resolve to the canonical "NAME - CODE" form
+"""
+
+from parish_registry import PARISH_CODES, canonical_parish, parish_code, parish_name
+
+# (input, expected canonical form or None)
+VARIANTS = [
+    # Already canonical / portal dropdown text
+    ("EAST BATON ROUGE - 17", "EAST BATON ROUGE - 17"),
+    ("ST. TAMMANY - 52", "ST. TAMMANY - 52"),
+    ("DE SOTO - 16", "DE SOTO - 16"),
+
+    # Raw names as the voter lookup returns them
+    ("EAST BATON ROUGE", "EAST BATON ROUGE - 17"),
+    ("East Baton Rouge", "EAST BATON ROUGE - 17"),
+    ("  east   baton rouge  ", "EAST BATON ROUGE - 17"),
+    ("East Baton Rouge Parish", "EAST BATON ROUGE - 17"),
+    ("EAST BATON ROUGE PARISH", "EAST BATON ROUGE - 17"),
+    ("E. Baton Rouge", "EAST BATON ROUGE - 17"),
+    ("Parish of Orleans", "ORLEANS - 36"),
+
+    # Saint / St. / St
+    ("Saint Tammany", "ST. TAMMANY - 52"),
+    ("St Tammany", "ST. TAMMANY - 52"),
+    ("st. tammany parish", "ST. TAMMANY - 52"),
+    ("Saint John the Baptist", "ST. JOHN THE BAPTIST - 48"),
+    ("St. John", "ST. JOHN THE BAPTIST - 48"),
+    ("ST.LANDRY", "ST. LANDRY - 49"),
+
+    # Run-together and split names
+    ("DeSoto", "DE SOTO - 16"),
+    ("Desoto Parish", "DE SOTO - 16"),
+    ("LaSalle", "LA SALLE - 30"),
+    ("La Salle", "LA SALLE - 30"),
+    ("LASALLE", "LA SALLE - 30"),
+    ("Lafourche", "LAFOURCHE - 29"),
+    ("Pointe-Coupee", "POINTE COUPEE - 39"),
+    ("Jefferson Davis", "JEFFERSON DAVIS - 27"),
+    ("Jefferson", "JEFFERSON - 26"),
+
+    # Common names and misspellings
+    ("Vermillion", "VERMILION - 57"),
+    ("New Orleans", "ORLEANS - 36"),
+    ("EBR", "EAST BATON ROUGE - 17"),
+
+    # Numeric codes
+    ("17", "EAST BATON ROUGE - 17"),
+    ("7", "BIENVILLE - 07"),
+    ("17 - EAST BATON ROUGE", "EAST BATON ROUGE - 17"),
+    ("Saint Tammany - 52", "ST. TAMMANY - 52"),
+
+    # Not parishes
+    ("", None),
+    ("Baton", None),
+    ("Texas", None),
+    ("65", None),
+]
+
+
+def test_every_parish_round_trips():
+    print("=" * 60)
+    print("TEST 1: Every official parish resolves to itself")
+    print("=" * 60)
+
+    failures = []
+    for name, code in PARISH_CODES.items():
+        canonical = f"{name} - {code}"
+        if canonical_parish(name) != canonical or canonical_parish(canonical) != canonical:
+            failures.append(name)
+        if parish_name(code) != name or parish_code(name) != code:
+            failures.append(code)
+
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    passed = not failures and len(PARISH_CODES) == 64
+    print("✅ PASSED" if passed else "❌ FAILED")
+    return passed
+
+
+def test_variant_corpus():
+    print("\n" + "=" * 60)
+    print("TEST 2: Spelling variants resolve to the canonical form")
+    print("=" * 60)
+
+    failures = 0
+    for text, expected in VARIANTS:
+        got = canonical_parish(text)
+        if got != expected:
+            failures += 1
+            print(f"  ❌ {text!r}: expected {expected!r}, got {got!r}")
+
+    print(f"{len(VARIANTS) - failures}/{len(VARIANTS)} variants resolved")
+    passed = failures == 0
+    print("✅ PASSED" if passed else "❌ FAILED")
+    return passed
+
+
+def run_all_tests():
+    results = [
+        ("Round trip", test_every_parish_round_trips()),
+        ("Variant corpus", test_variant_corpus()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{name:20} {status}")
+
+    return all(passed for _, passed in results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the SOS portal stand-in
+Starts the stand-in on a free local port and walks the same pages and
+postbacks the scrapers do - nothing touches the real portal
+"""
+
+import re
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+from parish_registry import PARISH_CODES
+from portal_standin import start_standin
+
+
+def fetch(url, form=None, headers=None):
+    """(status, headers, body) for a GET, or a POST when form is given"""
+    data = urlencode(form).encode() if form is not None else None
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as r:
+            return r.status, r.headers, r.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode()
+
+
+def test_voter_lookup_flow():
+    print("=" * 60)
+    print("TEST 1: VoterLogin -> results -> ElectionDayVoting")
+    print("=" * 60)
+
+    server = start_standin()
+    try:
+        base = server.base_url
+        _, _, login = fetch(f"{base}/Home/VoterLogin")
+        has_form = all(f'name="{field}"' in login for field in ("FirstName", "LastName", "ZipCode", "MonthYear"))
+
+        _, _, results = fetch(f"{base}/Home/VoterLogin", {
+            "FirstName": "ASHTYN", "LastName": "ROBERTS", "ZipCode": "70817", "MonthYear": "07/2003",
+        })
+        uid = re.search(r"uid=([a-f0-9\-]+)", results)
+        _, _, location = fetch(f"{base}/Voting/Index/ElectionDayVoting?uid={uid.group(1)}") if uid else (0, 0, "")
+
+        _, _, unknown = fetch(f"{base}/Home/VoterLogin", {
+            "FirstName": "NOBODY", "LastName": "HERE", "ZipCode": "70817", "MonthYear": "01/1990",
+        })
+        _, _, synthetic = fetch(f"{base}/Home/VoterLogin", {
+            "FirstName": "TEST", "LastName": "VOTER0042", "ZipCode": "70808", "MonthYear": "01/1990",
+        })
+    finally:
+        server.shutdown()
+
+    checks = [
+        ("login form fields", has_form),
+        ("results parish", "Parish: East Baton Rouge" in re.sub(r"<[^>]+>", "", results)),
+        ("voter uid link", uid is not None),
+        ("polling place", "16555 APPOMATTOX AVE" in location),
+        ("unknown voter error", "alert-danger" in unknown),
+        ("synthetic voter", "Ward/Precinct:" in synthetic),
+    ]
+    for name, ok in checks:
+        print(f"  {'✓' if ok else '❌'} {name}")
+    passed = all(ok for _, ok in checks)
+    print("✅ PASSED" if passed else "❌ FAILED")
+    return passed
+
+
+def test_proposition_postbacks():
+    print("\n" + "=" * 60)
+    print("TEST 2: PropositionText postbacks and conditional GET")
+    print("=" * 60)
+
+    server = start_standin(seed=1)
+    try:
+        base = server.base_url
+        portal = server.portal
+        (election_date, parish), ids = next(
+            (key, ids) for key, ids in portal.fixtures.by_parish.items() if ids)
+        parish_option = f"{parish} - {PARISH_CODES[parish]}"
+
+        _, _, initial = fetch(f"{base}/PropositionText")
+        _, _, after_election = fetch(f"{base}/PropositionText", {"ddlElection": election_date, "ddlParish": ""})
+        _, _, after_parish = fetch(f"{base}/PropositionText",
+                                   {"ddlElection": election_date, "ddlParish": parish_option})
+        links = re.findall(r'href="(/PropositionText/PropositionText/Detail\?referendumId=\d+)"', after_parish)
+
+        status, headers, detail = fetch(base + links[0]) if links else (0, {}, "")
+        etag = headers.get("ETag") if links else None
+        not_modified, _, _ = fetch(base + links[0], headers={"If-None-Match": etag}) if etag else (0, {}, "")
+    finally:
+        server.shutdown()
+
+    checks = [
+        ("election dropdown", election_date in initial),
+        ("no parishes before election postback", " - 17<" not in initial),
+        ("parishes after election postback", len(re.findall(r' - \d\d</option>', after_election)) == 64),
+        ("proposition links after parish postback", len(links) == len(ids)),
+        ("detail page", status == 200 and "MainContent_ContentPlaceHolder1" in detail),
+        ("304 on matching ETag", not_modified == 304),
+    ]
+    for name, ok in checks:
+        print(f"  {'✓' if ok else '❌'} {name}")
+    passed = all(ok for _, ok in checks)
+    print("✅ PASSED" if passed else "❌ FAILED")
+    return passed
+
+
+def test_fault_injection():
+    print("\n" + "=" * 60)
+    print("TEST 3: Latency and error injection")
+    print("=" * 60)
+
+    failing = start_standin(error_rate=1.0)
+    limited = start_standin(rate_limit_rate=1.0)
+    slow = start_standin(latency=0.3)
+    try:
+        error_status, _, _ = fetch(f"{failing.base_url}/PropositionText")
+        limited_status, limited_headers, _ = fetch(f"{limited.base_url}/PropositionText")
+        started = time.time()
+        fetch(f"{slow.base_url}/PropositionText")
+        elapsed = time.time() - started
+        _, _, stats = fetch(f"{failing.base_url}/__stats")
+    finally:
+        for server in (failing, limited, slow):
+            server.shutdown()
+
+    checks = [
+        ("503 injected", error_status == 503),
+        ("429 with Retry-After", limited_status == 429 and limited_headers.get("Retry-After") == "1"),
+        ("latency added", elapsed >= 0.3),
+        ("stats endpoint", '"errors": 1' in stats),
+    ]
+    for name, ok in checks:
+        print(f"  {'✓' if ok else '❌'} {name}")
+    passed = all(ok for _, ok in checks)
+    print("✅ PASSED" if passed else "❌ FAILED")
+    return passed
+
+
+def run_all_tests():
+    results = [
+        ("Voter lookup", test_voter_lookup_flow()),
+        ("Propositions", test_proposition_postbacks()),
+        ("Fault injection", test_fault_injection()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{name:20} {status}")
+
+    return all(passed for _, passed in results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
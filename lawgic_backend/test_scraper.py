@@ -2,10 +2,27 @@
 """
 Test script for the Louisiana Voter Scraper
 Tests the scraper functionality and API endpoints
+
+    python test_scraper.py             # against the live SOS portal
+    python test_scraper.py --standin   # against a local portal_standin
+
+With --standin, start the API server with SOS_BASE_URL pointing at a
+stand-in too if the API tests should stay offline.
 """
 
+import os
+import sys
 import requests
 import json
+
+# The scrapers read SOS_BASE_URL at import, so the stand-in starts first
+if "--standin" in sys.argv:
+    from portal_standin import start_standin
+    standin = start_standin()
+    os.environ["SOS_BASE_URL"] = standin.base_url
+    os.environ.setdefault("SOS_MIN_INTERVAL", "0")
+    print(f"Using SOS portal stand-in at {standin.base_url}")
+
 from scraper_user_info import get_complete_voter_info
 
 def test_scraper_directly():
@@ -0,0 +1,221 @@
+"""
+Processed-User Checkpoint
+Compact record of which users the scraper service has already looked up.
+
+Each user id is kept as a 64-bit hash in one sorted array (8 bytes per
+user, so a million users is ~8 MB), and persisted to Firestore as a
+delta-encoded, zlib-compressed blob split across a few chunk documents.
+Startup is a handful of document reads no matter how many scraper runs
+have been logged.
+
+Every save writes a new generation of chunks and only then switches the
+meta document to it, so a crash mid-save leaves the previous checkpoint
+intact. The switch is a transaction: if another replica saved in the
+meantime, its users are merged in and the save is retried.
+"""
+
+import time
+import uuid
+import zlib
+import heapq
+import bisect
+import hashlib
+import threading
+from array import array
+from datetime import datetime
+
+# -------------------------
+# Config
+# -------------------------
+STATE_COLLECTION = "scraper_state"
+CHECKPOINT_DOC = "processed_users"
+CHUNK_BYTES = 900 * 1024     # Stay under Firestore's 1 MiB document limit
+SAVE_INTERVAL = 5 * 60       # Seconds between checkpoint writes
+MERGE_THRESHOLD = 10000      # Fold recent additions into the sorted array
+SAVE_ATTEMPTS = 5            # Merge-and-retry rounds when replicas save concurrently
+
+
+def user_hash(user_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def encode_hashes(hashes) -> bytes:
+    """Sorted uint64 array -> delta-encoded, compressed bytes"""
+    deltas = array("Q")
+    previous = 0
+    for h in hashes:
+        deltas.append(h - previous)
+        previous = h
+    return zlib.compress(deltas.tobytes(), 9)
+
+
+def decode_hashes(blob: bytes) -> array:
+    deltas = array("Q")
+    deltas.frombytes(zlib.decompress(blob))
+    hashes = array("Q")
+    total = 0
+    for d in deltas:
+        total += d
+        hashes.append(total)
+    return hashes
+
+
+def union_hashes(a, b) -> array:
+    """Merge two sorted hash sequences into one sorted array, dropping duplicates"""
+    merged = array("Q")
+    last = None
+    for h in heapq.merge(a, b):
+        if h != last:
+            merged.append(h)
+            last = h
+    return merged
+
+
+class ProcessedUserSet:
+    """Set-like view (`in`, add, len) over the processed-user checkpoint"""
+
+    def __init__(self, db, doc_id=CHECKPOINT_DOC):
+        self.db = db
+        self.doc_id = doc_id
+        self._sorted = array("Q")
+        self._recent = set()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self._generation = None  # Generation last loaded or saved by us
+
+    def __contains__(self, user_id):
+        h = user_hash(user_id)
+        with self._lock:
+            if h in self._recent:
+                return True
+            i = bisect.bisect_left(self._sorted, h)
+            return i < len(self._sorted) and self._sorted[i] == h
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sorted) + len(self._recent)
+
+    def add(self, user_id):
+        h = user_hash(user_id)
+        with self._lock:
+            i = bisect.bisect_left(self._sorted, h)
+            if i < len(self._sorted) and self._sorted[i] == h:
+                return
+            self._recent.add(h)
+            self._dirty = True
+            if len(self._recent) >= MERGE_THRESHOLD:
+                self._merge()
+
+    def _merge(self):
+        """Fold recent additions into the sorted array (caller holds the lock)"""
+        if not self._recent:
+            return
+        self._sorted = union_hashes(self._sorted, sorted(self._recent))
+        self._recent = set()
+
+    def _meta_ref(self):
+        return self.db.collection(STATE_COLLECTION).document(self.doc_id)
+
+    def _chunk_ref(self, generation, i):
+        # Checkpoints from before generations used un-suffixed chunk ids
+        suffix = f"_{generation}" if generation else ""
+        return self.db.collection(STATE_COLLECTION).document(f"{self.doc_id}{suffix}_chunk_{i}")
+
+    def _read_hashes(self, meta: dict) -> array:
+        generation = meta.get("generation")
+        blob = b"".join(
+            self._chunk_ref(generation, i).get().to_dict()["data"] for i in range(meta.get("chunks", 0))
+        )
+        return decode_hashes(blob) if blob else array("Q")
+
+    def _delete_chunks(self, generation, count):
+        for i in range(count):
+            self._chunk_ref(generation, i).delete()
+
+    def _switch_meta(self, expected_generation, meta: dict) -> bool:
+        """Point the meta doc at a new generation unless another save got there first"""
+        from firebase_admin import firestore
+
+        ref = self._meta_ref()
+
+        @firestore.transactional
+        def switch(transaction):
+            current = ref.get(transaction=transaction)
+            current = current.to_dict() if current.exists else {}
+            if current.get("generation") != expected_generation:
+                return False
+            transaction.set(ref, meta)
+            return True
+
+        return switch(self.db.transaction())
+
+    def load(self) -> bool:
+        """Load the checkpoint; returns False if none has been written yet"""
+        meta = self._meta_ref().get()
+        if not meta.exists:
+            return False
+        meta = meta.to_dict()
+        hashes = self._read_hashes(meta)
+
+        with self._lock:
+            self._sorted = hashes
+            self._recent = set()
+            self._dirty = False
+            self._generation = meta.get("generation")
+        return True
+
+    def save(self, force=False) -> bool:
+        """Write the checkpoint if it changed and SAVE_INTERVAL has passed"""
+        with self._lock:
+            if not self._dirty:
+                return False
+            if not force and time.time() - self._last_save < SAVE_INTERVAL:
+                return False
+            self._merge()
+            hashes = self._sorted
+            known_generation = self._generation
+            self._dirty = False
+            self._last_save = time.time()
+
+        try:
+            for _ in range(SAVE_ATTEMPTS):
+                previous = self._meta_ref().get()
+                previous = previous.to_dict() if previous.exists else {}
+                if previous and previous.get("generation") != known_generation:
+                    # Another replica saved since we last did - keep its users too
+                    hashes = union_hashes(hashes, self._read_hashes(previous))
+
+                # New chunks first, then the meta doc that points at them
+                generation = uuid.uuid4().hex[:12]
+                blob = encode_hashes(hashes)
+                chunks = [blob[i:i + CHUNK_BYTES] for i in range(0, len(blob), CHUNK_BYTES)] or [b""]
+                for i, chunk in enumerate(chunks):
+                    self._chunk_ref(generation, i).set({"data": chunk})
+
+                switched = self._switch_meta(previous.get("generation"), {
+                    "generation": generation,
+                    "chunks": len(chunks),
+                    "count": len(hashes),
+                    "bytes": len(blob),
+                    "saved_at": datetime.utcnow(),
+                })
+                if not switched:
+                    self._delete_chunks(generation, len(chunks))
+                    known_generation = None  # Merge whatever won before retrying
+                    continue
+
+                if previous:
+                    self._delete_chunks(previous.get("generation"), previous.get("chunks", 0))
+                with self._lock:
+                    self._sorted = union_hashes(self._sorted, hashes)
+                    self._generation = generation
+                return True
+        except Exception:
+            with self._lock:
+                self._dirty = True
+            raise
+
+        with self._lock:
+            self._dirty = True
+        return False
@@ -0,0 +1,99 @@
+"""
+Voter Lookup Backends for the API Server
+Two backends share one interface - get_voter_info(first_name, last_name,
+zip_code, birth_month, birth_year) returning the scraper's result dict
+(success plus the voter fields, or success False and an error):
+  - SeleniumVoterBackend runs CompleteVoterScraper against SOS_BASE_URL,
+    the live portal or a portal_standin.py instance
+  - StubVoterBackend answers from the stand-in's fixtures without a
+    browser, after a configurable delay, and fails a configurable share of
+    lookups, so the API itself can be load-tested offline
+
+The production image runs the Selenium backend (it ships Chromium and
+chromedriver, not portal_standin.py); the stub needs the stand-in module,
+which docker_compose.yaml mounts for local load tests.
+"""
+
+import os
+import time
+import random
+import threading
+
+from parish_registry import display_parish
+
+# -------------------------
+# Config
+# -------------------------
+VOTER_BACKEND = os.environ.get("VOTER_BACKEND", "selenium")   # or "stub"
+STUB_LATENCY = float(os.environ.get("VOTER_STUB_LATENCY", "0.5"))        # Seconds per lookup
+STUB_JITTER = float(os.environ.get("VOTER_STUB_JITTER", "0.2"))          # +/- seconds
+STUB_ERROR_RATE = float(os.environ.get("VOTER_STUB_ERROR_RATE", "0"))    # Share of lookups that fail
+
+
+class SeleniumVoterBackend:
+    """A fresh CompleteVoterScraper (and browser) per lookup"""
+
+    name = "selenium"
+
+    def get_voter_info(self, first_name, last_name, zip_code, birth_month, birth_year) -> dict:
+        from scraper_user_info import get_complete_voter_info
+
+        return get_complete_voter_info(first_name, last_name, zip_code, birth_month, birth_year,
+                                       headless=True)
+
+
+class StubVoterBackend:
+    """
+    Resolves voters the way portal_standin.py does - the fixture voter and
+    any VOTER<digits> last name - and shapes the result like the scraper's.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency=STUB_LATENCY, jitter=STUB_JITTER, error_rate=STUB_ERROR_RATE,
+                 seed=0, fixtures=None):
+        from portal_standin import PortalFixtures
+
+        self.fixtures = PortalFixtures(fixtures, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get_voter_info(self, first_name, last_name, zip_code, birth_month, birth_year) -> dict:
+        from portal_standin import NO_RECORD_ERROR
+
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        time.sleep(delay)
+
+        if failed:
+            return {"success": False, "error": "Unexpected error: stub lookup failed"}
+        voter = self.fixtures.find_voter(first_name, last_name, zip_code,
+                                         f"{int(birth_month):02d}/{birth_year}")
+        if voter is None:
+            return {"success": False, "error": NO_RECORD_ERROR}
+        return {
+            "name": voter["name"],
+            "party": voter["party"],
+            "parish": display_parish(voter["parish"]),
+            "ward_precinct": voter["ward_precinct"],
+            "status": voter["status"],
+            "voting_location_name": voter["location_name"],
+            "voting_location_address": f"{voter['location_address']}, {voter['location_city']}",
+            "success": True,
+        }
+
+
+def open_voter_backend():
+    """The backend selected by VOTER_BACKEND"""
+    if VOTER_BACKEND == "stub":
+        return StubVoterBackend()
+    return SeleniumVoterBackend()
@@ -0,0 +1,150 @@
+"""
+In-process Scraper Worker Pool
+Runs scrape jobs on a fixed set of worker threads. Each worker keeps its
+own warm Chrome drivers between jobs, and every job gets a timeout that
+cancels it by closing the worker's browser out from under it. Jobs without
+a browser can't be cancelled, so for them the timeout only decides how a
+failure that came too late is reported; a late success still counts.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------
+# Config
+# -------------------------
+WORKERS = int(os.environ.get("SCRAPER_WORKERS", "2"))
+MAX_JOBS_PER_DRIVER = 50  # Recycle browsers periodically to cap memory growth
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class JobResult:
+    """Outcome of a pooled job: status is completed, failed, timeout or error"""
+
+    def __init__(self, job_type, key, status, value=None, error=None, duration=0.0):
+        self.job_type = job_type
+        self.key = key
+        self.status = status
+        self.value = value
+        self.error = error
+        self.duration = duration
+
+    def __repr__(self):
+        return f"JobResult({self.job_type}, {self.key}, {self.status})"
+
+
+class _WarmDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.jobs = 0
+        self.killed = False
+
+
+class ScrapeWorkerPool:
+    """
+    Thread pool whose workers own warm WebDrivers.
+
+    driver_factories maps a driver kind (e.g. 'voter', 'ballot') to a
+    zero-argument function that builds a new driver of that kind.
+    """
+
+    def __init__(self, driver_factories, workers=WORKERS, thread_name_prefix="scraper"):
+        self.driver_factories = driver_factories
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._local = threading.local()
+        self._all_drivers = []
+        self._lock = threading.Lock()
+
+    def _checkout_driver(self, kind):
+        """Get this worker's warm driver of the given kind, creating it if needed"""
+        drivers = getattr(self._local, "drivers", None)
+        if drivers is None:
+            drivers = self._local.drivers = {}
+
+        warm = drivers.get(kind)
+        if warm and (warm.killed or warm.jobs >= MAX_JOBS_PER_DRIVER):
+            self._discard(warm)
+            warm = None
+
+        if warm is None:
+            warm = _WarmDriver(self.driver_factories[kind]())
+            drivers[kind] = warm
+            with self._lock:
+                self._all_drivers.append(warm)
+
+        warm.jobs += 1
+        return warm
+
+    def _discard(self, warm):
+        with self._lock:
+            if warm in self._all_drivers:
+                self._all_drivers.remove(warm)
+        if not warm.killed:
+            warm.killed = True
+            try:
+                warm.driver.quit()
+            except Exception:
+                pass
+
+    def _run(self, job_type, key, driver_kind, fn, args, timeout):
+        started = time.time()
+        try:
+            warm = self._checkout_driver(driver_kind) if driver_kind else None
+        except Exception as e:
+            return JobResult(job_type, key, "error", error=f"Could not start browser: {e}")
+        timed_out = threading.Event()
+
+        def cancel():
+            # Selenium calls can't be interrupted, but closing the browser
+            # makes the in-flight command fail fast on the worker thread
+            timed_out.set()
+            if warm:
+                self._discard(warm)
+
+        timer = threading.Timer(timeout, cancel)
+        timer.daemon = True
+        timer.start()
+
+        try:
+            if warm:
+                value = fn(*args, driver=warm.driver)
+            else:
+                value = fn(*args)
+            if timed_out.is_set() and warm:
+                # Its browser was closed mid-run, so the result can't be trusted
+                raise JobTimeout(f"{job_type} job exceeded {timeout}s")
+            status = "completed" if value not in (False, None) else "failed"
+            return JobResult(job_type, key, status, value=value, duration=time.time() - started)
+        except Exception as e:
+            if timed_out.is_set():
+                return JobResult(job_type, key, "timeout", error=f"Timed out after {timeout}s",
+                                 duration=time.time() - started)
+            if warm:
+                # The browser may be in an unknown state - start fresh next time
+                self._discard(warm)
+            return JobResult(job_type, key, "error", error=str(e), duration=time.time() - started)
+        finally:
+            timer.cancel()
+
+    def submit(self, job_type, key, fn, *args, driver_kind=None, timeout=120, on_done=None):
+        """
+        Queue fn(*args[, driver=...]) on the pool. on_done(JobResult) is
+        called from the worker thread when the job finishes.
+        """
+        future = self.executor.submit(self._run, job_type, key, driver_kind, fn, args, timeout)
+        if on_done:
+            future.add_done_callback(lambda f: on_done(f.result()))
+        return future
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+        with self._lock:
+            drivers = list(self._all_drivers)
+        for warm in drivers:
+            self._discard(warm)
@@ -1,10 +1,9 @@
 # scrape_propositions.py
+import os
+import sys
 import time
-import re
-from datetime import datetime
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.support.ui import Select, WebDriverWait
@@ -12,34 +11,24 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+# Share the backend's per-host politeness limiter for the SOS portal, and
+# its proposition writer (which brings up Firebase, see firebase_client.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lawgic_backend"))
+from host_limiter import (SOS_BASE_URL, CircuitOpen, HostBusy, RetryableStatus,
+                          polite, polite_get, polite_driver_get)
+from scraper_voting import content_hash, save_proposition
 
 # -------------------------
 # Config
 # -------------------------
-FIREBASE_CRED_PATH = "firebase_config.json"   # <--- put your service account here
-BASE_URL = "https://voterportal.sos.la.gov/PropositionText"
+BASE_URL = f"{SOS_BASE_URL}/PropositionText"
 HEADLESS = True               # set False for debugging (shows browser)
 IMPLICIT_WAIT = 8             # seconds
 PAGE_LOAD_WAIT = 1.0
 
-# -------------------------
-# Init Firebase
-# -------------------------
-cred = credentials.Certificate(FIREBASE_CRED_PATH)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
-
 # -------------------------
 # Utility helpers
 # -------------------------
-def sanitize_id(text: str) -> str:
-    """Make a filesystem/firestore-friendly id."""
-    text = re.sub(r'\s+', '_', text.strip())
-    text = re.sub(r'[^A-Za-z0-9_\-]', '', text)
-    return text.lower()[:200]
-
 def get_driver():
     options = webdriver.ChromeOptions()
     if HEADLESS:
@@ -60,7 +49,7 @@ def scrape_parish_for_election(parish_name: str, election_date: str):
     election_date: EXACT value as appears in the 'Election' dropdown (example: "11/15/2025")
     """
     driver = get_driver()
-    driver.get(BASE_URL)
+    polite_driver_get(driver, BASE_URL)
     time.sleep(PAGE_LOAD_WAIT)
 
     try:
@@ -79,12 +68,14 @@ def scrape_parish_for_election(parish_name: str, election_date: str):
         found = False
         for option in select_election.options:
             if option.text.strip() == election_date:
-                select_election.select_by_visible_text(option.text)
+                with polite(BASE_URL):
+                    select_election.select_by_visible_text(option.text)
                 found = True
                 break
         if not found:
-            print(f"[WARN] Election date '{election_date}' not found in dropdown. Using first option.")
-            select_election.select_by_index(0)
+            # Another election's propositions must not be saved under this date
+            print(f"[WARN] Election date '{election_date}' not found in dropdown. Skipping.")
+            return
 
         time.sleep(0.8)
 
@@ -102,12 +93,14 @@ def scrape_parish_for_election(parish_name: str, election_date: str):
         found = False
         for option in select_parish.options:
             if option.text.strip().upper() == parish_name.strip().upper():
-                select_parish.select_by_visible_text(option.text)
+                with polite(BASE_URL):
+                    select_parish.select_by_visible_text(option.text)
                 found = True
                 break
         if not found:
-            print(f"[WARN] Parish '{parish_name}' not found. Using first available parish.")
-            select_parish.select_by_index(0)
+            # Another parish's propositions must not be saved under this name
+            print(f"[WARN] Parish '{parish_name}' not found in dropdown. Skipping.")
+            return
 
         # Wait for the page to update proposition links (the page may use postback)
         time.sleep(1.2)
@@ -155,12 +148,14 @@ def scrape_parish_for_election(parish_name: str, election_date: str):
 
             # we will use requests.get for simplicity (faster) and fall back to Selenium if needed
             try:
-                r = requests.get(url, timeout=12)
+                r = polite_get(url, timeout=12)
                 r.raise_for_status()
                 prop_soup = BeautifulSoup(r.text, "html.parser")
+            except (CircuitOpen, HostBusy, RetryableStatus):
+                raise
             except Exception as e:
                 print("[WARN] requests failed, falling back to Selenium:", e)
-                driver.get(url)
+                polite_driver_get(driver, url)
                 time.sleep(0.8)
                 prop_soup = BeautifulSoup(driver.page_source, "html.parser")
 
@@ -196,22 +191,15 @@ def scrape_parish_for_election(parish_name: str, election_date: str):
                     title_candidates.append(el.get_text(strip=True))
             title = title_candidates[0] if title_candidates else txt
 
-            # Build Firestore document
-            doc_id = sanitize_id(f"{parish_name}_{election_date}_{title}")
-            data = {
+            # Save through the backend's writer, so new or changed text is
+            # marked for a summary and unchanged text keeps its summary
+            doc_id = save_proposition(parish_name, election_date, {
                 "title": title,
                 "full_text": main_text,
                 "full_text_url": url,
-                "parish": parish_name,
-                "election_date": election_date,
-                "source": BASE_URL,
-                "scraped_at": datetime.utcnow(),
-            }
-
-            # Save to Firestore
-            print(f"[INFO] Writing to Firestore doc id: {doc_id}")
-            db.collection("ballot_propositions").document(doc_id).set(data)
-            time.sleep(0.25)
+                "content_hash": content_hash(main_text),
+            })
+            print(f"[INFO] Saved Firestore doc id: {doc_id}")
 
         print("[INFO] Scrape finished.")
 
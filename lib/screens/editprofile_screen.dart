@@ -23,6 +23,9 @@ class _EditProfileState extends State<EditProfile> {
   final _birthYearController = TextEditingController();
   Uint8List? _image;
   String? _imageUrl;
+  bool _hasVoterParish = false;
+  // Lookup fields as loaded, to tell when the voter lookup must be redone
+  String _loadedLookupKey = '';
 
   bool _isLoading = true;
   bool _saving = false;
@@ -133,9 +136,11 @@ final List<String> _months = [
         _birthYearController.text = data['birth_year']?.toString() ?? '';
         _zipCodeController.text = data['zip_code']?.toString() ?? '';
         _imageUrl = data['ProfilePicUrl'] ?? '';
+        _hasVoterParish = data['voter_parish'] != null;
         _selectedBirthMonth = (data['birth_month'] is int)
                                 ?data['birth_month']
                                 :null;
+        _loadedLookupKey = _lookupKey();
 
 
         
@@ -154,6 +159,17 @@ final List<String> _months = [
     });
   }
 
+  // The fields the backend's voter lookup searches the SOS portal with
+  String _lookupKey() {
+    return [
+      _firstnameController.text.trim(),
+      _lastnameController.text.trim(),
+      _zipCodeController.text.trim(),
+      _selectedBirthMonth?.toString() ?? '',
+      _birthYearController.text.trim(),
+    ].join('|');
+  }
+
   Future<void> _saveProfile() async {
     final user = FirebaseAuth.instance.currentUser;
     if (user == null) {
@@ -208,6 +224,10 @@ final List<String> _months = [
             'zip_code': _zipCodeController.text.trim(),
             'birth_month': _selectedBirthMonth,
             'birth_year': int.parse(_birthYearController.text.trim()),
+            // Users still without a parish, or whose lookup fields changed,
+            // are queued for a voter lookup
+            if (!_hasVoterParish || _lookupKey() != _loadedLookupKey)
+              'needs_voter_lookup': true,
             'updated_at': FieldValue.serverTimestamp(),
           }, SetOptions(merge: true));
 
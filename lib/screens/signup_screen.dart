@@ -163,6 +163,8 @@ class _SignUpScreenState extends State<SignUpScreen> {
       'zip_code': _zipCodeController.text.trim(),
       'birth_month': _selectedBirthMonth,
       'birth_year': int.parse(_birthYearController.text.trim()),
+      // Lets the backend find users awaiting a voter lookup with one query
+      'needs_voter_lookup': true,
       'createdAt': FieldValue.serverTimestamp(),
     });
   }